@@ -0,0 +1,388 @@
+import argparse
+import asyncio
+import base64
+import functools
+import hashlib
+import hmac
+import json
+import math
+import os
+import signal
+import time
+from typing import Optional
+
+import bcrypt  # já instalado com o streamlit-authenticator (mesmos hashes do config.yaml)
+import numpy as np
+import pandas as pd
+import streamlit_authenticator as stauth
+import yaml
+from yaml.loader import SafeLoader
+
+import database
+from motor_taxas import Cotacao, MotorTaxas
+from motor_taxas.lote import COLUNA_CNAE, COLUNA_ITEM, COLUNA_MEDIDA, COLUNA_MUNICIPIO, itens_cotados
+from motor_taxas.medicao import definir_sessao, medir
+
+# How to use:
+# Serviço HTTP local (JSON) de cotação, para rodar ao lado do app Streamlit. As tabelas
+# (ANEXO I, taxas e CNAEs) são lidas uma vez na partida; o login é o mesmo do app
+# (usuários e senhas do config.yaml, em HTTP Basic) e as cotações válidas vão para o
+# histórico (historico_calculos.db) pela fila de gravação de database.py.
+# Example: python api_cotacoes.py --porta 8502
+#          curl -u admin:SENHA -d '{"municipio": "Ariquemes - RO", "item": "1.1", "medida": 15}' \
+#               http://127.0.0.1:8502/cotacao
+#          curl -u admin:SENHA -d '{"cotacoes": [{"municipio": "Ariquemes - RO", "item": "1.1", "medida": 15}]}' \
+#               http://127.0.0.1:8502/cotacoes
+#
+# Endpoints:
+#   GET  /saude      -> {"status": "ok", "tabelas": <hash das fontes>}   (sem login)
+#   POST /cotacao    {"municipio", "item", "medida", "cnpj_cpf"?, "salvar"?}
+#   POST /cotacoes   {"cotacoes": [{"municipio", "item" ou "cnae", "medida", "cnpj_cpf"?}, ...], "salvar"?}
+
+PORTA_PADRAO = 8502
+
+# Limites de uma requisição
+TAMANHO_MAXIMO_CORPO = 8 * 1024 * 1024
+TAMANHO_MAXIMO_LOTE = 10_000
+
+STATUS_HTTP = {
+    200: "OK",
+    400: "Bad Request",
+    401: "Unauthorized",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class ErroRequisicao(Exception):
+    """Erro com status HTTP e mensagem devolvida ao cliente."""
+
+    def __init__(self, status: int, mensagem: str):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+
+# =============================
+# AUTENTICAÇÃO
+# =============================
+
+class Credenciais:
+    """
+    Usuários e hashes bcrypt do config.yaml. Conferir um bcrypt custa centenas de ms, então
+    cada par usuário/senha aceito é lembrado (como HMAC com uma chave do processo) e as
+    requisições seguintes com a mesma senha só custam um HMAC.
+    """
+
+    def __init__(self, usuarios: dict):
+        self.hashes = {nome: dados["password"].encode() for nome, dados in usuarios.items()}
+        self._chave = os.urandom(32)
+        self._aceitas = {}
+
+    @classmethod
+    def do_config(cls, caminho: str = "config.yaml") -> "Credenciais":
+        with open(caminho) as arquivo:
+            config = yaml.load(arquivo, Loader=SafeLoader)
+        # Senhas em texto puro (aceitas pelo app) viram hash na partida, como no app
+        stauth.Hasher.hash_passwords(config["credentials"])
+        return cls(config["credentials"]["usernames"])
+
+    def _assinatura(self, usuario: str, senha: str) -> bytes:
+        return hmac.new(self._chave, f"{usuario}\0{senha}".encode(), hashlib.sha256).digest()
+
+    def conferida(self, usuario: str, senha: str) -> Optional[bool]:
+        """True se o par já foi aceito; None se ainda precisa do bcrypt."""
+        aceita = self._aceitas.get(usuario)
+        if aceita is not None and hmac.compare_digest(aceita, self._assinatura(usuario, senha)):
+            return True
+        return None if usuario in self.hashes else False
+
+    def conferir(self, usuario: str, senha: str) -> bool:
+        """Confere a senha com o bcrypt (bloqueante: chame fora do loop de eventos)."""
+        hash_senha = self.hashes.get(usuario)
+        if hash_senha is None or not bcrypt.checkpw(senha.encode(), hash_senha):
+            return False
+        self._aceitas[usuario] = self._assinatura(usuario, senha)
+        return True
+
+
+# =============================
+# COTAÇÃO
+# =============================
+
+def _numero_json(valor):
+    """NaN (taxa ausente) vira null; números do numpy viram float do Python."""
+    if valor is None:
+        return None
+    valor = float(valor)
+    return None if math.isnan(valor) else valor
+
+
+def cotacao_para_json(cotacao: Cotacao) -> dict:
+    return {
+        "municipio": cotacao.municipio,
+        "item": cotacao.item,
+        "atividade": cotacao.atividade,
+        "unidade_medida": cotacao.unidade_medida,
+        "medida": _numero_json(cotacao.medida),
+        "porte": cotacao.porte,
+        "potencial_poluidor": cotacao.potencial_poluidor,
+        "anexo": cotacao.anexo,
+        "valor_ufir": _numero_json(cotacao.valor_ufir),
+        "licencas": [
+            {
+                "codigo": licenca.codigo,
+                "servico": licenca.servico,
+                "valor_ufar": _numero_json(licenca.valor_ufar),
+                "valor_reais": _numero_json(licenca.valor_reais),
+            }
+            for licenca in cotacao.licencas
+        ],
+        "total_reais": _numero_json(cotacao.valor_total_reais) if cotacao.erro is None else None,
+        "tabela_emprestada": cotacao.tabela_emprestada,
+        "erro": cotacao.erro,
+    }
+
+
+def _medida(valor) -> float:
+    if isinstance(valor, str):
+        valor = valor.strip().replace(",", ".")
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        raise ErroRequisicao(400, f"medida inválida: {valor!r}")
+
+
+class ServicoCotacoes:
+    """Rotas da API sobre um motor já carregado; cada cotação válida é enfileirada no histórico."""
+
+    def __init__(self, motor: MotorTaxas, credenciais: Credenciais):
+        self.motor = motor
+        self.credenciais = credenciais
+        self.requisicoes = 0
+
+    def cotar(self, dados: dict) -> dict:
+        for campo in ("municipio", "item", "medida"):
+            if campo not in dados:
+                raise ErroRequisicao(400, f"campo obrigatório ausente: {campo}")
+        medida = _medida(dados["medida"])
+        cotacao = self.motor.cotar(str(dados["municipio"]), str(dados["item"]).strip(), medida)
+        if cotacao.erro is None and dados.get("salvar", True):
+            medida_texto = f"{medida} ({cotacao.unidade_medida})" if cotacao.unidade_medida else f"{medida}"
+            database.enfileirar_calculo(
+                municipio=cotacao.municipio,
+                grupo=self.motor.rotulo_grupo(cotacao.item),
+                atividade=cotacao.atividade,
+                medida=medida_texto,
+                porte=cotacao.porte,
+                potencial=cotacao.potencial_poluidor,
+                valor_total=cotacao.valor_total_reais,
+                cnpj_cpf=str(dados.get("cnpj_cpf", "")),
+            )
+        return cotacao_para_json(cotacao)
+
+    def cotar_lote(self, dados: dict) -> dict:
+        """Cota a lista de uma vez (MotorTaxas.cotar_lote, vetorizado)."""
+        linhas = dados.get("cotacoes")
+        if not isinstance(linhas, list) or not all(isinstance(linha, dict) for linha in linhas):
+            raise ErroRequisicao(400, "cotacoes deve ser uma lista de objetos")
+        if len(linhas) > TAMANHO_MAXIMO_LOTE:
+            raise ErroRequisicao(413, f"no máximo {TAMANHO_MAXIMO_LOTE} cotações por requisição")
+        if not linhas:
+            return {"cotacoes": []}
+
+        entrada = pd.DataFrame({
+            COLUNA_MUNICIPIO: [str(linha.get("municipio", "")) for linha in linhas],
+            COLUNA_ITEM: [str(linha.get("item") or "").strip() for linha in linhas],
+            COLUNA_MEDIDA: [linha.get("medida") for linha in linhas],
+        })
+        # O CNAE só entra quando alguma linha o usa (as sugestões são montadas no primeiro uso)
+        if any(linha.get("cnae") for linha in linhas):
+            entrada[COLUNA_CNAE] = [str(linha.get("cnae") or "") for linha in linhas]
+        saida = self.motor.cotar_lote(entrada)
+        if dados.get("salvar", True):
+            self._salvar_lote(saida, [str(linha.get("cnpj_cpf", "")) for linha in linhas])
+
+        # Colunas do resultado em registros JSON (NaN -> null)
+        colunas = list(saida.columns)
+        valores = saida[colunas].astype(object).where(saida[colunas].notna(), None)
+        return {"cotacoes": [dict(zip(colunas, linha)) for linha in valores.itertuples(index=False, name=None)]}
+
+    def _salvar_lote(self, saida: pd.DataFrame, documentos: list):
+        validas = np.flatnonzero(saida["ERRO"].isna().to_numpy())
+        if not len(validas):
+            return
+        itens = itens_cotados(saida, COLUNA_ITEM)[validas]
+        unidades = self.motor.unidades_por_linha[self.motor.matriz_portes.posicoes_dos_itens(itens)]
+        medidas = saida[COLUNA_MEDIDA].to_numpy()[validas]
+        for i, item, unidade, medida in zip(validas, itens, unidades, medidas):
+            linha = saida.iloc[i]
+            database.enfileirar_calculo(
+                municipio=linha[COLUNA_MUNICIPIO],
+                grupo=self.motor.rotulo_grupo(item),
+                atividade=linha["ATIVIDADE"],
+                medida=f"{medida} ({unidade})" if unidade else f"{medida}",
+                porte=linha["PORTE"],
+                potencial=linha["POTENCIAL_POLUIDOR"],
+                valor_total=float(linha["TOTAL_REAIS"]),
+                cnpj_cpf=documentos[i],
+            )
+
+    async def autenticar(self, cabecalhos: dict) -> str:
+        """Usuário do cabeçalho Authorization (HTTP Basic) ou ErroRequisicao 401."""
+        autorizacao = cabecalhos.get("authorization", "")
+        tipo, _, codificado = autorizacao.partition(" ")
+        try:
+            usuario, _, senha = base64.b64decode(codificado).decode().partition(":")
+        except ValueError:
+            usuario, senha = "", ""
+        if tipo.lower() == "basic" and usuario:
+            aceita = self.credenciais.conferida(usuario, senha)
+            if aceita is None:
+                loop = asyncio.get_running_loop()
+                aceita = await loop.run_in_executor(None, self.credenciais.conferir, usuario, senha)
+            if aceita:
+                return usuario
+        raise ErroRequisicao(401, "usuário ou senha inválidos")
+
+    async def responder(self, metodo: str, caminho: str, cabecalhos: dict, corpo: bytes) -> tuple[int, dict]:
+        self.requisicoes += 1
+        if caminho == "/saude":
+            return 200, {"status": "ok", "tabelas": self.motor.versao_tabelas}
+        if caminho not in ("/cotacao", "/cotacoes"):
+            raise ErroRequisicao(404, f"rota desconhecida: {caminho}")
+        if metodo != "POST":
+            raise ErroRequisicao(405, "use POST")
+
+        usuario = await self.autenticar(cabecalhos)
+        definir_sessao(f"api:{usuario}")
+        try:
+            dados = json.loads(corpo or b"{}")
+        except ValueError:
+            raise ErroRequisicao(400, "corpo não é um JSON válido")
+        if not isinstance(dados, dict):
+            raise ErroRequisicao(400, "o corpo deve ser um objeto JSON")
+
+        if caminho == "/cotacao":
+            with medir("api_cotacao"):
+                return 200, self.cotar(dados)
+        # Lotes grandes saem do loop de eventos para não segurar as outras conexões
+        loop = asyncio.get_running_loop()
+        with medir("api_cotacoes_lote"):
+            return 200, await loop.run_in_executor(None, functools.partial(self.cotar_lote, dados))
+
+
+# =============================
+# HTTP
+# =============================
+# HTTP/1.1 mínimo sobre asyncio (conexões persistentes, corpo com Content-Length), sem
+# dependências além da biblioteca padrão.
+
+async def _ler_requisicao(leitor: asyncio.StreamReader):
+    """(método, caminho, cabeçalhos, corpo, manter_conexao), ou None se o cliente fechou."""
+    linha = await leitor.readline()
+    if not linha:
+        return None
+    try:
+        metodo, caminho, versao = linha.decode("latin-1").split()
+    except ValueError:
+        raise ErroRequisicao(400, "linha de requisição inválida")
+    cabecalhos = {}
+    while True:
+        linha = await leitor.readline()
+        if linha in (b"\r\n", b"\n", b""):
+            break
+        nome, _, valor = linha.decode("latin-1").partition(":")
+        cabecalhos[nome.strip().lower()] = valor.strip()
+
+    tamanho = cabecalhos.get("content-length") or "0"
+    if not (tamanho.isascii() and tamanho.isdigit()):
+        raise ErroRequisicao(400, "Content-Length inválido")
+    tamanho = int(tamanho)
+    if tamanho > TAMANHO_MAXIMO_CORPO:
+        raise ErroRequisicao(413, f"corpo maior que {TAMANHO_MAXIMO_CORPO} bytes")
+    corpo = await leitor.readexactly(tamanho) if tamanho else b""
+    conexao = cabecalhos.get("connection", "").lower()
+    manter = conexao != "close" if versao == "HTTP/1.1" else conexao == "keep-alive"
+    return metodo.upper(), caminho.split("?")[0], cabecalhos, corpo, manter
+
+
+def _resposta(status: int, dados: dict, manter: bool) -> bytes:
+    corpo = json.dumps(dados, ensure_ascii=False).encode()
+    cabecalhos = [
+        f"HTTP/1.1 {status} {STATUS_HTTP.get(status, '')}",
+        "Content-Type: application/json; charset=utf-8",
+        f"Content-Length: {len(corpo)}",
+        f"Connection: {'keep-alive' if manter else 'close'}",
+    ]
+    if status == 401:
+        cabecalhos.append('WWW-Authenticate: Basic realm="cotacoes"')
+    return ("\r\n".join(cabecalhos) + "\r\n\r\n").encode() + corpo
+
+
+async def _atender_conexao(servico: ServicoCotacoes, leitor, escritor):
+    try:
+        while True:
+            manter = False
+            try:
+                requisicao = await _ler_requisicao(leitor)
+                if requisicao is None:
+                    break
+                metodo, caminho, cabecalhos, corpo, manter = requisicao
+                status, dados = await servico.responder(metodo, caminho, cabecalhos, corpo)
+            except ErroRequisicao as e:
+                status, dados = e.status, {"erro": e.mensagem}
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            except Exception as e:
+                status, dados = 500, {"erro": f"{type(e).__name__}: {e}"}
+            escritor.write(_resposta(status, dados, manter))
+            await escritor.drain()
+            if not manter:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        escritor.close()
+
+
+async def iniciar_servidor(servico: ServicoCotacoes, host: str = "127.0.0.1", porta: int = PORTA_PADRAO):
+    """Abre o servidor (asyncio.Server) da API; porta 0 escolhe uma porta livre."""
+    return await asyncio.start_server(functools.partial(_atender_conexao, servico), host, porta)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API JSON local de cotação das taxas de licenciamento.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    parser.add_argument("--config", default="config.yaml", help="arquivo com os usuários do app")
+    parser.add_argument("--banco", default=database.DB_NAME, help="banco SQLite do histórico")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    database.DB_NAME = args.banco
+    database.init_db()
+    database.iniciar_persistencia_tempos()
+    servico = ServicoCotacoes(MotorTaxas.carregar(), Credenciais.do_config(args.config))
+    print(f"Tabelas carregadas em {(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+    async def servir():
+        servidor = await iniciar_servidor(servico, args.host, args.porta)
+        enderecos = ", ".join(f"http://{s.getsockname()[0]}:{s.getsockname()[1]}" for s in servidor.sockets)
+        print(f"API de cotações em {enderecos}", flush=True)
+        # SIGTERM encerra normalmente: a fila do histórico é descarregada na saída (atexit)
+        parar = asyncio.Event()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, parar.set)
+        async with servidor:
+            await parar.wait()
+
+    try:
+        asyncio.run(servir())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Teste de carga local da API de cotações (api_cotacoes.py): sobe o servidor em outro
+processo, com um usuário de teste e um banco temporário, e mantém várias conexões
+simultâneas cotando sem parar. Mede requisições/s e a latência (p50/p95/p99/máx) da
+cotação única e do lote, e confere as respostas com o motor.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_api_cotacoes [segundos] [conexoes]
+"""
+import asyncio
+import base64
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import bcrypt
+import numpy as np
+import yaml
+
+from motor_taxas import MUNICIPIOS_CONFIG, MotorTaxas
+
+USUARIO, SENHA = "carga", "senha-de-teste"
+TAMANHO_LOTE = 500
+
+
+def porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def escrever_config(caminho: str):
+    # Custo baixo do bcrypt: o teste mede a API, não o login
+    hash_senha = bcrypt.hashpw(SENHA.encode(), bcrypt.gensalt(rounds=4)).decode()
+    with open(caminho, "w") as arquivo:
+        yaml.safe_dump({"credentials": {"usernames": {USUARIO: {"name": "Carga", "password": hash_senha}}}}, arquivo)
+
+
+class Cliente:
+    """Conexão HTTP/1.1 persistente com a API."""
+
+    def __init__(self, porta: int):
+        self.porta = porta
+        self.autorizacao = "Basic " + base64.b64encode(f"{USUARIO}:{SENHA}".encode()).decode()
+
+    async def abrir(self):
+        self.leitor, self.escritor = await asyncio.open_connection("127.0.0.1", self.porta)
+
+    async def post(self, caminho: str, dados: dict) -> tuple[int, dict]:
+        corpo = json.dumps(dados).encode()
+        self.escritor.write(
+            f"POST {caminho} HTTP/1.1\r\nHost: 127.0.0.1\r\nAuthorization: {self.autorizacao}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(corpo)}\r\n\r\n".encode() + corpo
+        )
+        await self.escritor.drain()
+        status = int((await self.leitor.readline()).split()[1])
+        tamanho = 0
+        while (linha := await self.leitor.readline()) not in (b"\r\n", b""):
+            nome, _, valor = linha.decode().partition(":")
+            if nome.lower() == "content-length":
+                tamanho = int(valor)
+        return status, json.loads(await self.leitor.readexactly(tamanho))
+
+    def fechar(self):
+        self.escritor.close()
+
+
+async def carga(porta: int, duracao: float, conexoes: int, gerar_requisicao) -> np.ndarray:
+    """Cada conexão repete requisições até acabar o tempo; devolve as latências (s)."""
+    latencias = []
+
+    async def trabalhar(semente: int):
+        cliente = Cliente(porta)
+        await cliente.abrir()
+        rng = np.random.default_rng(semente)
+        fim = time.perf_counter() + duracao
+        while time.perf_counter() < fim:
+            caminho, dados = gerar_requisicao(rng)
+            inicio = time.perf_counter()
+            status, _ = await cliente.post(caminho, dados)
+            latencias.append(time.perf_counter() - inicio)
+            assert status == 200, status
+        cliente.fechar()
+
+    await asyncio.gather(*(trabalhar(i) for i in range(conexoes)))
+    return np.array(latencias)
+
+
+def relatorio(rotulo: str, latencias: np.ndarray, duracao: float, itens_por_requisicao: int = 1):
+    p50, p95, p99 = np.percentile(latencias, [50, 95, 99]) * 1000
+    print(f"{rotulo:30s} {len(latencias) / duracao:9,.0f} req/s {len(latencias) * itens_por_requisicao / duracao:11,.0f} cot/s"
+          f"  p50 {p50:7.2f}  p95 {p95:7.2f}  p99 {p99:7.2f}  máx {latencias.max() * 1000:7.2f} ms")
+
+
+def main():
+    duracao = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    conexoes = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+
+    motor = MotorTaxas.carregar()
+    itens = motor.atividades["ITEM"].astype(str).to_numpy()
+    municipios = list(MUNICIPIOS_CONFIG)
+
+    def cotacao(rng):
+        return {"municipio": municipios[rng.integers(0, len(municipios))], "item": itens[rng.integers(0, len(itens))],
+                "medida": round(float(rng.exponential(300.0)), 2), "cnpj_cpf": "00000000000191"}
+
+    with tempfile.TemporaryDirectory() as pasta:
+        config = os.path.join(pasta, "config.yaml")
+        escrever_config(config)
+        porta = porta_livre()
+        servidor = subprocess.Popen(
+            [sys.executable, "api_cotacoes.py", "--porta", str(porta), "--config", config,
+             "--banco", os.path.join(pasta, "historico.db")],
+            stdout=subprocess.PIPE, text=True,
+        )
+        try:
+            for linha in servidor.stdout:
+                print(f"[servidor] {linha.strip()}")
+                if linha.startswith("API de cotações"):
+                    break
+
+            async def executar():
+                # Conferência: a API devolve o mesmo que o motor
+                cliente = Cliente(porta)
+                await cliente.abrir()
+                rng = np.random.default_rng(1)
+                for _ in range(200):
+                    dados = cotacao(rng)
+                    _, resposta = await cliente.post("/cotacao", dados)
+                    esperado = motor.cotar(dados["municipio"], dados["item"], dados["medida"])
+                    assert resposta["erro"] == esperado.erro and resposta["porte"] == esperado.porte
+                    if esperado.erro is None and not np.isnan(esperado.valor_total_reais):
+                        assert abs(resposta["total_reais"] - esperado.valor_total_reais) < 1e-6
+                lote = [cotacao(rng) for _ in range(TAMANHO_LOTE)]
+                _, resposta = await cliente.post("/cotacoes", {"cotacoes": lote})
+                for dados, obtida in zip(lote, resposta["cotacoes"]):
+                    assert obtida["ERRO"] == motor.cotar(dados["municipio"], dados["item"], dados["medida"]).erro
+                cliente.fechar()
+                print("Respostas conferidas com o motor\n")
+
+                print(f"{conexoes} conexões, {duracao:.0f} s por cenário")
+                latencias = await carga(porta, duracao, conexoes, lambda rng: ("/cotacao", cotacao(rng)))
+                relatorio("cotação única", latencias, duracao)
+                latencias = await carga(porta, duracao, conexoes,
+                                        lambda rng: ("/cotacao", {**cotacao(rng), "salvar": False}))
+                relatorio("cotação única (sem histórico)", latencias, duracao)
+                latencias = await carga(porta, duracao, max(1, conexoes // 4),
+                                        lambda rng: ("/cotacoes", {"cotacoes": [cotacao(rng) for _ in range(TAMANHO_LOTE)]}))
+                relatorio(f"lote de {TAMANHO_LOTE}", latencias, duracao, TAMANHO_LOTE)
+
+            asyncio.run(executar())
+        finally:
+            servidor.terminate()
+            servidor.wait(10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark: partida a frio das tabelas de referência lendo os CSVs (carregar + montar os
+índices) comparada com a leitura do artefato compilado; confere que as tabelas são iguais.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_artefato
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from pandas.testing import assert_frame_equal
+
+from motor_taxas import artefato
+
+REPETICOES = 10
+
+# Processo novo a cada medição: inclui importar pandas/motor_taxas, como numa partida real
+_PARTIDA_CSV = """
+import time; inicio = time.perf_counter()
+from motor_taxas import artefato
+artefato.compilar_artefato({caminho!r})
+print(time.perf_counter() - inicio)
+"""
+_PARTIDA_ARTEFATO = """
+import time; inicio = time.perf_counter()
+from motor_taxas import artefato
+assert artefato.carregar_tabelas_referencia({caminho!r}).origem == "artefato"
+print(time.perf_counter() - inicio)
+"""
+
+
+def mediana_ms(funcao, repeticoes: int) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return sorted(tempos)[len(tempos) // 2] * 1000
+
+
+def mediana_processo_ms(codigo: str, repeticoes: int) -> float:
+    tempos = sorted(
+        float(subprocess.run([sys.executable, "-c", codigo], check=True, capture_output=True,
+                             text=True).stdout)
+        for _ in range(repeticoes)
+    )
+    return tempos[len(tempos) // 2] * 1000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "tabelas_referencia.pkl")
+
+        via_csv = artefato.compilar_artefato(caminho)
+        via_artefato = artefato.carregar_tabelas_referencia(caminho)
+        assert via_artefato.origem == "artefato"
+        for nome in ("atividades", "taxas", "cnaes"):
+            assert_frame_equal(getattr(via_csv, nome), getattr(via_artefato, nome))
+        assert via_csv.indice_cnae.rotulos == via_artefato.indice_cnae.rotulos
+        print(f"Artefato: {os.path.getsize(caminho) / 1024:.0f} KiB; tabelas idênticas às dos CSVs")
+
+        tempo_csv = mediana_ms(lambda: artefato.compilar_artefato(caminho), REPETICOES)
+        tempo_artefato = mediana_ms(lambda: artefato.carregar_tabelas_referencia(caminho), REPETICOES)
+        tempo_hash = mediana_ms(lambda: artefato.hash_fontes(artefato.fontes_padrao()), REPETICOES)
+        print(f"\nNo mesmo processo (mediana de {REPETICOES}):")
+        print(f"  CSVs + índices:       {tempo_csv:8.1f} ms")
+        print(f"  artefato:             {tempo_artefato:8.1f} ms  (hash dos CSVs: {tempo_hash:.1f} ms)")
+        print(f"  ganho:                {tempo_csv / tempo_artefato:8.1f}x")
+
+        processo_csv = mediana_processo_ms(_PARTIDA_CSV.format(caminho=caminho), 5)
+        processo_artefato = mediana_processo_ms(_PARTIDA_ARTEFATO.format(caminho=caminho), 5)
+        print("\nProcesso novo, incluindo imports (mediana de 5):")
+        print(f"  CSVs + índices:       {processo_csv:8.1f} ms")
+        print(f"  artefato:             {processo_artefato:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
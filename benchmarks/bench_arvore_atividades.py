@@ -0,0 +1,101 @@
+"""
+Benchmark: o que o app fazia a cada rerun para montar os passos 4 e 5 (cópia do ANEXO I,
+ITEM_STR/ITEM_BASE/IS_GRUPO, iterrows dos grupos e filtros da subatividade) contra as
+consultas na árvore de atividades do motor. Confere que grupos, opções e cotações são
+os mesmos.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_arvore_atividades
+"""
+import time
+
+import numpy as np
+
+from motor_taxas import MotorTaxas
+
+REPETICOES = 200
+MEDIDAS = [0.0, 0.5, 1.0, 2.0, 10.0, 50.0, 100.0, 500.0, 1e4, 1e6]
+
+
+def passos_por_dataframe(atividades_df, indice_grupo: int, indice_atividade: int):
+    """Passos 4 e 5 como eram feitos a cada rerun."""
+    atividades_df = atividades_df.copy()
+    atividades_df["ITEM_STR"] = atividades_df["ITEM"].astype(str).str.strip()
+    atividades_df["ITEM_BASE"] = atividades_df["ITEM_STR"].str.split(".").str[0]
+    atividades_df["IS_GRUPO"] = ~atividades_df["ITEM_STR"].str.contains(".", regex=False, na=False)
+    grupos_df = atividades_df[atividades_df["IS_GRUPO"]].copy().sort_values("ITEM_BASE")
+    opcoes_grupo = {
+        f"{row['ITEM_BASE']} - {row['Atividade']}": row["ITEM_BASE"]
+        for _, row in grupos_df.iterrows()
+    }
+    labels_grupo = list(opcoes_grupo.keys())
+    grupo_base = opcoes_grupo[labels_grupo[indice_grupo % len(labels_grupo)]]
+    sub_df = atividades_df[(atividades_df["ITEM_BASE"] == grupo_base) & (~atividades_df["IS_GRUPO"])].copy()
+    opcoes_atividade = sub_df["Atividade"].dropna().tolist()
+    if not opcoes_atividade:
+        return labels_grupo, opcoes_atividade, None
+    atividade = opcoes_atividade[indice_atividade % len(opcoes_atividade)]
+    return labels_grupo, opcoes_atividade, sub_df[sub_df["Atividade"] == atividade].iloc[0]
+
+
+def passos_pela_arvore(motor: MotorTaxas, indice_grupo: int, indice_atividade: int):
+    """Passos 4 e 5 com a árvore de atividades."""
+    arvore = motor.arvore_atividades
+    labels_grupo = list(arvore.rotulos_grupo)
+    grupo = arvore.grupo(labels_grupo[indice_grupo % len(labels_grupo)])
+    opcoes_atividade = list(grupo.atividades)
+    if not opcoes_atividade:
+        return labels_grupo, opcoes_atividade, None
+    atividade = opcoes_atividade[indice_atividade % len(opcoes_atividade)]
+    return labels_grupo, opcoes_atividade, arvore.atividade(grupo.base, atividade)
+
+
+def percentis_ms(funcao, repeticoes: int) -> tuple[float, float]:
+    tempos = np.empty(repeticoes)
+    for i in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(i)
+        tempos[i] = time.perf_counter() - inicio
+    return float(np.percentile(tempos, 50) * 1000), float(np.percentile(tempos, 99) * 1000)
+
+
+def main():
+    motor = MotorTaxas.carregar()
+    inicio = time.perf_counter()
+    arvore = motor.arvore_atividades
+    tempo_montagem = time.perf_counter() - inicio
+    print(f"Árvore: {len(arvore)} grupos; montagem: {tempo_montagem * 1000:.1f} ms")
+
+    # Conferência: todos os grupos e atividades, com várias medidas, nos dois municípios
+    cotacoes = 0
+    for g in range(len(arvore)):
+        grupos_df, opcoes_df, linha = passos_por_dataframe(motor.atividades, g, 0)
+        grupos_arvore, opcoes_arvore, _ = passos_pela_arvore(motor, g, 0)
+        assert grupos_df == grupos_arvore and opcoes_df == opcoes_arvore, (g, opcoes_df, opcoes_arvore)
+        for a in range(len(opcoes_df)):
+            _, _, linha = passos_por_dataframe(motor.atividades, g, a)
+            _, _, atividade = passos_pela_arvore(motor, g, a)
+            for municipio in motor.municipios:
+                for medida in MEDIDAS:
+                    # repr: taxas ausentes (NaN) também precisam coincidir
+                    esperado = repr(motor.cotar_linha(municipio, linha, medida))
+                    assert repr(motor.cotar_atividade(municipio, atividade, medida)) == esperado
+                    cotacoes += 1
+    print(f"Grupos, opções e {cotacoes:,} cotações idênticas\n")
+
+    n_grupos = len(arvore)
+    p50_df, p99_df = percentis_ms(lambda i: passos_por_dataframe(motor.atividades, i % n_grupos, i), REPETICOES)
+    p50_arv, p99_arv = percentis_ms(lambda i: passos_pela_arvore(motor, i % n_grupos, i), REPETICOES * 10)
+    cot_df, _ = percentis_ms(lambda i: motor.cotar_linha("Ariquemes - RO", motor.atividades.iloc[5], 15.0),
+                             REPETICOES)
+    atividade = arvore.atividade(*next((g.base, g.atividades[0]) for g in arvore.grupos if g.atividades))
+    cot_arv, _ = percentis_ms(lambda i: motor.cotar_atividade("Ariquemes - RO", atividade, 15.0), REPETICOES * 10)
+
+    print(f"{'passos 4 e 5 por rerun':28s} {'p50 (ms)':>9s} {'p99 (ms)':>9s}")
+    print(f"{'DataFrame (antes)':28s} {p50_df:9.3f} {p99_df:9.3f}")
+    print(f"{'árvore (depois)':28s} {p50_arv:9.4f} {p99_arv:9.4f}")
+    print(f"\nCotação da atividade: cotar_linha {cot_df:.3f} ms | cotar_atividade {cot_arv:.4f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark: busca de CNAEs pelo IndiceCNAE (código, texto com e sem acentos, prefixos
+curtos e erros de digitação), comparada com a busca por substring em todas as opções.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_busca_cnae
+"""
+import time
+
+import numpy as np
+
+from motor_taxas import IndiceCNAE, carregar_cnaes, strip_accents
+
+CONSULTAS = [
+    "4731", "4731-8/00", "47.31-8", "01",
+    "c", "co", "com", "comercio", "comércio varejista de combustíveis",
+    "cultivo de arroz", "fabricacao resina", "serraria", "transporte de valores",
+    "aquicultra", "construçao edificios", "madeira", "xyzabc",
+]
+REPETICOES = 300
+
+
+def busca_substring(rotulos: list, consulta: str) -> list:
+    """Filtro por substring sem acentos sobre todos os rótulos (o que o widget fazia no navegador)."""
+    termo = strip_accents(consulta).lower()
+    return [r for r in rotulos if termo in strip_accents(r).lower()]
+
+
+def percentis_ms(funcao, repeticoes: int) -> tuple[float, float]:
+    tempos = np.empty(repeticoes)
+    for i in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos[i] = time.perf_counter() - inicio
+    return float(np.percentile(tempos, 50) * 1000), float(np.percentile(tempos, 99) * 1000)
+
+
+def main():
+    df_cnaes = carregar_cnaes()
+
+    inicio = time.perf_counter()
+    indice = IndiceCNAE.from_dataframe(df_cnaes)
+    tempo_montagem = time.perf_counter() - inicio
+    print(f"{len(indice)} CNAEs; montagem do índice: {tempo_montagem * 1000:.1f} ms\n")
+
+    print(f"{'consulta':38s} {'p50 (ms)':>9s} {'p99 (ms)':>9s} {'substr p50':>11s}  melhor resultado")
+    pior_p99 = 0.0
+    for consulta in CONSULTAS:
+        p50, p99 = percentis_ms(lambda: indice.buscar(consulta), REPETICOES)
+        sub_p50, _ = percentis_ms(lambda: busca_substring(indice.rotulos, consulta), 20)
+        pior_p99 = max(pior_p99, p99)
+        resultados = indice.buscar(consulta, 1)
+        melhor = resultados[0].rotulo[:50] if resultados else "-"
+        print(f"{consulta!r:38s} {p50:9.3f} {p99:9.3f} {sub_p50:11.3f}  {melhor}")
+
+    print(f"\nPior p99: {pior_p99:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: cotações de atividades do ANEXO I com sorteio concentrado nas mais populares
+(Zipf), com o cache de cotações do processo e sem ele (cache de tamanho 0, que só conta as
+faltas). Confere que as cotações são idênticas e que motores com versões diferentes das
+tabelas no mesmo processo não apagam as entradas um do outro.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_cache_cotacoes [n_cotacoes]
+"""
+import sys
+import time
+
+import numpy as np
+
+from motor_taxas import CacheCotacoes, MotorTaxas, carregar_tabelas_referencia
+
+MEDIDAS = [0.5, 1.0, 2.0, 10.0, 15.0, 50.0, 100.0, 500.0, 1e4]
+
+
+def gerar_consultas(motor: MotorTaxas, n: int, rng: np.random.Generator) -> list:
+    """(município, atividade, medida), com as atividades sorteadas por uma Zipf."""
+    atividades = [motor.arvore_atividades.atividade(g.base, nome)
+                  for g in motor.arvore_atividades.grupos for nome in g.atividades]
+    rng.shuffle(atividades)
+    posicoes = np.minimum(rng.zipf(1.3, n) - 1, len(atividades) - 1)
+    municipios = list(motor.municipios)
+    return [
+        (municipios[m], atividades[p], MEDIDAS[k])
+        for p, m, k in zip(posicoes, rng.integers(0, len(municipios), n), rng.integers(0, len(MEDIDAS), n))
+    ]
+
+
+def cotar_todas(motor: MotorTaxas, consultas: list) -> tuple[list, np.ndarray]:
+    cotacoes = []
+    tempos = np.empty(len(consultas))
+    for i, (municipio, atividade, medida) in enumerate(consultas):
+        inicio = time.perf_counter()
+        cotacoes.append(motor.cotar_atividade(municipio, atividade, medida))
+        tempos[i] = time.perf_counter() - inicio
+    return cotacoes, tempos
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    referencia = carregar_tabelas_referencia()
+
+    def motor_com(cache: CacheCotacoes) -> MotorTaxas:
+        return MotorTaxas(referencia.atividades, referencia.taxas, cnaes=referencia.cnaes,
+                          taxas_jurisdicoes=referencia.taxas_jurisdicoes, indice_cnae=referencia.indice_cnae,
+                          versao_tabelas=referencia.hash_fontes, cache=cache)
+
+    cache = CacheCotacoes()
+    com_cache = motor_com(cache)
+    sem_cache = motor_com(CacheCotacoes(tamanho=0))
+    consultas = gerar_consultas(com_cache, n, np.random.default_rng(5))
+
+    esperadas, tempos_sem = cotar_todas(sem_cache, consultas)
+    obtidas, tempos_com = cotar_todas(com_cache, consultas)
+    # repr: taxas ausentes (NaN) também precisam coincidir
+    assert [repr(c) for c in obtidas] == [repr(c) for c in esperadas]
+    metricas = cache.metricas()
+    print(f"{n:,} cotações idênticas; {metricas['entradas']:,} combinações distintas no cache")
+    print(f"acertos {metricas['acertos']:,} | faltas {metricas['faltas']:,} | "
+          f"remoções {metricas['remocoes']:,} | taxa de acerto {metricas['taxa_acerto']:.1%}\n")
+
+    print(f"{'cotar_atividade':16s} {'média (µs)':>11s} {'p50 (µs)':>9s} {'p99 (µs)':>9s}")
+    for rotulo, tempos in (("sem cache", tempos_sem), ("com cache", tempos_com)):
+        print(f"{rotulo:16s} {tempos.mean() * 1e6:11.2f} {np.percentile(tempos, 50) * 1e6:9.2f} "
+              f"{np.percentile(tempos, 99) * 1e6:9.2f}")
+    print(f"ganho médio: {tempos_sem.mean() / tempos_com.mean():.1f}x")
+
+    # Outra versão das tabelas no mesmo processo: entradas próprias, sem apagar as do motor original
+    entradas = cache.metricas()["entradas"]
+    motor_novo = MotorTaxas(referencia.atividades, referencia.taxas, cnaes=referencia.cnaes,
+                            taxas_jurisdicoes=referencia.taxas_jurisdicoes, cache=cache)
+    for _ in range(3):
+        motor_novo.cotar_atividade(*consultas[0])
+        com_cache.cotar_atividade(*consultas[0])
+    metricas = cache.metricas()
+    assert metricas["versoes"] == 2 and metricas["entradas"] == entradas + 1
+    print("\nDois motores com versões diferentes alternando: nenhuma entrada apagada")
+
+    # Cache pequeno: o LRU remove as combinações menos usadas
+    pequeno = CacheCotacoes(tamanho=64)
+    _, tempos_pequeno = cotar_todas(motor_com(pequeno), consultas)
+    metricas = pequeno.metricas()
+    print(f"Cache de 64 entradas: taxa de acerto {metricas['taxa_acerto']:.1%}, "
+          f"{metricas['remocoes']:,} remoções, média {tempos_pequeno.mean() * 1e6:.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
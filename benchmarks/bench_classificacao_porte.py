@@ -0,0 +1,89 @@
+"""
+Benchmark: classificação de porte linha a linha (classificar_porte_por_linha_valor)
+contra a classificação em lote da MatrizPortes.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_classificacao_porte [n_medidas]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from motor_taxas import (
+    MatrizPortes,
+    SPANS_PORTE,
+    classificar_porte_por_linha_valor,
+    rotular_portes,
+)
+
+ATIVIDADES_CSV_PATH = "ANEXO_I_cleaned_with_portes.csv"
+
+# Quantidade de medidas conferidas contra a função linha a linha (o caminho lento)
+N_CONFERENCIA = 20_000
+
+
+def carregar_atividades(caminho_csv: str = ATIVIDADES_CSV_PATH) -> pd.DataFrame:
+    """Mesma conversão numérica de carregar_atividades_anexo_i, sem o cache do Streamlit."""
+    df = pd.read_csv(caminho_csv, sep=";", dtype=str)
+    df["ITEM"] = df["ITEM"].astype(str).str.strip()
+    for col in df.columns:
+        if col.endswith("_MIN") or col.endswith("_MAX"):
+            df[col] = pd.to_numeric(df[col].astype(str).str.replace(",", ".", regex=False), errors="coerce")
+    return df
+
+
+def gerar_medidas(df: pd.DataFrame, n: int, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+    """Sorteia (linha, medida), com parte das medidas exatamente sobre os limites das faixas."""
+    posicoes = rng.integers(0, len(df), n)
+    limites = df[[c for _, lo, hi in SPANS_PORTE for c in (lo, hi)]].to_numpy(dtype=float)
+
+    medidas = rng.exponential(200.0, n)
+    sobre_limite = rng.random(n) < 0.3
+    colunas = rng.integers(0, limites.shape[1], n)
+    candidatos = limites[posicoes, colunas]
+    usar = sobre_limite & ~np.isnan(candidatos)
+    medidas[usar] = candidatos[usar]
+    medidas[rng.random(n) < 0.01] = np.nan
+    return posicoes, medidas
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    rng = np.random.default_rng(42)
+    df = carregar_atividades()
+    posicoes, medidas = gerar_medidas(df, n, rng)
+
+    inicio = time.perf_counter()
+    matriz = MatrizPortes.from_dataframe(df)
+    t_montagem = time.perf_counter() - inicio
+
+    # Conferência contra a função original
+    n_conf = min(n, N_CONFERENCIA)
+    linhas = [row for _, row in df.iterrows()]
+    inicio = time.perf_counter()
+    esperado = [classificar_porte_por_linha_valor(medidas[i], linhas[posicoes[i]]) for i in range(n_conf)]
+    t_linha = (time.perf_counter() - inicio) / n_conf
+    obtido = rotular_portes(matriz.classificar_codigos_por_linha(posicoes[:n_conf], medidas[:n_conf]))
+    divergencias = sum(1 for a, b in zip(esperado, obtido) if a != b)
+
+    inicio = time.perf_counter()
+    matriz.classificar_codigos_por_linha(posicoes, medidas)
+    t_lote = (time.perf_counter() - inicio) / n
+
+    itens = df["ITEM"].to_numpy()[posicoes]
+    inicio = time.perf_counter()
+    matriz.classificar(itens, medidas)
+    t_lote_item = (time.perf_counter() - inicio) / n
+
+    print(f"ANEXO I: {len(df)} linhas | medidas: {n:,}")
+    print(f"Montagem da matriz:            {t_montagem * 1e3:9.3f} ms")
+    print(f"Conferidas: {n_conf:,} | divergências: {divergencias}")
+    print(f"Linha a linha (por medida):    {t_linha * 1e6:9.3f} µs")
+    print(f"Lote por posição (por medida): {t_lote * 1e6:9.3f} µs  ({1 / t_lote:,.0f} medidas/s)")
+    print(f"Lote por ITEM (por medida):    {t_lote_item * 1e6:9.3f} µs  ({1 / t_lote_item:,.0f} medidas/s)")
+
+
+if __name__ == "__main__":
+    main()
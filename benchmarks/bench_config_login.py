@@ -0,0 +1,95 @@
+"""
+Benchmark: custo por execução do script (rerun) para obter a configuração de login.
+
+Antes, cada rerun abria e interpretava o config.yaml (yaml SafeLoader, em Python puro) e
+o streamlit-authenticator conferia (e, em texto puro, refazia o hash de) cada senha. Agora
+a config fica no cache do processo, chaveada por mtime e tamanho do arquivo: o rerun custa
+um os.stat, a consulta ao cache e uma cópia das credenciais. Mede também a recarga depois
+de o arquivo mudar.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_config_login [usuarios] [reruns]
+"""
+import copy
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import streamlit as st
+import streamlit_authenticator as stauth
+import yaml
+from yaml.loader import SafeLoader
+
+
+def escrever_config(caminho: str, usuarios: int, texto_puro: bool):
+    senha = "senha-de-teste" if texto_puro else stauth.Hasher.hash("senha-de-teste")
+    config = {
+        "credentials": {"usernames": {
+            f"usuario{i}": {"email": f"usuario{i}@example.com", "name": f"Usuário {i}",
+                            "failed_login_attempts": 0, "logged_in": False, "password": senha}
+            for i in range(usuarios)
+        }},
+        "cookie": {"expiry_days": 30, "key": "chave-de-teste", "name": "cookie_teste"},
+    }
+    with open(caminho, "w") as arquivo:
+        yaml.safe_dump(config, arquivo)
+
+
+def config_original(caminho: str) -> dict:
+    """Como o app fazia a cada rerun (mais o auto_hash feito pelo Authenticate)."""
+    with open(caminho) as arquivo:
+        config = yaml.load(arquivo, Loader=SafeLoader)
+    stauth.Hasher.hash_passwords(config["credentials"])
+    return config
+
+
+def main():
+    usuarios = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    reruns = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    # Fora do "streamlit run" o cache avisa a cada chamada que não há sessão
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "config.yaml")
+
+        @st.cache_resource(max_entries=1)
+        def _config(assinatura: tuple) -> dict:
+            with open(caminho) as arquivo:
+                config = yaml.load(arquivo, Loader=SafeLoader)
+            stauth.Hasher.hash_passwords(config["credentials"])
+            return config
+
+        def config_em_cache() -> dict:
+            arquivo = os.stat(caminho)
+            return copy.deepcopy(_config((arquivo.st_mtime_ns, arquivo.st_size)))
+
+        print(f"{usuarios} usuário(s) · µs por rerun{'':14}{'antes':>12}{'agora':>12}")
+        for rotulo, texto_puro, n in (("senhas em hash", False, reruns), ("senhas em texto puro", True, 2)):
+            escrever_config(caminho, usuarios, texto_puro)
+            _config.clear()
+            config_em_cache()
+
+            inicio = time.perf_counter()
+            for _ in range(n):
+                config_original(caminho)
+            antes = (time.perf_counter() - inicio) / n * 1e6
+
+            inicio = time.perf_counter()
+            for _ in range(reruns):
+                config_em_cache()
+            agora = (time.perf_counter() - inicio) / reruns * 1e6
+            print(f"{rotulo:41s}{antes:12,.1f}{agora:12,.1f}")
+
+        # Recarga: o primeiro rerun depois de o arquivo mudar relê e troca a config
+        escrever_config(caminho, usuarios + 1, False)
+        inicio = time.perf_counter()
+        config = config_em_cache()
+        recarga = (time.perf_counter() - inicio) * 1e6
+        assert len(config["credentials"]["usernames"]) == usuarios + 1
+        print(f"{'primeiro rerun depois de alterar o arquivo':41s}{'':12}{recarga:12,.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: cotação em lote (MotorTaxas.cotar_lote) contra a cotação uma a uma (MotorTaxas.cotar).
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_cotacao_lote [n_linhas]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from motor_taxas import MUNICIPIOS_CONFIG, MotorTaxas
+
+# Quantidade de linhas conferidas contra a cotação uma a uma
+N_CONFERENCIA = 5_000
+
+
+def gerar_entradas(motor: MotorTaxas, n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Planilha sintética de empreendimentos, com uma fração de ITENS e municípios inválidos."""
+    itens = motor.atividades["ITEM"].to_numpy()
+    municipios = np.array(list(MUNICIPIOS_CONFIG) + ["Cidade Inexistente - RO"], dtype=object)
+    df = pd.DataFrame({
+        "CNPJ": [f"{i:014d}" for i in range(n)],
+        "MUNICIPIO": municipios[rng.choice(len(municipios), n, p=[0.495, 0.495, 0.01])],
+        "ITEM": itens[rng.integers(0, len(itens), n)],
+        "MEDIDA": rng.exponential(300.0, n).round(2),
+    })
+    df.loc[rng.random(n) < 0.01, "ITEM"] = "999.999"
+    return df
+
+
+def iguais(a, b) -> bool:
+    return (a is None and b is None) or (a is not None and b is not None and np.isclose(a, b, equal_nan=True))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(7)
+
+    inicio = time.perf_counter()
+    motor = MotorTaxas.carregar()
+    t_carga = time.perf_counter() - inicio
+
+    df = gerar_entradas(motor, n, rng)
+
+    inicio = time.perf_counter()
+    resultado = motor.cotar_lote(df)
+    t_lote = time.perf_counter() - inicio
+
+    # Conferência contra a cotação uma a uma
+    n_conf = min(n, N_CONFERENCIA)
+    divergencias = 0
+    inicio = time.perf_counter()
+    for i in range(n_conf):
+        linha = df.iloc[i]
+        cotacao = motor.cotar(linha["MUNICIPIO"], linha["ITEM"], linha["MEDIDA"])
+        esperado = resultado.iloc[i]
+        if cotacao.erro != esperado["ERRO"]:
+            divergencias += 1
+        elif cotacao.erro is None:
+            if cotacao.porte != esperado["PORTE"] or not all(
+                iguais(lic.valor_reais, esperado[f"{lic.codigo}_REAIS"]) for lic in cotacao.licencas
+            ):
+                divergencias += 1
+    t_unitario = (time.perf_counter() - inicio) / n_conf
+
+    print(f"Carga do motor: {t_carga * 1e3:.1f} ms | linhas: {n:,}")
+    print(f"Conferidas: {n_conf:,} | divergências: {divergencias}")
+    print(f"Erros por código: {resultado['ERRO'].value_counts().to_dict()}")
+    print(f"Uma a uma: {t_unitario * 1e6:9.2f} µs/linha  ({1 / t_unitario:12,.0f} linhas/s)")
+    print(f"Em lote:   {t_lote / n * 1e6:9.2f} µs/linha  ({n / t_lote:12,.0f} linhas/s)")
+
+    # Mesma planilha só com CNAE (o ITEM vem da sugestão CNAE -> ANEXO I)
+    inicio = time.perf_counter()
+    sugestoes = motor.sugestoes_cnae
+    t_sugestoes = time.perf_counter() - inicio
+    subclasses = np.array(sugestoes.indice_cnae.subclasses, dtype=object)
+    df_cnae = df.drop(columns=["ITEM"]).assign(CNAE=subclasses[rng.integers(0, len(subclasses), n)])
+    inicio = time.perf_counter()
+    resultado_cnae = motor.cotar_lote(df_cnae)
+    t_cnae = time.perf_counter() - inicio
+    print(f"Só CNAE:   {t_cnae / n * 1e6:9.2f} µs/linha  ({n / t_cnae:12,.0f} linhas/s)"
+          f" | sugestões montadas em {t_sugestoes * 1e3:.1f} ms"
+          f" | com ITEM sugerido: {resultado_cnae['ITEM_SUGERIDO'].notna().mean():.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark: busca de taxas pelo filtro de DataFrame (caminho original de obter_taxa_ufar)
+contra o IndiceTaxas compilado, e busca no índice único de todas as jurisdições
+(IndiceTaxasJurisdicoes).
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_indice_taxas
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from motor_taxas import IndiceTaxas, IndiceTaxasJurisdicoes, carregar_taxas_jurisdicoes
+
+TAXAS_CSV_PATH = "taxas_ambientais_ufar.csv"
+ATIVIDADES_CSV_PATH = "ANEXO_I_cleaned_with_portes.csv"
+PORTES = ["Mínimo", "Pequeno", "Médio", "Grande", "Excepcional"]
+POTENCIAIS = ["Baixo", "Médio", "Alto"]
+
+
+def carregar_taxas(caminho_csv: str = TAXAS_CSV_PATH) -> pd.DataFrame:
+    """Mesma leitura de carregar_tabelas_taxas, sem o cache do Streamlit."""
+    df = pd.read_csv(caminho_csv, dtype=str)
+    df.columns = [c.strip().upper() for c in df.columns]
+    for col in ["ANEXO", "PORTE", "POTENCIAL_POLUIDOR"]:
+        df[col] = df[col].astype(str).str.strip()
+    for col in ["TLP", "TLI", "TLO"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+def filtro_original(df_taxas: pd.DataFrame, anexo: str, porte: str, potencial: str):
+    """Filtro por varredura usado por obter_taxa_ufar antes do índice."""
+    anexo_norm = (anexo or "").replace(" ", "").upper().strip()
+    df_filtrado = df_taxas[
+        df_taxas["ANEXO"].str.replace(" ", "", regex=False).str.upper().str.strip().eq(anexo_norm)
+        & df_taxas["PORTE"].str.strip().eq(porte)
+        & df_taxas["POTENCIAL_POLUIDOR"].str.strip().str.upper().eq(potencial.upper())
+    ]
+    if df_filtrado.empty:
+        return None
+    linha = df_filtrado.iloc[0]
+    return (float(linha["TLP"]), float(linha["TLI"]), float(linha["TLO"]))
+
+
+def montar_consultas() -> list[tuple[str, str, str]]:
+    """Todas as combinações anexo/porte/potencial alcançáveis a partir do ANEXO I."""
+    atividades = pd.read_csv(ATIVIDADES_CSV_PATH, sep=";", dtype=str)
+    anexos = atividades["ANEXO_OU_TAXA"].dropna().str.strip().unique().tolist()
+    return [(a, p, pot) for a in anexos for p in PORTES for pot in POTENCIAIS]
+
+
+def cronometrar(funcao, repeticoes: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes
+
+
+def main():
+    df_taxas = carregar_taxas()
+    consultas = montar_consultas()
+
+    inicio = time.perf_counter()
+    indice = IndiceTaxas.from_dataframe(df_taxas)
+    tempo_montagem = time.perf_counter() - inicio
+
+    # Conferência: o índice deve devolver exatamente o mesmo que o filtro original
+    divergencias = 0
+    for anexo, porte, potencial in consultas:
+        esperado = filtro_original(df_taxas, anexo, porte, potencial)
+        obtido = indice.buscar(anexo, porte, potencial)
+        if (esperado is None) != (obtido is None):
+            divergencias += 1
+        elif esperado is not None and not np.array_equal(esperado, obtido, equal_nan=True):
+            divergencias += 1
+
+    anexos, portes, potenciais = map(list, zip(*consultas))
+
+    t_filtro = cronometrar(lambda: [filtro_original(df_taxas, *c) for c in consultas], 3)
+    t_indice = cronometrar(lambda: [indice.buscar(*c) for c in consultas], 50)
+    t_lote = cronometrar(lambda: indice.buscar_lote(anexos, portes, potenciais), 50)
+
+    n = len(consultas)
+    print(f"Tabela de taxas: {len(df_taxas)} linhas | chaves no índice: {len(indice)}")
+    print(f"Consultas: {n} | divergências índice x filtro: {divergencias}")
+    print(f"Montagem do índice:        {tempo_montagem * 1e3:9.3f} ms")
+    print(f"Filtro original (por busca): {t_filtro / n * 1e6:9.2f} µs")
+    print(f"Índice.buscar (por busca):   {t_indice / n * 1e6:9.2f} µs")
+    print(f"Índice.buscar_lote (por busca): {t_lote / n * 1e6:6.2f} µs")
+    print(f"Ganho buscar x filtro: {t_filtro / t_indice:,.0f}x")
+
+    # Índice único: as mesmas consultas em cada jurisdição e unidade
+    df_jurisdicoes = carregar_taxas_jurisdicoes()
+    inicio = time.perf_counter()
+    jurisdicoes = IndiceTaxasJurisdicoes.from_dataframe(df_jurisdicoes)
+    tempo_montagem = time.perf_counter() - inicio
+    consultas_jurisdicao = [
+        (jurisdicao, *c, unidade)
+        for jurisdicao in jurisdicoes.jurisdicoes for c in consultas for unidade in ("UFAR", "UPFS")
+    ]
+    encontradas = sum(jurisdicoes.buscar(*c) is not None for c in consultas_jurisdicao)
+    t_jurisdicoes = cronometrar(lambda: [jurisdicoes.buscar(*c) for c in consultas_jurisdicao], 20)
+
+    print(f"\nJurisdições: {', '.join(jurisdicoes.jurisdicoes)} | {len(df_jurisdicoes)} linhas"
+          f" | chaves: {len(jurisdicoes)} | montagem: {tempo_montagem * 1e3:.3f} ms")
+    print(f"Consultas (jurisdição x unidade): {len(consultas_jurisdicao)} | encontradas: {encontradas}")
+    print(f"IndiceTaxasJurisdicoes.buscar (por busca): {t_jurisdicoes / len(consultas_jurisdicao) * 1e6:6.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
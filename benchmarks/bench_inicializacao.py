@@ -0,0 +1,144 @@
+"""
+Relatório de inicialização do app: em um processo novo (partida a frio), executa a
+calculadora com streamlit.testing até a tela de login e mede o tempo até a tela aparecer
+(primeira pintura, marcada pelo aviso de login), quais dependências pesadas já estavam
+carregadas nesse momento e o caminho crítico das importações (-X importtime), separando
+o que veio antes e depois da tela de login.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_inicializacao [pasta_do_app] [repeticoes]
+
+pasta_do_app permite comparar com outra versão do app (por exemplo, um git worktree).
+"""
+import json
+import os
+import subprocess
+import sys
+from typing import NamedTuple
+
+import numpy as np
+
+# Dependências cujo carregamento a tela de login não deveria esperar
+PESADOS = ["numpy", "pandas", "pyarrow", "fpdf", "sqlite3", "database", "motor_taxas.motor", "motor_taxas.pdf"]
+
+# Importações de primeiro nível e profundidade do caminho crítico mostrados no relatório
+RAIZES_NO_RELATORIO = 8
+PROFUNDIDADE_CAMINHO = 6
+
+# Executado no processo novo; o aviso da tela de login marca a primeira pintura
+CODIGO_PARTIDA = '''
+import json, sys, time
+inicio_processo = time.time()
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+marcas = {}
+aviso_original = st.warning
+def aviso(*args, **kwargs):
+    if "login" not in marcas:
+        marcas["login"] = time.time()
+        marcas["modulos_login"] = sorted(sys.modules)
+    return aviso_original(*args, **kwargs)
+st.warning = aviso
+
+antes_do_script = sorted(sys.modules)
+at = AppTest.from_file("calculadora_taxas.py", default_timeout=300)
+inicio = time.time()
+at.run()
+fim = time.time()
+print("##RESULTADO " + json.dumps({
+    "inicio_processo": inicio_processo, "inicio_script": inicio, "login": marcas.get("login", fim), "fim_script": fim,
+    "modulos_antes_do_script": antes_do_script, "modulos_login": marcas.get("modulos_login", sorted(sys.modules)),
+    "modulos_fim": sorted(sys.modules),
+}), flush=True)
+'''
+
+
+class Importacao(NamedTuple):
+    modulo: str
+    proprio_us: int
+    acumulado_us: int
+    filhos: list
+
+
+def arvore_importtime(linhas: list[str]) -> list[Importacao]:
+    """Árvore das importações a partir das linhas de -X importtime (filhos vêm antes do pai)."""
+    pendentes = {}
+    for linha in linhas:
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        campos = linha[len("import time:"):].split("|")
+        proprio, acumulado, nome = int(campos[0]), int(campos[1]), campos[2].rstrip()
+        nivel = (len(nome) - len(nome.lstrip()) - 1) // 2
+        no = Importacao(nome.strip(), proprio, acumulado, pendentes.pop(nivel + 1, []))
+        pendentes.setdefault(nivel, []).append(no)
+    return pendentes.get(0, [])
+
+
+def caminho_critico(no: Importacao, profundidade: int = PROFUNDIDADE_CAMINHO) -> list[Importacao]:
+    """Segue, a partir de no, sempre o filho com maior tempo acumulado."""
+    caminho = [no]
+    while no.filhos and len(caminho) < profundidade:
+        no = max(no.filhos, key=lambda filho: filho.acumulado_us)
+        caminho.append(no)
+    return caminho
+
+
+def partida(pasta: str) -> tuple[dict, list[Importacao]]:
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CODIGO_PARTIDA],
+        cwd=pasta, capture_output=True, text=True, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    saida = next((linha for linha in processo.stdout.splitlines() if linha.startswith("##RESULTADO ")), None)
+    if saida is None:
+        raise RuntimeError(f"A partida do app falhou:\n{processo.stdout[-2000:]}\n{processo.stderr[-2000:]}")
+    return json.loads(saida.split(" ", 1)[1]), arvore_importtime(processo.stderr.splitlines())
+
+
+def relatorio_importacoes(resultado: dict, raizes: list[Importacao]):
+    # Só as importações feitas durante o script do app (o streamlit do próprio teste fica de fora)
+    antes_do_script, no_login = set(resultado["modulos_antes_do_script"]), set(resultado["modulos_login"])
+    do_script = [raiz for raiz in raizes if raiz.modulo not in antes_do_script]
+    for rotulo, fase in (
+        ("antes da tela de login", [r for r in do_script if r.modulo in no_login]),
+        ("depois da tela de login", [r for r in do_script if r.modulo not in no_login]),
+    ):
+        total = sum(raiz.acumulado_us for raiz in fase) / 1000
+        print(f"\nImportações do script {rotulo}: {len(fase)} de primeiro nível, {total:.0f} ms")
+        for raiz in sorted(fase, key=lambda r: -r.acumulado_us)[:RAIZES_NO_RELATORIO]:
+            caminho = " > ".join(f"{no.modulo} ({no.acumulado_us / 1000:.0f})" for no in caminho_critico(raiz))
+            print(f"    {raiz.acumulado_us / 1000:7.1f} ms  {caminho}")
+
+
+def main():
+    pasta = os.path.abspath(sys.argv[1]) if len(sys.argv) > 1 else os.getcwd()
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    execucoes = [partida(pasta) for _ in range(repeticoes)]
+    resultados = [resultado for resultado, _ in execucoes]
+
+    def mediana_ms(de: str, ate: str) -> float:
+        return float(np.median([(r[ate] - r[de]) * 1000 for r in resultados]))
+
+    print(f"App em {pasta} · {repeticoes} partidas a frio (medianas)")
+    print(f"    processo até o início do script:     {mediana_ms('inicio_processo', 'inicio_script'):8.1f} ms")
+    print(f"    script até a tela de login:          {mediana_ms('inicio_script', 'login'):8.1f} ms")
+    print(f"    tela de login até o fim do script:   {mediana_ms('login', 'fim_script'):8.1f} ms")
+
+    ultimo = resultados[-1]
+    print("\nDependências pesadas já carregadas quando a tela de login apareceu:")
+    for modulo in PESADOS:
+        if modulo in ultimo["modulos_login"]:
+            estado = "ANTES da tela de login"
+        elif modulo in ultimo["modulos_fim"]:
+            estado = "depois da tela de login"
+        else:
+            estado = "não carregada"
+        print(f"    {modulo:20s} {estado}")
+
+    relatorio_importacoes(ultimo, execucoes[-1][1])
+
+
+if __name__ == "__main__":
+    main()
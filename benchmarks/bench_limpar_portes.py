@@ -0,0 +1,97 @@
+"""
+Benchmark: limpeza das faixas de porte do ANEXO I (limpar_portes.limpar_portes, vetorizada e
+com memo dos textos distintos) contra o laço célula a célula com parse_interval_to_min_max,
+num ANEXO I aumentado sinteticamente. Confere que a saída é idêntica.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_limpar_portes [n_linhas]
+"""
+import io
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from limpar_portes import INPUT_PATH, PORTE_COLS, MemoIntervalos, limpar_portes, parse_interval_to_min_max
+
+# Textos fora do padrão, misturados às faixas reais para exercitar todos os caminhos
+TEXTOS_EXTRAS = [
+    "", " ", "-", " - ", "Até", "acima de", "acima de 1.000,5", "ACIMA DE 2.500", "de 3 a 7",
+    "de 1,5 até", "de abc", "entre 4 e 9", "5", "10 a 20 a 30", "sem porte", "1..2", "de1.2.3a4",
+    "até 1,2,3", "Até 0,5 ha", "de  10,0001  até  30,5", "≥ 40", "acimade١٢",
+]
+
+
+def gerar_anexo(df_base: pd.DataFrame, n: int, rng: np.random.Generator) -> pd.DataFrame:
+    """ANEXO I com n linhas sorteadas do real, parte delas com textos de porte fora do padrão."""
+    df = df_base.iloc[rng.integers(0, len(df_base), n)].reset_index(drop=True)
+    extras = np.array(TEXTOS_EXTRAS + [None], dtype=object)
+    for col in PORTE_COLS:
+        valores = df[col].to_numpy(dtype=object)
+        trocar = rng.random(n) < 0.05
+        valores[trocar] = extras[rng.integers(0, len(extras), trocar.sum())]
+        # Alguns números novos, para o memo não ficar só com os textos do arquivo real
+        novos = rng.random(n) < 0.01
+        valores[novos] = [f"de {a},{b:04d} até {a + c}" for a, b, c in
+                          zip(rng.integers(0, 5000, novos.sum()), rng.integers(0, 10_000, novos.sum()),
+                              rng.integers(1, 500, novos.sum()))]
+        df[col] = pd.array(valores, dtype="str")
+    return df
+
+
+def limpar_celula_a_celula(df: pd.DataFrame) -> pd.DataFrame:
+    """O laço original de limpar_portes.main."""
+    df_clean = df.copy()
+    for col in PORTE_COLS:
+        mins = []
+        maxs = []
+        for val in df_clean[col]:
+            lo, hi = parse_interval_to_min_max(val)
+            mins.append(lo)
+            maxs.append(hi)
+        df_clean[f"{col}_MIN"] = mins
+        df_clean[f"{col}_MAX"] = maxs
+    for col in [c for c in df_clean.columns if c.endswith("_MIN") or c.endswith("_MAX")]:
+        df_clean[col] = pd.to_numeric(df_clean[col], errors="coerce")
+    return df_clean
+
+
+def como_csv(df: pd.DataFrame) -> str:
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, sep=';', decimal=',')
+    return buffer.getvalue()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rng = np.random.default_rng(11)
+    df = gerar_anexo(pd.read_csv(INPUT_PATH, dtype=str), n, rng)
+    print(f"ANEXO I sintético: {n:,} linhas")
+
+    inicio = time.perf_counter()
+    esperado = limpar_celula_a_celula(df)
+    tempo_laco = time.perf_counter() - inicio
+
+    memo = MemoIntervalos()
+    inicio = time.perf_counter()
+    obtido = limpar_portes(df, memo)
+    tempo_vetorizado = time.perf_counter() - inicio
+
+    # Segundo arquivo na mesma execução: o memo já tem quase todos os textos
+    inicio = time.perf_counter()
+    limpar_portes(df, memo)
+    tempo_memo_quente = time.perf_counter() - inicio
+
+    assert_frame_equal(obtido, esperado)
+    assert como_csv(obtido) == como_csv(esperado)
+    print(f"Saída idêntica (DataFrame e CSV); {len(memo):,} textos distintos no memo\n")
+
+    print(f"Célula a célula:       {tempo_laco * 1000:9.1f} ms")
+    print(f"Vetorizado (memo frio):{tempo_vetorizado * 1000:9.1f} ms  ({tempo_laco / tempo_vetorizado:.1f}x)")
+    print(f"Vetorizado (memo quente):{tempo_memo_quente * 1000:7.1f} ms  ({tempo_laco / tempo_memo_quente:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark: custo da medição de tempos por etapa (motor_taxas.medicao), com o registro
+ativo e desligado, num bloco vazio e numa cotação pela árvore de atividades (porte medido
+a cada chamada), e o custo de gravar e resumir as amostras no SQLite.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_medicao
+"""
+import os
+import tempfile
+import time
+
+import database
+from motor_taxas import MotorTaxas, medir, registro_tempos
+
+REPETICOES = 100_000
+
+
+def media_us(funcao, repeticoes: int = REPETICOES) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1e6
+
+
+def bloco_medido():
+    with medir("bench"):
+        pass
+
+
+def main():
+    registro = registro_tempos()
+    motor = MotorTaxas.carregar()
+    arvore = motor.arvore_atividades
+    atividade = arvore.atividade(*next((g.base, g.atividades[0]) for g in arvore.grupos if g.atividades))
+
+    print(f"{'por chamada (µs)':28s} {'desligado':>10s} {'ativo':>10s}")
+    for rotulo, funcao in (
+        ("bloco vazio com medir", bloco_medido),
+        ("cotar_atividade", lambda: motor.cotar_atividade("Ariquemes - RO", atividade, 15.0)),
+    ):
+        registro.ativo = False
+        desligado = media_us(funcao)
+        registro.ativo = True
+        ativo = media_us(funcao)
+        print(f"{rotulo:28s} {desligado:10.3f} {ativo:10.3f}")
+
+    # Gravação e resumo num banco temporário
+    with tempfile.TemporaryDirectory() as pasta:
+        database.DB_NAME = os.path.join(pasta, "bench.db")
+        database.iniciar_persistencia_tempos()
+        inicio = time.perf_counter()
+        gravadas = registro.persistir()
+        tempo_gravacao = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        resumo = database.resumo_tempos(3600)
+        tempo_resumo = time.perf_counter() - inicio
+        # Nada fica pendente para a gravação na saída (o banco temporário não existirá mais)
+        registro.ativo = False
+        registro.persistir()
+        database.fechar_conexoes()
+    print(f"\nGravação de {gravadas:,} amostras pendentes: {tempo_gravacao * 1000:.1f} ms")
+    print(f"Resumo da última hora ({int(resumo['amostras'].sum()):,} amostras): {tempo_resumo * 1000:.1f} ms")
+    print(resumo.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
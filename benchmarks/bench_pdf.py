@@ -0,0 +1,145 @@
+"""
+Benchmark: gerar_pdf (classe PDF única e logo conferido uma vez por processo) contra a
+geração original, que recriava a classe PDF e tentava abrir o logo a cada documento. O
+conteúdo do documento (cabeçalho, rótulos, tabela) é desenhado em cada PDF nos dois casos.
+
+Mede a latência por PDF e o pico de memória alocada ao gerar um PDF (tracemalloc).
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_pdf [n_pdfs]
+"""
+import sys
+import time
+import tracemalloc
+
+from fpdf import FPDF
+
+from motor_taxas import SERVICOS
+from motor_taxas.pdf import LOGO_PATH, gerar_pdf, logo_do_cabecalho, texto_latin1
+
+
+def gerar_pdf_original(municipio, grupo, atividade, medida, porte, potencial, ufir, valores, cnpj_cpf, cnaes_list):
+    """Geração original, mantida aqui apenas como referência de desempenho."""
+    municipio, grupo, atividade, medida, porte, potencial, cnpj_cpf = map(
+        texto_latin1, (municipio, grupo, atividade, medida, porte, potencial, cnpj_cpf)
+    )
+
+    class PDF(FPDF):
+        def header(self):
+            try:
+                self.image(LOGO_PATH, 10, 8, 33)
+            except:
+                pass
+            self.set_font('Arial', 'B', 15)
+            self.cell(80)
+            self.cell(30, 10, 'Calculadora de Taxas Ambientais', 0, 0, 'C')
+            self.ln(20)
+
+        def footer(self):
+            self.set_y(-15)
+            self.set_font('Arial', 'I', 8)
+            self.cell(0, 10, 'Atenas Projetos Ambientais - Página ' + str(self.page_no()) + '/{nb}', 0, 0, 'C')
+
+    pdf = PDF()
+    pdf.alias_nb_pages()
+    pdf.add_page()
+    pdf.ln(10)
+    pdf.set_font('Arial', '', 12)
+    pdf.set_fill_color(200, 220, 255)
+    pdf.cell(0, 10, 'Dados do Empreendimento', 0, 1, 'L', 1)
+    pdf.ln(5)
+    for rotulo, valor, multilinha in [
+        ('CNPJ/CPF:', cnpj_cpf, False),
+        ('CNAEs:', "; ".join(cnaes_list), True),
+        ('Município:', municipio, False),
+        ('Grupo:', grupo, True),
+        ('Atividade:', atividade, True),
+        ('Medida:', medida, False),
+        ('Porte:', porte, False),
+        ('Potencial Poluidor:', potencial, False),
+    ]:
+        pdf.set_font('Arial', 'B', 10)
+        pdf.cell(40, 10, rotulo, 0, 0)
+        pdf.set_font('Arial', '', 10)
+        if multilinha:
+            pdf.multi_cell(0, 10, valor)
+        else:
+            pdf.cell(0, 10, valor, 0, 1)
+    pdf.ln(10)
+    pdf.set_font('Arial', '', 12)
+    pdf.set_fill_color(200, 220, 255)
+    pdf.cell(0, 10, 'Valores Estimados das Taxas', 0, 1, 'L', 1)
+    pdf.ln(5)
+    pdf.set_font('Arial', 'B', 10)
+    pdf.cell(60, 10, 'Licença', 1, 0, 'C')
+    pdf.cell(40, 10, 'Valor (UFAR)', 1, 0, 'C')
+    pdf.cell(40, 10, 'Valor (R$)', 1, 0, 'C')
+    pdf.ln()
+    pdf.set_font('Arial', '', 10)
+    total = 0
+    for servico, dados in valores.items():
+        pdf.cell(60, 10, f"{dados['codigo']} - {servico}", 1, 0)
+        pdf.cell(40, 10, f"{dados['valor_ufar']:.2f}", 1, 0, 'R')
+        pdf.cell(40, 10, f"R$ {dados['valor_reais']:,.2f}", 1, 0, 'R')
+        pdf.ln()
+        total += dados['valor_reais']
+    pdf.ln(5)
+    pdf.set_font('Arial', 'B', 10)
+    pdf.cell(100, 10, 'Total Estimado:', 0, 0, 'R')
+    pdf.cell(40, 10, f"R$ {total:,.2f}", 0, 1, 'R')
+    pdf.ln(10)
+    pdf.set_font('Arial', 'I', 8)
+    pdf.multi_cell(0, 5, 'Observação: Os valores são estimativas baseadas na legislação municipal. O valor final pode variar conforme análise técnica do órgão ambiental. As taxas podem ser parceladas em até 6 vezes.')
+    return pdf.output(dest='S').encode('latin-1')
+
+
+def argumentos_exemplo():
+    valores = {
+        servico: {"valor_reais": 1958.45, "valor_ufar": 23.0, "codigo": info["codigo"], "descricao": info["descricao"]}
+        for servico, info in SERVICOS.items()
+    }
+    return (
+        "Ariquemes - RO", "1 - PESQUISA MINERAL", "Pesquisa mineral com guia", "15.0 (área total em ha)",
+        "Médio", "Médio", 85.15, valores, "12.345.678/0001-90",
+        ["0111-3/01 - Cultivo de arroz", "0111-3/02 - Cultivo de milho"],
+    )
+
+
+def medir(funcao, argumentos, n: int) -> tuple[float, int]:
+    """Latência média (s) por PDF e pico de memória alocada (bytes) durante a geração de um PDF."""
+    inicio = time.perf_counter()
+    for _ in range(n):
+        funcao(*argumentos)
+    latencia = (time.perf_counter() - inicio) / n
+
+    tracemalloc.start()
+    funcao(*argumentos)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return latencia, pico
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    argumentos = argumentos_exemplo()
+
+    inicio = time.perf_counter()
+    logo_do_cabecalho()
+    t_logo = time.perf_counter() - inicio
+
+    # Aquecimento
+    gerar_pdf_original(*argumentos)
+    gerar_pdf(*argumentos)
+
+    lat_antes, pico_antes = medir(gerar_pdf_original, argumentos, n)
+    lat_depois, pico_depois = medir(gerar_pdf, argumentos, n)
+
+    print(f"PDFs por medição: {n} | conferência do logo (uma vez por processo): {t_logo * 1e3:.2f} ms")
+    print(f"{'':32}{'latência/PDF':>14}{'pico alocado':>16}")
+    print(f"{'Classe PDF recriada a cada PDF':32}{lat_antes * 1e3:11.3f} ms{pico_antes / 1024:13.1f} KiB")
+    print(f"{'Classe única, logo conferido':32}{lat_depois * 1e3:11.3f} ms{pico_depois / 1024:13.1f} KiB")
+    print(f"Ganho de latência: {lat_antes / lat_depois:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark: PDF fora do caminho da requisição (motor_taxas.pdf.solicitar_pdf).
+
+Compara o tempo que o script da página fica parado pelo PDF (gerar_pdf síncrono contra
+só agendar a renderização) e, com várias sessões pedindo ao mesmo tempo, o tempo até os
+bytes ficarem prontos e quantos PDFs foram de fato renderizados (pedidos idênticos
+simultâneos são coalescidos).
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.bench_renderizacao_pdf [sessoes]
+"""
+import sys
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.bench_pdf import argumentos_exemplo
+from motor_taxas.pdf import RenderizadorPDF, gerar_pdf, logo_do_cabecalho
+
+
+def rajada(sessoes: int, argumentos_da_sessao, solicitar) -> tuple[np.ndarray, np.ndarray]:
+    """Cada sessão faz um pedido ao mesmo tempo; devolve o tempo parado no script e o tempo até os bytes."""
+    barreira = threading.Barrier(sessoes)
+    parado, prontos = np.zeros(sessoes), np.zeros(sessoes)
+
+    def sessao(i: int):
+        barreira.wait()
+        inicio = time.perf_counter()
+        resultado = solicitar(*argumentos_da_sessao(i))
+        parado[i] = time.perf_counter() - inicio
+        if not isinstance(resultado, bytes):
+            resultado.result()
+        prontos[i] = time.perf_counter() - inicio
+
+    threads = [threading.Thread(target=sessao, args=(i,)) for i in range(sessoes)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return parado, prontos
+
+
+def main():
+    sessoes = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    base = argumentos_exemplo()
+    logo_do_cabecalho()
+    gerar_pdf(*base)
+
+    # Uma sessão por vez: quanto o script fica parado pelo PDF
+    renderizador = RenderizadorPDF()
+    n = 200
+    sincrono, agendado = [], []
+    for i in range(n):
+        argumentos = base[:8] + (f"{i:03d}.345.678/0001-90",) + base[9:]
+        inicio = time.perf_counter()
+        gerar_pdf(*argumentos)
+        sincrono.append(time.perf_counter() - inicio)
+        inicio = time.perf_counter()
+        futuro = renderizador.solicitar(*argumentos)
+        agendado.append(time.perf_counter() - inicio)
+        futuro.result()
+    print(f"Script parado pelo PDF, uma sessão (média de {n}):")
+    print(f"    gerar_pdf síncrono: {np.mean(sincrono) * 1000:.3f} ms | solicitar_pdf: {np.mean(agendado) * 1000:.3f} ms")
+    renderizador.parar()
+
+    def distintos(i):
+        # Mesma cotação, CNPJ diferente: um PDF por sessão
+        return base[:8] + (f"{i:02d}.345.678/0001-90",) + base[9:]
+
+    print(f"\n{sessoes} sessões ao mesmo tempo (ms){'':5}{'parado p50':>12}{'pronto p50':>12}{'pronto máx':>12}{'PDFs':>6}")
+    for rotulo, argumentos_da_sessao in (("pedidos distintos", distintos), ("pedidos idênticos", lambda i: base)):
+        for modo in ("síncrono", "em segundo plano"):
+            renderizador = RenderizadorPDF()
+            solicitar = gerar_pdf if modo == "síncrono" else renderizador.solicitar
+            parado, prontos = rajada(sessoes, argumentos_da_sessao, solicitar)
+            renderizados = sessoes if modo == "síncrono" else renderizador.metricas()["renderizados"]
+            print(f"{rotulo + ', ' + modo:38s}{np.median(parado) * 1000:12.3f}"
+                  f"{np.median(prontos) * 1000:12.3f}{prontos.max() * 1000:12.3f}{renderizados:6d}")
+            renderizador.parar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Tabelas sintéticas, no formato dos arquivos reais, para medir os caminhos críticos em
+escala: ANEXO I bruto (faixas de porte em texto, como SEMA_ANEXO_I_full.csv), tabela de
+taxas em UFAR com qualquer quantidade de anexos e histórico de cálculos no SQLite.
+Tudo é gerado a partir de uma semente, então duas execuções medem os mesmos dados.
+"""
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import database
+from motor_taxas import MUNICIPIOS_CONFIG, NOMES_PORTE
+
+POTENCIAIS_ANEXO = ["BAIXO", "MÉDIO", "ALTO"]
+POTENCIAIS_TAXAS = ["Baixo", "Médio", "Alto"]
+UNIDADES = ["área útil em m²", "área total em hectares (ha)", "capacidade instalada (t/dia)", "Número de animais"]
+
+# Subatividades por grupo do ANEXO I sintético
+ITENS_POR_GRUPO = 12
+
+# Registros gravados por transação ao montar o histórico
+BLOCO_HISTORICO = 100_000
+
+
+def _numero(valor: float) -> str:
+    """Número no formato dos textos de porte ("2,0001")."""
+    return f"{valor:.4f}".rstrip("0").rstrip(".").replace(".", ",")
+
+
+def _textos_de_porte(limites: np.ndarray, rng: np.random.Generator) -> list[list[str]]:
+    """Faixas de porte em texto, com as variações de espaçamento do arquivo real."""
+    colunas = [[] for _ in range(5)]
+    for t1, t2, t3, t4 in limites:
+        de, ate, acima = (("de ", " até ", "acima de ") if rng.random() < 0.5 else ("de", "até", "acimade"))
+        colunas[0].append(f"até{_numero(t1)}" if rng.random() < 0.5 else f"até {_numero(t1)}")
+        colunas[1].append(f"{de}{_numero(t1 + 0.0001)}{ate}{_numero(t2)}")
+        colunas[2].append(f"{de}{_numero(t2 + 0.0001)}{ate}{_numero(t3)}")
+        colunas[3].append(f"{de}{_numero(t3 + 0.0001)}{ate}{_numero(t4)}")
+        colunas[4].append(f"{acima}{_numero(t4)}")
+    return colunas
+
+
+def gerar_anexo_i_bruto(n_itens: int, n_anexos: int, rng: np.random.Generator) -> pd.DataFrame:
+    """ANEXO I com n_itens linhas (grupos e subatividades), antes da limpeza das faixas de porte."""
+    n_grupos = max(1, n_itens // (ITENS_POR_GRUPO + 1))
+    itens, atividades = [], []
+    for grupo in range(1, n_grupos + 1):
+        itens.append(str(grupo))
+        atividades.append(f"GRUPO SINTÉTICO {grupo}")
+        for sub in range(1, ITENS_POR_GRUPO + 1):
+            itens.append(f"{grupo}.{sub}")
+            atividades.append(f"Atividade sintética {grupo}.{sub}")
+    itens, atividades = itens[:n_itens], atividades[:n_itens]
+    n = len(itens)
+    e_grupo = np.array(["." not in item for item in itens])
+
+    # Quatro limites crescentes por linha, em escalas variadas
+    limites = np.cumsum(rng.uniform(0.5, 50.0, (n, 4)) * rng.choice([1, 10, 1000], (n, 1)), axis=1).round(1)
+    portes = _textos_de_porte(limites, rng)
+    df = pd.DataFrame({
+        "ITEM": itens,
+        "Atividade": atividades,
+        "UNIDADE_DE_MEDIDA": rng.choice(UNIDADES, n),
+        **{coluna: textos for coluna, textos in zip(
+            ["PORTE_MINIMO", "PORTE_PEQUENO", "PORTE_MEDIO", "PORTE_GRANDE", "PORTE_EXCEPCIONAL"], portes)},
+        "POTENCIAL_POLUIDOR": rng.choice(POTENCIAIS_ANEXO, n),
+        "ANEXO_OU_TAXA": [f"ANEXO {k}" for k in rng.integers(0, n_anexos, n)],
+    })
+    # Linhas de grupo só têm ITEM e Atividade, como no arquivo real
+    df.loc[e_grupo, df.columns[2:]] = None
+    return df
+
+
+def gerar_taxas(n_anexos: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Tabela de taxas em UFAR (TLP/TLI/TLO) com todos os portes e potenciais de n_anexos anexos."""
+    chaves = pd.MultiIndex.from_product(
+        [[f"ANEXO{k}" for k in range(n_anexos)], NOMES_PORTE, POTENCIAIS_TAXAS],
+        names=["ANEXO", "PORTE", "POTENCIAL_POLUIDOR"],
+    ).to_frame(index=False)
+    n = len(chaves)
+    tlp = rng.integers(5, 500, n)
+    return chaves.assign(
+        DESCRICAO="Tabela sintética",
+        TLP=tlp,
+        TLI=tlp + rng.integers(0, 200, n),
+        TLO=2 * tlp + rng.integers(0, 200, n),
+    )[["ANEXO", "DESCRICAO", "PORTE", "POTENCIAL_POLUIDOR", "TLP", "TLI", "TLO"]]
+
+
+def gerar_registros_historico(n: int, rng: np.random.Generator, inicio: datetime) -> list[tuple]:
+    """n registros (na ordem de SQL_INSERIR_CALCULO) espalhados pelo ano anterior a inicio."""
+    instantes = np.datetime64(inicio, "s") - np.sort(rng.integers(0, 365 * 86400, n))[::-1]
+    datas = np.char.replace(np.datetime_as_string(instantes, unit="s"), "T", " ")
+    municipios = np.array(list(MUNICIPIOS_CONFIG), dtype=object)[np.arange(n) % len(MUNICIPIOS_CONFIG)]
+    grupos = rng.integers(1, 100, n)
+    subitens = rng.integers(1, ITENS_POR_GRUPO + 1, n)
+    medidas = rng.exponential(300.0, n)
+    valores = rng.uniform(500, 50_000, n)
+    documentos = rng.integers(0, 10**14, n)
+    return [
+        (
+            datas[i],
+            municipios[i],
+            f"{grupos[i]} - GRUPO SINTÉTICO {grupos[i]}",
+            f"Atividade sintética {grupos[i]}.{subitens[i]}",
+            f"{medidas[i]:.2f} (área útil em m²)",
+            NOMES_PORTE[i % len(NOMES_PORTE)],
+            POTENCIAIS_TAXAS[i % 3],
+            float(valores[i]),
+            f"{documentos[i]:014d}",
+            "",
+        )
+        for i in range(n)
+    ]
+
+
+def crescer_historico(caminho_db: str, n_total: int, rng: np.random.Generator):
+    """Completa o histórico em caminho_db (esquema e índices de database.init_db) até n_total linhas."""
+    database.DB_NAME = caminho_db
+    database.init_db()
+    with sqlite3.connect(caminho_db) as conn:
+        faltam = n_total - conn.execute("SELECT COUNT(*) FROM calculos").fetchone()[0]
+        while faltam > 0:
+            bloco = min(BLOCO_HISTORICO, faltam)
+            conn.executemany(database.SQL_INSERIR_CALCULO, gerar_registros_historico(bloco, rng, datetime(2025, 1, 1)))
+            conn.commit()
+            faltam -= bloco
@@ -0,0 +1,331 @@
+"""
+Suíte de benchmarks dos caminhos críticos com tabelas sintéticas em várias escalas
+(benchmarks/fixtures.py): faixas de porte (parse_interval_to_min_max e limpar_portes.main),
+leitura das tabelas e montagem do motor, classificação de porte, busca de taxas, cotação
+em lote, geração de PDF e gravação/consulta do histórico.
+
+O resultado vai para um JSON (um registro por caso e escala, com mediana/p95/mínimo),
+para comparar execuções: com --comparar, os casos mais lentos que a execução anterior além
+da tolerância são listados e o processo termina com código 1.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.suite                       # escala padrão
+    python -m benchmarks.suite --escala rapida       # menor escala de cada tabela
+    python -m benchmarks.suite --escala completa     # inclui o histórico de 5 milhões de linhas
+    python -m benchmarks.suite --historico 10000,50000 --saida atual.json --comparar base.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import database
+import limpar_portes
+from benchmarks import fixtures
+from benchmarks.bench_pdf import argumentos_exemplo
+from motor_taxas import (
+    MotorTaxas,
+    NOMES_PORTE,
+    carregar_atividades_anexo_i,
+    carregar_tabelas_taxas,
+    classificar_porte_por_linha_valor,
+    obter_taxa_ufar,
+    registro_tempos,
+)
+from motor_taxas.pdf import gerar_pdf
+
+VERSAO_RESULTADOS = 1
+PASTA_RESULTADOS = os.path.join("benchmarks", "resultados")
+
+# Escalas de cada tabela: itens do ANEXO I, anexos da tabela de taxas e linhas do histórico
+ESCALAS = {
+    "rapida": {"itens": [500], "anexos": [50], "historico": [10_000]},
+    "padrao": {"itens": [500, 10_000, 100_000], "anexos": [50, 1_000, 5_000], "historico": [10_000, 100_000, 1_000_000]},
+    "completa": {"itens": [500, 10_000, 100_000], "anexos": [50, 1_000, 5_000],
+                 "historico": [10_000, 100_000, 1_000_000, 5_000_000]},
+}
+
+# Escala fixa da outra tabela quando uma delas varia
+ITENS_COM_ANEXOS = 5_000
+ANEXOS_COM_ITENS = 200
+
+TOLERANCIA = 0.25
+SEMENTE = 20
+
+
+class Suite:
+    """Executa os casos e acumula um registro por caso e escala."""
+
+    def __init__(self):
+        self.resultados = []
+
+    def medir(self, caso: str, parametros: dict, funcao, repeticoes: int = 5, itens: int = 1,
+              aquecer: bool = True) -> dict:
+        """
+        Cronometra funcao repeticoes vezes; itens é quantas unidades (linhas, cotações, PDFs)
+        cada chamada processa, para o tempo por item.
+        """
+        if aquecer:
+            funcao()
+        tempos = np.empty(repeticoes)
+        for i in range(repeticoes):
+            inicio = time.perf_counter()
+            funcao()
+            tempos[i] = time.perf_counter() - inicio
+        mediana = float(np.median(tempos))
+        resultado = {
+            "caso": caso,
+            "parametros": parametros,
+            "repeticoes": repeticoes,
+            "itens": itens,
+            "mediana_ms": mediana * 1000,
+            "p95_ms": float(np.percentile(tempos, 95)) * 1000,
+            "min_ms": float(tempos.min()) * 1000,
+            "por_item_us": mediana / itens * 1e6,
+        }
+        self.resultados.append(resultado)
+        rotulo = " ".join(f"{chave}={valor:,}" if isinstance(valor, int) else f"{chave}={valor}"
+                          for chave, valor in parametros.items())
+        print(f"  {caso:34s} {rotulo:28s} {resultado['mediana_ms']:11.2f} ms "
+              f"{resultado['por_item_us']:11.3f} µs/item", flush=True)
+        return resultado
+
+
+# =============================
+# CASOS
+# =============================
+
+def casos_anexo_i(suite: Suite, pasta: str, n_itens: int, rng: np.random.Generator):
+    """Faixas de porte, leitura do ANEXO I, montagem do motor e classificação de porte."""
+    parametros = {"itens": n_itens}
+    bruto = fixtures.gerar_anexo_i_bruto(n_itens, ANEXOS_COM_ITENS, rng)
+    caminho_bruto = os.path.join(pasta, f"anexo_{n_itens}.csv")
+    caminho_limpo = os.path.join(pasta, f"anexo_{n_itens}_limpo.csv")
+    caminho_taxas = os.path.join(pasta, f"taxas_{n_itens}.csv")
+    bruto.to_csv(caminho_bruto, index=False)
+    fixtures.gerar_taxas(ANEXOS_COM_ITENS, rng).to_csv(caminho_taxas, index=False)
+
+    textos = pd.unique(bruto[limpar_portes.PORTE_COLS].to_numpy().ravel())
+    textos = textos[:20_000]
+    suite.medir("parse_interval_to_min_max", parametros,
+                lambda: [limpar_portes.parse_interval_to_min_max(t) for t in textos], itens=len(textos))
+
+    def limpar_arquivo():
+        # limpar_portes.main imprime o resumo de cada arquivo; aqui só o tempo interessa
+        with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+            limpar_portes.main([caminho_bruto, "-o", caminho_limpo])
+    suite.medir("limpar_portes.main", parametros, limpar_arquivo, repeticoes=3, itens=n_itens, aquecer=False)
+
+    suite.medir("carregar_atividades_anexo_i", parametros,
+                lambda: carregar_atividades_anexo_i(caminho_limpo), repeticoes=3, itens=n_itens)
+    atividades = carregar_atividades_anexo_i(caminho_limpo)
+    taxas = carregar_tabelas_taxas(caminho_taxas)
+    suite.medir("MotorTaxas (montagem)", parametros, lambda: MotorTaxas(atividades, taxas),
+                repeticoes=3, itens=n_itens, aquecer=False)
+    motor = MotorTaxas(atividades, taxas)
+
+    n_medidas = 100_000
+    itens = motor.atividades["ITEM"].to_numpy()[rng.integers(0, len(atividades), n_medidas)]
+    medidas = rng.exponential(300.0, n_medidas)
+    suite.medir("MatrizPortes.classificar", parametros,
+                lambda: motor.matriz_portes.classificar(itens, medidas), itens=n_medidas)
+    linhas = [motor.atividades.iloc[p] for p in rng.integers(0, len(atividades), 1_000)]
+    suite.medir("classificar_porte_por_linha_valor", parametros,
+                lambda: [classificar_porte_por_linha_valor(m, linha) for m, linha in zip(medidas, linhas)],
+                itens=len(linhas))
+
+    entradas = pd.DataFrame({
+        "MUNICIPIO": "Ariquemes - RO",
+        "ITEM": itens,
+        "MEDIDA": medidas,
+    })
+    suite.medir("cotar_lote", parametros, lambda: motor.cotar_lote(entradas), itens=n_medidas)
+
+
+def casos_taxas(suite: Suite, pasta: str, n_anexos: int, rng: np.random.Generator):
+    """Leitura da tabela de taxas, índice por jurisdição e busca de taxas."""
+    parametros = {"anexos": n_anexos}
+    caminho_taxas = os.path.join(pasta, f"taxas_{n_anexos}_anexos.csv")
+    fixtures.gerar_taxas(n_anexos, rng).to_csv(caminho_taxas, index=False)
+    n_linhas_taxas = n_anexos * len(NOMES_PORTE) * 3
+
+    suite.medir("carregar_tabelas_taxas", parametros, lambda: carregar_tabelas_taxas(caminho_taxas),
+                itens=n_linhas_taxas)
+    atividades = carregar_atividades_anexo_i_sintetico(pasta, n_anexos, rng)
+    taxas = carregar_tabelas_taxas(caminho_taxas)
+    motor = MotorTaxas(atividades, taxas)
+    indice = motor.taxas_jurisdicoes.indice("ariquemes")
+
+    n_consultas = 10_000
+    consultas = list(zip(
+        [f"ANEXO {k}" for k in rng.integers(0, n_anexos, n_consultas)],
+        rng.choice(NOMES_PORTE, n_consultas),
+        rng.choice(fixtures.POTENCIAIS_TAXAS, n_consultas),
+    ))
+    suite.medir("obter_taxa_ufar", parametros,
+                lambda: [obter_taxa_ufar(indice, anexo, porte, potencial, "Licença Prévia")
+                         for anexo, porte, potencial in consultas],
+                itens=n_consultas)
+    anexos, portes, potenciais = (list(coluna) for coluna in zip(*consultas))
+    suite.medir("IndiceTaxas.buscar_lote", parametros,
+                lambda: indice.buscar_lote(anexos, portes, potenciais), itens=n_consultas)
+
+
+def carregar_atividades_anexo_i_sintetico(pasta: str, n_anexos: int, rng: np.random.Generator) -> pd.DataFrame:
+    """ANEXO I limpo com ITENS_COM_ANEXOS itens apontando para os n_anexos anexos."""
+    bruto = fixtures.gerar_anexo_i_bruto(ITENS_COM_ANEXOS, n_anexos, rng)
+    caminho = os.path.join(pasta, f"anexo_{n_anexos}_anexos_limpo.csv")
+    limpar_portes.limpar_portes(bruto).to_csv(caminho, index=False, sep=';', decimal=',')
+    return carregar_atividades_anexo_i(caminho)
+
+
+def casos_pdf(suite: Suite):
+    argumentos = argumentos_exemplo()
+    suite.medir("gerar_pdf", {}, lambda: [gerar_pdf(*argumentos) for _ in range(20)], itens=20)
+
+
+def casos_historico(suite: Suite, pasta: str, escalas: list, rng: np.random.Generator):
+    """Gravação e consulta do histórico; o mesmo banco cresce de uma escala para a seguinte."""
+    caminho_db = os.path.join(pasta, "historico.db")
+    for n_linhas in sorted(escalas):
+        inicio = time.perf_counter()
+        fixtures.crescer_historico(caminho_db, n_linhas, rng)
+        print(f"  (histórico com {n_linhas:,} linhas montado em {time.perf_counter() - inicio:.1f} s)", flush=True)
+        parametros = {"historico": n_linhas}
+
+        registros = fixtures.gerar_registros_historico(200, rng, datetime(2025, 1, 1))
+        suite.medir("salvar_calculo", parametros,
+                    lambda: [database.salvar_calculo(*r[1:9]) for r in registros], repeticoes=3, itens=len(registros))
+        # Só o que o app paga na hora; a gravação em lote fica para a thread
+        suite.medir("enfileirar_calculo", parametros,
+                    lambda: [database.enfileirar_calculo(*r[1:9]) for r in registros], itens=len(registros))
+        database.descarregar_fila()
+
+        # Tabela inteira só até 1 milhão de linhas (acima disso é o caso que o app evita)
+        if n_linhas <= 1_000_000:
+            suite.medir("listar_calculos", parametros, database.listar_calculos, repeticoes=3,
+                        itens=n_linhas, aquecer=False)
+        filtros = database.FiltrosHistorico(municipio="Ariquemes - RO", porte="Médio")
+        suite.medir("buscar_calculos (1ª página)", parametros, database.buscar_calculos, repeticoes=20)
+        suite.medir("buscar_calculos (filtrada)", parametros,
+                    lambda: database.buscar_calculos(filtros), repeticoes=20)
+    database.fechar_conexoes()
+
+
+# =============================
+# RESULTADOS
+# =============================
+
+def ambiente() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def _chave(resultado: dict) -> tuple:
+    return resultado["caso"], json.dumps(resultado["parametros"], sort_keys=True)
+
+
+def comparar(atuais: list, caminho_base: str, tolerancia: float) -> list:
+    """Casos cuja mediana passou da mediana da execução base por mais que a tolerância."""
+    with open(caminho_base, encoding="utf-8") as arquivo:
+        base = {_chave(r): r for r in json.load(arquivo)["resultados"]}
+    regressoes = []
+    print(f"\nComparação com {caminho_base} (tolerância {tolerancia:.0%}):")
+    for resultado in atuais:
+        anterior = base.get(_chave(resultado))
+        if anterior is None:
+            continue
+        razao = resultado["mediana_ms"] / anterior["mediana_ms"] if anterior["mediana_ms"] else float("inf")
+        marca = "  REGRESSÃO" if razao > 1 + tolerancia else ""
+        print(f"  {resultado['caso']:34s} {json.dumps(resultado['parametros']):28s} "
+              f"{anterior['mediana_ms']:10.2f} -> {resultado['mediana_ms']:10.2f} ms ({razao:5.2f}x){marca}")
+        if marca:
+            regressoes.append(resultado)
+    return regressoes
+
+
+def _lista_de_inteiros(texto: str) -> list:
+    return [int(valor) for valor in texto.replace("_", "").split(",") if valor]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks dos caminhos críticos com tabelas sintéticas.")
+    parser.add_argument("--escala", choices=list(ESCALAS), default="padrao")
+    parser.add_argument("--itens", type=_lista_de_inteiros, help="itens do ANEXO I (ex.: 500,100000)")
+    parser.add_argument("--anexos", type=_lista_de_inteiros, help="anexos da tabela de taxas")
+    parser.add_argument("--historico", type=_lista_de_inteiros, help="linhas do histórico")
+    parser.add_argument("--saida", help=f"arquivo JSON (padrão: {PASTA_RESULTADOS}/suite_<data>.json)")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA,
+                        help=f"aumento relativo da mediana tolerado (padrão: {TOLERANCIA})")
+    args = parser.parse_args(argv)
+
+    escalas = dict(ESCALAS[args.escala])
+    for tabela in ("itens", "anexos", "historico"):
+        if getattr(args, tabela):
+            escalas[tabela] = getattr(args, tabela)
+
+    # A suíte mede as funções em si; os tempos por etapa do app ficam desligados
+    registro_tempos().ativo = False
+    rng = np.random.default_rng(SEMENTE)
+    inicio = datetime.now()
+    suite = Suite()
+    caminho_db_original = database.DB_NAME
+    try:
+        with tempfile.TemporaryDirectory() as pasta:
+            print(f"ANEXO I ({', '.join(f'{n:,}' for n in escalas['itens'])} itens)")
+            for n_itens in escalas["itens"]:
+                casos_anexo_i(suite, pasta, n_itens, rng)
+            print(f"Tabela de taxas ({', '.join(f'{n:,}' for n in escalas['anexos'])} anexos)")
+            for n_anexos in escalas["anexos"]:
+                casos_taxas(suite, pasta, n_anexos, rng)
+            print("PDF")
+            casos_pdf(suite)
+            print(f"Histórico ({', '.join(f'{n:,}' for n in escalas['historico'])} linhas)")
+            casos_historico(suite, pasta, escalas["historico"], rng)
+    finally:
+        database.DB_NAME = caminho_db_original
+
+    saida = args.saida or os.path.join(PASTA_RESULTADOS, f"suite_{inicio:%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as arquivo:
+        json.dump({
+            "versao": VERSAO_RESULTADOS,
+            "inicio": inicio.isoformat(timespec="seconds"),
+            "duracao_s": round((datetime.now() - inicio).total_seconds(), 1),
+            "escalas": escalas,
+            "ambiente": ambiente(),
+            "resultados": suite.resultados,
+        }, arquivo, ensure_ascii=False, indent=1)
+    print(f"\nResultados em {saida}")
+
+    if args.comparar:
+        regressoes = comparar(suite.resultados, args.comparar, args.tolerancia)
+        if regressoes:
+            print(f"{len(regressoes)} caso(s) mais lento(s) que a execução anterior")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,220 +1,87 @@
+import copy
+import importlib
+import os
+import uuid
+from typing import TYPE_CHECKING
+
 import streamlit as st
-import pandas as pd
-from typing import Optional
 import yaml
 from yaml.loader import SafeLoader
 import streamlit_authenticator as stauth
 
-# =============================
-# CONFIGURAÇÃO DE ARQUIVOS CSV
-# =============================
-
-# CSV com atividades (ANEXO I) já limpo, incluindo colunas *_MIN / *_MAX
-ATIVIDADES_CSV_PATH = "ANEXO_I_cleaned_with_portes.csv"
-
-# CSV único com todas as taxas em UFAR (TLP/TLI/TLO)
-# colunas esperadas:
-#   ANEXO, DESCRICAO, PORTE, POTENCIAL_POLUIDOR, TLP, TLI, TLO
-TAXAS_CSV_PATH = "taxas_ambientais_ufar.csv"
-
-# CSV com CNAEs (subclasse, denominacao)
-CNAE_CSV_PATH = "IBGE_CNAE_Subclass2.3.csv"
-
-
-# =============================
-# CÁLCULO DE PORTE A PARTIR DE PORTE_*_MIN/MAX
-# =============================
-
-def classificar_porte_por_linha_valor(valor: float, linha: pd.Series) -> Optional[str]:
-    """
-    Classifica o porte com lógica inclusiva para evitar 'buracos' entre faixas.
-    """
-    spans = [
-        ("Mínimo",       "PORTE_MINIMO_MIN",       "PORTE_MINIMO_MAX"),
-        ("Pequeno",      "PORTE_PEQUENO_MIN",      "PORTE_PEQUENO_MAX"),
-        ("Médio",        "PORTE_MEDIO_MIN",        "PORTE_MEDIO_MAX"),
-        ("Grande",       "PORTE_GRANDE_MIN",       "PORTE_GRANDE_MAX"),
-        ("Excepcional",  "PORTE_EXCEPCIONAL_MIN",  "PORTE_EXCEPCIONAL_MAX"),
-    ]
-
-    for nome, col_min, col_max in spans:
-        lo = linha.get(col_min)
-        hi = linha.get(col_max)
-
-        # Se ambos são NaN, não há definição para este porte
-        if pd.isna(lo) and pd.isna(hi):
-            continue
-
-        # Normaliza limites
-        limit_lo = 0.0 if pd.isna(lo) else lo
-        limit_hi = float('inf') if pd.isna(hi) else hi
-
-        # Lógica de comparação
-        if limit_lo == 0.0:
-            # Faixa inicial (ex: Até 2): 0 <= valor <= 2
-            if valor <= limit_hi:
-                return nome
-        else:
-            # Faixas intermediárias (ex: De 2 até 10)
-            # AQUI ESTAVA O ERRO: Mudamos de > para >=
-            # Isso garante que se o intervalo começa em 2.0, o valor 2.0 seja aceito.
-            if valor >= limit_lo and valor <= limit_hi:
-                return nome
-
-    return None
+# Até a tela de login só entram módulos leves: o pacote motor_taxas carrega cada nome
+# (e o pandas) no primeiro acesso, e o motor, as tabelas, o banco e o FPDF são
+# carregados depois que a tela de login já foi enviada ao navegador
+import motor_taxas
+from motor_taxas.medicao import definir_sessao, medir
 
+if TYPE_CHECKING:
+    from motor_taxas import IndiceCNAE, MotorTaxas, TabelasReferencia
 
 # =============================
 # CARREGAMENTO DE TABELAS
 # =============================
+# O cálculo fica no pacote motor_taxas; aqui só entram o cache do Streamlit
+# e as mensagens de erro para o usuário.
 
-@st.cache_data
-def carregar_tabelas_taxas(caminho_csv: str = TAXAS_CSV_PATH) -> pd.DataFrame:
-    """
-    Carrega a tabela única de TLP/TLI/TLO em UFAR.
-
-    Espera colunas:
-      - ANEXO
-      - DESCRICAO
-      - PORTE
-      - POTENCIAL_POLUIDOR
-      - TLP
-      - TLI
-      - TLO
-    """
-    try:
-        df = pd.read_csv(caminho_csv, dtype=str)
-
-        # Normaliza nomes de colunas (maiúsculas, sem espaços extras)
-        df.columns = [c.strip().upper() for c in df.columns]
+# Os recursos são chaveados pela assinatura dos CSVs (mtime e tamanho): se alguma tabela
+# mudar, o próximo rerun recompila o artefato, monta um motor novo e o cache de cotações
+# (ligado ao hash das fontes) é esvaziado.
 
-        # Normaliza campos de filtro
-        for col in ["ANEXO", "PORTE", "POTENCIAL_POLUIDOR"]:
-            if col in df.columns:
-                df[col] = df[col].astype(str).str.strip()
-
-        # Garante que colunas TLP/TLI/TLO sejam numéricas (UFAR)
-        for col in ["TLP", "TLI", "TLO"]:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors="coerce")
-
-        return df
+@st.cache_resource(max_entries=1)
+def _tabelas_referencia(assinatura: tuple) -> "TabelasReferencia":
+    try:
+        return motor_taxas.artefato.carregar_tabelas_referencia()
     except Exception as e:
-        st.error(f"Erro ao carregar a tabela de taxas em UFAR ({caminho_csv}): {e}")
-        return pd.DataFrame()
+        st.error(f"Erro ao carregar as tabelas de referência (ANEXO I, taxas em UFAR e CNAEs): {e}")
+        st.stop()
 
 
-@st.cache_data
-def carregar_atividades_anexo_i(caminho_csv: str = ATIVIDADES_CSV_PATH) -> pd.DataFrame:
-    """Carrega o ANEXO I limpo, tratando separadores brasileiros (semicolon/comma)."""
-    try:
-        # Tenta ler assumindo o padrão criado pelo script de limpeza (sep=';' e decimal=',')
-        df = pd.read_csv(caminho_csv, sep=';', dtype=str)
-
-        # Verificação de segurança: Se carregou tudo em 1 coluna só, tenta o separador padrão
-        if df.shape[1] < 2:
-            df = pd.read_csv(caminho_csv, sep=',', dtype=str)
-
-        if "ITEM" in df.columns:
-            df["ITEM"] = df["ITEM"].astype(str).str.strip()
-
-        for col in ["Atividade", "UNIDADE_DE_MEDIDA", "POTENCIAL_POLUIDOR", "ANEXO_OU_TAXA"]:
-            if col in df.columns:
-                df[col] = df[col].astype(str).str.strip()
-
-        # Converte colunas *_MIN / *_MAX para numérico com tratamento de vírgula
-        for col in df.columns:
-            if col.endswith("_MIN") or col.endswith("_MAX"):
-                # 1. Troca vírgula por ponto (para o Python entender que é decimal)
-                # 2. Converte para número
-                df[col] = (
-                    df[col]
-                    .astype(str)
-                    .str.replace(",", ".", regex=False)
-                )
-                df[col] = pd.to_numeric(df[col], errors="coerce")
+@st.cache_resource(max_entries=1)
+def _motor(assinatura: tuple) -> "MotorTaxas":
+    referencia = _tabelas_referencia(assinatura)
+    return motor_taxas.MotorTaxas(
+        referencia.atividades,
+        referencia.taxas,
+        cnaes=referencia.cnaes,
+        taxas_jurisdicoes=referencia.taxas_jurisdicoes,
+        indice_cnae=referencia.indice_cnae,
+        versao_tabelas=referencia.hash_fontes,
+    )
 
-        return df
-    except Exception as e:
-        st.error(f"Erro ao carregar o arquivo de atividades (ANEXO I): {e}")
-        return pd.DataFrame()
 
+def carregar_tabelas_referencia() -> "TabelasReferencia":
+    """
+    Lê (uma única vez por versão dos CSVs) o ANEXO I, a tabela de taxas e os CNAEs do
+    artefato compilado, que é recompilado a partir dos CSVs quando algum deles muda.
+    """
+    with medir("carregar_tabelas_referencia"):
+        return _tabelas_referencia(motor_taxas.artefato.assinatura_fontes())
 
-@st.cache_data
-def carregar_cnaes(caminho_csv: str = CNAE_CSV_PATH) -> pd.DataFrame:
-    """Carrega a lista de CNAEs (subclasse, denominacao)."""
-    try:
-        df = pd.read_csv(caminho_csv, dtype=str)
-        # Cria coluna combinada para exibição
-        if "subclasse" in df.columns and "denominacao" in df.columns:
-            df["DISPLAY"] = df["subclasse"] + " - " + df["denominacao"]
-        return df
-    except Exception as e:
-        st.error(f"Erro ao carregar o arquivo de CNAEs: {e}")
-        return pd.DataFrame()
 
+def carregar_indice_cnae() -> "IndiceCNAE":
+    """Índice de busca dos CNAEs (já montado no artefato)."""
+    with medir("carregar_indice_cnae"):
+        return carregar_tabelas_referencia().indice_cnae
 
-# =============================
-# NORMALIZAÇÕES
-# =============================
-
-def normalizar_potencial_poluidor(valor: str) -> str:
-    """Normaliza o potencial poluidor vindo do CSV (BAIXO/MÉDIO/ALTO) para Baixo/Médio/Alto."""
-    if not valor:
-        return "Médio"
-    v = valor.strip().upper()
-    if "BAIX" in v:
-        return "Baixo"
-    if "MÉD" in v or "MED" in v:
-        return "Médio"
-    if "ALTO" in v:
-        return "Alto"
-    return "Médio"
-
-
-def inferir_tipo_medicao_por_unidade(unidade: str) -> str:
-    """Inferir o tipo de medição (area, potencia, funcionarios) a partir do texto da UNIDADE_DE_MEDIDA."""
-    if not unidade:
-        return "area"
-    u = unidade.lower()
-    if any(token in u for token in ["hectare", "ha", "m²", "m2", "área", "area"]):
-        return "area"
-    if any(token in u for token in ["kw", "potência", "potencia"]):
-        return "potencia"
-    if any(token in u for token in ["funcion", "empregado", "trabalhador", "pessoa"]):
-        return "funcionarios"
-    # Padrão
-    return "area"
 
+def carregar_motor() -> "MotorTaxas":
+    """Motor de cálculo com o ANEXO I e a tabela de taxas, montado uma vez por versão dos CSVs."""
+    with medir("carregar_motor"):
+        return _motor(motor_taxas.artefato.assinatura_fontes())
 
-# =============================
-# MAPAS DE COLUNAS E PORTES
-# =============================
 
-# Mapeia o tipo de serviço para a coluna correspondente na tabela de taxas (TLP/TLI/TLO)
-TIPO_LICENCA_COLUNA = {
-    "Licença Prévia": "TLP",
-    "Licença de Instalação": "TLI",
-    "Licença de Operação": "TLO",
-}
-
-# Mapeia o porte usado na interface para o porte da tabela
-MAPEAMENTO_PORTES_TABELA = {
-    "Mínimo": "Mínimo",
-    "Pequeno": "Pequeno",
-    "Médio": "Médio",
-    "Grande": "Grande",
-    "Excepcional": "Excepcional",
-}
-
-# Mapa inverso: porte da tabela -> porte exibido na UI
-MAPA_PORTE_TABELA_PARA_APP = {
-    "Mínimo": "Mínimo",
-    "Pequeno": "Pequeno",
-    "Médio": "Médio",
-    "Grande": "Grande",
-    "Excepcional": "Excepcional",
-}
+def precarregar_dependencias():
+    """
+    Chamado na tela de login, depois que ela já foi enviada ao navegador: carrega o motor
+    (pandas e tabelas), o banco e o FPDF enquanto o usuário digita a senha, para que o
+    primeiro cálculo depois do login não pague por eles. Nas execuções seguintes do
+    processo só confere a assinatura dos CSVs.
+    """
+    with medir("precarregar_dependencias"):
+        for modulo in ("database", "motor_taxas.pdf"):
+            importlib.import_module(modulo)
+        carregar_motor()
 
 
 # =============================
@@ -227,29 +94,80 @@ st.set_page_config(
     layout="wide"
 )
 
+# Identifica a sessão nas amostras de tempo por etapa (painel de desempenho do ADMIN)
+if "id_sessao" not in st.session_state:
+    st.session_state["id_sessao"] = uuid.uuid4().hex[:12]
+definir_sessao(st.session_state["id_sessao"])
+
 # =============================
 # AUTENTICAÇÃO
 # =============================
 
-with open('config.yaml') as file:
-    config = yaml.load(file, Loader=SafeLoader)
+# Usuários, senhas (hash bcrypt) e cookie do login
+CONFIG_PATH = 'config.yaml'
+
+# O config.yaml é lido uma vez por processo e relido só quando o arquivo muda (mtime ou
+# tamanho). A versão nova é montada por inteiro antes de entrar no cache, então cada
+# execução do script vê a config antiga ou a nova, nunca uma leitura pela metade.
+
+@st.cache_resource(max_entries=1)
+def _config(assinatura: tuple) -> dict:
+    try:
+        with open(CONFIG_PATH) as file:
+            config = yaml.load(file, Loader=SafeLoader)
+        # Senhas em texto puro viram hash aqui, uma vez, e não a cada execução do script
+        stauth.Hasher.hash_passwords(config['credentials'])
+        return config
+    except Exception as e:
+        st.error(f"Erro ao carregar a configuração de login ({CONFIG_PATH}): {e}")
+        st.stop()
+
+
+def carregar_config() -> dict:
+    """
+    config.yaml do cache do processo. Cada execução recebe uma cópia, porque o
+    streamlit-authenticator altera as credenciais (tentativas de login, sessão ativa).
+    """
+    with medir("carregar_config"):
+        arquivo = os.stat(CONFIG_PATH)
+        return copy.deepcopy(_config((arquivo.st_mtime_ns, arquivo.st_size)))
+
+
+config = carregar_config()
 
 authenticator = stauth.Authenticate(
     config['credentials'],
     config['cookie']['name'],
     config['cookie']['key'],
-    config['cookie']['expiry_days']
+    config['cookie']['expiry_days'],
+    auto_hash=False,
 )
 
 authenticator.login()
 
 if st.session_state["authentication_status"] is False:
     st.error('Username/password is incorrect')
+    precarregar_dependencias()
     st.stop()
 elif st.session_state["authentication_status"] is None:
     st.warning('Please enter your username and password')
+    precarregar_dependencias()
     st.stop()
 
+import database
+
+# Amostras de tempo por etapa vão para o histórico (painel de desempenho do ADMIN)
+database.iniciar_persistencia_tempos()
+
+from motor_taxas import (
+    ERRO_JURISDICAO_SEM_TABELA,
+    ERRO_TAXA_NAO_ENCONTRADA,
+    MUNICIPIOS_CONFIG,
+    NOMES_PORTE,
+    inferir_tipo_medicao_por_unidade,
+    metricas_cache_cotacoes,
+)
+
 # Se autenticado, mostra botão de logout na sidebar e continua
 # Se autenticado, continua
 if st.session_state["authentication_status"]:
@@ -430,94 +348,6 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-# =============================
-# DADOS FIXOS
-# =============================
-
-SERVICOS = {
-    "Licença Prévia": {"codigo": "LP", "descricao": "Fase de planejamento do empreendimento"},
-    "Licença de Instalação": {"codigo": "LI", "descricao": "Autoriza a instalação do empreendimento"},
-    "Licença de Operação": {"codigo": "LO", "descricao": "Autoriza a operação da atividade"},
-    }
-
-MUNICIPIOS_CONFIG = {
-    "Ariquemes - RO": {"ufir": 85.15, "lei": "Lei 2.349/2019"},
-    "Porto Velho - RO": {"ufir": 81.22, "lei": "Lei Municipal"},
-}
-
-
-# =============================
-# LÓGICA DE CÁLCULO
-# =============================
-
-def obter_taxa_ufar(df_taxas: pd.DataFrame, anexo: str, porte_app: str,
-                    potencial_poluidor: str, servico: str) -> float:
-    """
-    Busca a taxa (em UFAR) na tabela oficial, dado anexo, porte, potencial e tipo de licença,
-    usando o CSV único com colunas ANEXO / PORTE / POTENCIAL_POLUIDOR / TLP / TLI / TLO.
-    """
-    if df_taxas.empty:
-        valores_default = {
-            "Licença Prévia": 50,
-            "Licença de Instalação": 75,
-            "Licença de Operação": 60,
-        }
-        return valores_default.get(servico, 50)
-
-    if servico not in TIPO_LICENCA_COLUNA:
-        raise ValueError(f"Serviço não mapeado: {servico}")
-
-    coluna_valor = TIPO_LICENCA_COLUNA[servico]
-    porte_tabela = MAPEAMENTO_PORTES_TABELA.get(porte_app, porte_app)
-
-    # Normaliza ANEXO para comparação (ex.: "ANEXO II" == "ANEXOII")
-    anexo_norm = (anexo or "").replace(" ", "").upper().strip()
-
-    df_filtrado = df_taxas[
-        df_taxas["ANEXO"]
-        .str.replace(" ", "", regex=False)
-        .str.upper()
-        .str.strip()
-        .eq(anexo_norm)
-        & df_taxas["PORTE"].str.strip().eq(porte_tabela)
-        & df_taxas["POTENCIAL_POLUIDOR"].str.strip().str.upper().eq(potencial_poluidor.upper())
-    ]
-
-    if df_filtrado.empty:
-        valores_default = {
-            "Licença Prévia": 50,
-            "Licença de Instalação": 75,
-            "Licença de Operação": 60,
-        }
-        return valores_default.get(servico, 50)
-
-    return float(df_filtrado.iloc[0][coluna_valor])
-
-
-def calcular_taxa(servico: str, porte_nome: str, anexo: str,
-                  potencial_poluidor: str, df_taxas: pd.DataFrame,
-                  valor_ufir: float) -> tuple[float, float]:
-    """Calcula o valor da taxa ambiental com base nas tabelas oficiais (em UFAR)."""
-    try:
-        valor_ufar = obter_taxa_ufar(
-            df_taxas=df_taxas,
-            anexo=anexo,
-            porte_app=porte_nome,
-            potencial_poluidor=potencial_poluidor,
-            servico=servico,
-        )
-    except Exception:
-        valores_default = {
-            "Licença Prévia": 50,
-            "Licença de Instalação": 75,
-            "Licença de Operação": 60,
-        }
-        valor_ufar = valores_default.get(servico, 50)
-
-    valor_reais = valor_ufar * valor_ufir
-    return valor_reais, valor_ufar
-
-
 def render_step_header(number: str, text: str, required: bool = False):
     """Renders a professional step header with HTML/CSS"""
     asterisk = '<span class="required-asterisk">*</span>' if required else ''
@@ -584,16 +414,47 @@ with tab_calc:
         st.write("")  # Spacer
         render_step_header("2", "Atividades Requeridas - selecione apenas o(s) CNAE(s)", required=True)
         
-        df_cnaes = carregar_cnaes()
-        opcoes_cnaes = df_cnaes["DISPLAY"].tolist() if not df_cnaes.empty else []
+        # A busca roda no servidor: o widget recebe só os CNAEs já selecionados e os melhores resultados
+        indice_cnae = carregar_indice_cnae()
+        busca_cnae = st.text_input(
+            "Buscar CNAE",
+            placeholder="Buscar por código (ex.: 4731-8/00) ou descrição (ex.: comércio de combustíveis)",
+            key="busca_cnae",
+        )
+        cnaes_ja_selecionados = st.session_state.get("cnaes_selecionados", [])
+        opcoes_cnaes = cnaes_ja_selecionados + [
+            resultado.rotulo for resultado in indice_cnae.buscar(busca_cnae)
+            if resultado.rotulo not in cnaes_ja_selecionados
+        ]
         
         cnaes_selecionados = st.multiselect(
             "CNAEs",
             options=opcoes_cnaes,
+            key="cnaes_selecionados",
             label_visibility="collapsed",
-            placeholder="Selecione um ou mais CNAEs..."
+            placeholder="Selecione um ou mais CNAEs..." if busca_cnae else "Digite acima para buscar os CNAEs..."
         )
 
+        # Sugestão de atividade do ANEXO I a partir dos CNAEs (pré-seleciona os passos 4 e 5)
+        sugestao_atividade = None
+        if cnaes_selecionados:
+            sugestoes_atividade = carregar_motor().sugestoes_cnae.sugerir_para_cnaes(cnaes_selecionados)
+            if sugestoes_atividade:
+                sugestao_atividade = sugestoes_atividade[0]
+                outras = "".join(
+                    f"<br><small>Também pode ser: {s.item} - {s.atividade}</small>" for s in sugestoes_atividade[1:]
+                )
+                st.markdown(
+                    f"""
+                    <div class="info-box">
+                        <strong>💡 Atividade sugerida pelo CNAE:</strong> {sugestao_atividade.item} - {sugestao_atividade.atividade}
+                        <br><small>Unidade: {sugestao_atividade.unidade_medida} · Potencial poluidor: {sugestao_atividade.potencial_poluidor}</small>
+                        {outras}
+                    </div>
+                    """,
+                    unsafe_allow_html=True,
+                )
+
         # 3. Seleção do município
         st.write("")  # Spacer
         render_step_header("3", "Em qual município está localizado seu empreendimento?", required=True)
@@ -607,39 +468,42 @@ with tab_calc:
         config_municipio = MUNICIPIOS_CONFIG[municipio_selecionado]
         valor_ufir = config_municipio["ufir"]
         lei_referencia = config_municipio["lei"]
+        tabela_emprestada = carregar_motor().tabela_emprestada(municipio_selecionado)
+        if carregar_motor().jurisdicao(municipio_selecionado) is None:
+            st.warning(
+                f"⚠️ Ainda não há tabela de taxas cadastrada para {municipio_selecionado}: "
+                f"inclua o arquivo taxas_{config_municipio['jurisdicao']}_ufar.csv para calcular as taxas."
+            )
+        elif tabela_emprestada:
+            st.warning(
+                f"⚠️ {municipio_selecionado} ainda não tem tabela de taxas própria: os valores são "
+                f"calculados com a tabela de {tabela_emprestada.replace('_', ' ').title()} e podem não "
+                f"corresponder à lei do município. Inclua o arquivo taxas_{config_municipio['jurisdicao']}_ufar.csv "
+                f"para usar a tabela dele."
+            )
 
         # 4. Seleção do grupo de atividade a partir do ANEXO I
         st.write("")  # Spacer
         render_step_header("4", "Qual o Grupo de sua Atividade?", required=True)
 
-        atividades_df = carregar_atividades_anexo_i()
-        if atividades_df.empty:
+        motor = carregar_motor()
+        if motor.atividades.empty:
             st.error("Não foi possível carregar o ANEXO I. Verifique o arquivo CSV limpo.")
             st.stop()
 
-        atividades_df = atividades_df.copy()
-        atividades_df["ITEM_STR"] = atividades_df["ITEM"].astype(str).str.strip()
-        atividades_df["ITEM_BASE"] = atividades_df["ITEM_STR"].str.split(".").str[0]
-        # Grupos = linhas sem ponto (1, 2, 3, ...)
-        atividades_df["IS_GRUPO"] = ~atividades_df["ITEM_STR"].str.contains(".", regex=False, na=False)
-
-        grupos_df = atividades_df[atividades_df["IS_GRUPO"]].copy().sort_values("ITEM_BASE")
-
-        if grupos_df.empty:
+        # Grupos e subatividades vêm prontos da árvore do motor (compartilhada entre as sessões)
+        arvore = motor.arvore_atividades
+        if not len(arvore):
             st.error("Nenhum grupo encontrado no ANEXO I (linhas com ITEM = 1, 2, 3, ...).")
             st.stop()
 
-        opcoes_grupo = {
-            f"{row['ITEM_BASE']} - {row['Atividade']}": row["ITEM_BASE"]
-            for _, row in grupos_df.iterrows()
-        }
-
-        labels_grupo = list(opcoes_grupo.keys())
+        labels_grupo = list(arvore.rotulos_grupo)
 
+        rotulo_grupo_sugerido = motor.rotulo_grupo(sugestao_atividade.item) if sugestao_atividade else None
         grupo_selecionado_label = st.selectbox(
             "Grupo",
             options=labels_grupo,
-            index=0,
+            index=labels_grupo.index(rotulo_grupo_sugerido) if rotulo_grupo_sugerido in labels_grupo else 0,
             label_visibility="collapsed",
         )
 
@@ -647,36 +511,34 @@ with tab_calc:
             st.info("Selecione um grupo para continuar.")
             st.stop()
 
-        grupo_base = opcoes_grupo[grupo_selecionado_label]
+        grupo = arvore.grupo(grupo_selecionado_label)
         grupo_selecionado = grupo_selecionado_label  # para resumo
 
         # 5. Sub-atividade
         st.write("")  # Spacer
         render_step_header("5", "Qual é a sua Atividade?", required=True)
 
-        sub_df = atividades_df[
-            (atividades_df["ITEM_BASE"] == grupo_base) & (~atividades_df["IS_GRUPO"])
-        ].copy()
-
-        if sub_df.empty:
+        if not grupo.atividades:
             st.error("Não há subatividades para o grupo selecionado no ANEXO I.")
             st.stop()
 
-        opcoes_atividade = sub_df["Atividade"].dropna().tolist()
+        opcoes_atividade = list(grupo.atividades)
 
         atividade_selecionada = st.selectbox(
             "Atividade",
             options=opcoes_atividade,
+            index=(
+                opcoes_atividade.index(sugestao_atividade.atividade)
+                if sugestao_atividade and sugestao_atividade.atividade in opcoes_atividade else 0
+            ),
             label_visibility="collapsed",
         )
 
-        linha_atividade = sub_df[sub_df["Atividade"] == atividade_selecionada].iloc[0]
+        atividade_anexo = arvore.atividade(grupo.base, atividade_selecionada)
 
         # UNIDADE_DE_MEDIDA, POTENCIAL_POLUIDOR e ANEXO diretamente do CSV
-        unidade_medida = str(linha_atividade.get("UNIDADE_DE_MEDIDA", "") or "").strip()
-        potencial_raw = str(linha_atividade.get("POTENCIAL_POLUIDOR", "") or "").strip()
-        potencial_poluidor = normalizar_potencial_poluidor(potencial_raw)
-        anexo_selecionado = str(linha_atividade.get("ANEXO_OU_TAXA", "") or "").strip() or "ANEXO II"
+        unidade_medida = atividade_anexo.unidade_medida
+        potencial_poluidor, anexo_selecionado = atividade_anexo.potencial_poluidor, atividade_anexo.anexo
 
         # Infere tipo de medição
         tipo_medicao = inferir_tipo_medicao_por_unidade(unidade_medida)
@@ -732,14 +594,14 @@ with tab_calc:
                 help=f"Unidade de medida: {unidade_medida}" if unidade_medida else None,
             )
 
-        # Classifica o porte usando ANEXO I (PORTE_*_MIN/MAX)
-        porte_encontrado = classificar_porte_por_linha_valor(float(valor_medida), linha_atividade)
+        # Classifica o porte (ANEXO I, PORTE_*_MIN/MAX) e busca as taxas pelo motor de cálculo
+        cotacao = motor.cotar_atividade(municipio_selecionado, atividade_anexo, float(valor_medida))
         
-        if porte_encontrado is None:
+        if cotacao.porte is None:
             porte_texto = "Não Definido"
             st.error(f"⚠️ Não foi possível determinar o porte para a medida {valor_medida}. Verifique se o valor está dentro das faixas do Anexo I.")
         else:
-            porte_texto = MAPA_PORTE_TABELA_PARA_APP.get(porte_encontrado, porte_encontrado)
+            porte_texto = cotacao.porte
 
         # Texto amigável para o resumo lateral
         if unidade_medida:
@@ -786,6 +648,8 @@ with tab_calc:
 
         st.markdown(f"**Valor UFIR:** R$ {valor_ufir:.2f}")
         st.markdown(f"**Legislação:** {lei_referencia}")
+        if tabela_emprestada:
+            st.markdown(f"**Tabela de taxas:** {tabela_emprestada.replace('_', ' ').title()} (emprestada)")
 
     # =============================
     # CÁLCULO DAS TAXAS
@@ -810,7 +674,16 @@ with tab_calc:
             st.error("⚠️ Impossível calcular: O porte não foi identificado para a medida informada.")
             st.stop()
         
-        df_taxas = carregar_tabelas_taxas()
+        if cotacao.erro == ERRO_JURISDICAO_SEM_TABELA:
+            st.error(f"⚠️ Impossível calcular: não há tabela de taxas cadastrada para {municipio_selecionado}.")
+            st.stop()
+
+        if cotacao.erro == ERRO_TAXA_NAO_ENCONTRADA:
+            st.error(
+                f"⚠️ Impossível calcular: não há taxa cadastrada para {anexo_selecionado} "
+                f"(porte {porte_texto}, potencial poluidor {potencial_poluidor})."
+            )
+            st.stop()
 
         st.markdown(f"""
             <div class="result-box">
@@ -828,15 +701,10 @@ with tab_calc:
         col_lic1, col_lic2 = st.columns(2)
         todos_valores = {}
 
-        for i, (servico, info) in enumerate(SERVICOS.items()):
-            valor_total, valor_ufars = calcular_taxa(
-                servico=servico,
-                porte_nome=porte_texto,
-                anexo=anexo_selecionado,
-                potencial_poluidor=potencial_poluidor,
-                df_taxas=df_taxas,
-                valor_ufir=valor_ufir
-            )
+        for i, licenca in enumerate(cotacao.licencas):
+            servico = licenca.servico
+            info = {"codigo": licenca.codigo, "descricao": licenca.descricao}
+            valor_total, valor_ufars = licenca.valor_reais, licenca.valor_ufar
 
             todos_valores[servico] = {
                 "valor_reais": valor_total,
@@ -889,136 +757,32 @@ with tab_calc:
         """, unsafe_allow_html=True)
 
         # =============================
-        # GERAÇÃO DE PDF
+        # DOWNLOAD DO PDF
         # =============================
-        from fpdf import FPDF
-        import tempfile
-
-        class PDF(FPDF):
-            def header(self):
-                # Logo
-                try:
-                    self.image('atenas.jpeg', 10, 8, 33)
-                except:
-                    pass
-                self.set_font('Arial', 'B', 15)
-                self.cell(80)
-                self.cell(30, 10, 'Calculadora de Taxas Ambientais', 0, 0, 'C')
-                self.ln(20)
-
-            def footer(self):
-                self.set_y(-15)
-                self.set_font('Arial', 'I', 8)
-                self.cell(0, 10, 'Atenas Projetos Ambientais - Página ' + str(self.page_no()) + '/{nb}', 0, 0, 'C')
-
-        def gerar_pdf(municipio, grupo, atividade, medida, porte, potencial, ufir, valores, cnpj_cpf, cnaes_list):
-            pdf = PDF()
-            pdf.alias_nb_pages()
-            pdf.add_page()
-            pdf.ln(10)
-            pdf.set_font('Arial', '', 12)
-
-            # Dados do Empreendimento
-            pdf.set_fill_color(200, 220, 255)
-            pdf.cell(0, 10, 'Dados do Empreendimento', 0, 1, 'L', 1)
-            pdf.ln(5)
-            
-            pdf.set_font('Arial', 'B', 10)
-            pdf.cell(40, 10, 'CNPJ/CPF:', 0, 0)
-            pdf.set_font('Arial', '', 10)
-            pdf.cell(0, 10, cnpj_cpf, 0, 1)
-
-            pdf.set_font('Arial', 'B', 10)
-            pdf.cell(40, 10, 'CNAEs:', 0, 0)
-            pdf.set_font('Arial', '', 10)
-            # Multi-cell para CNAEs pois pode ser longo
-            cnaes_text = "; ".join(cnaes_list)
-            pdf.multi_cell(0, 10, cnaes_text)
-
-            pdf.set_font('Arial', 'B', 10)
-            pdf.cell(40, 10, 'Município:', 0, 0)
-            pdf.set_font('Arial', '', 10)
-            pdf.cell(0, 10, municipio, 0, 1)
-
-            pdf.set_font('Arial', 'B', 10)
-            pdf.cell(40, 10, 'Grupo:', 0, 0)
-            pdf.set_font('Arial', '', 10)
-            pdf.multi_cell(0, 10, grupo)
-
-            pdf.set_font('Arial', 'B', 10)
-            pdf.cell(40, 10, 'Atividade:', 0, 0)
-            pdf.set_font('Arial', '', 10)
-            pdf.multi_cell(0, 10, atividade)
-
-            pdf.set_font('Arial', 'B', 10)
-            pdf.cell(40, 10, 'Medida:', 0, 0)
-            pdf.set_font('Arial', '', 10)
-            pdf.cell(0, 10, medida, 0, 1)
-
-            pdf.set_font('Arial', 'B', 10)
-            pdf.cell(40, 10, 'Porte:', 0, 0)
-            pdf.set_font('Arial', '', 10)
-            pdf.cell(0, 10, porte, 0, 1)
-
-            pdf.set_font('Arial', 'B', 10)
-            pdf.cell(40, 10, 'Potencial Poluidor:', 0, 0)
-            pdf.set_font('Arial', '', 10)
-            pdf.cell(0, 10, potencial, 0, 1)
-            
-            pdf.ln(10)
-
-            # Valores
-            pdf.set_font('Arial', '', 12)
-            pdf.set_fill_color(200, 220, 255)
-            pdf.cell(0, 10, 'Valores Estimados das Taxas', 0, 1, 'L', 1)
-            pdf.ln(5)
-
-            pdf.set_font('Arial', 'B', 10)
-            pdf.cell(60, 10, 'Licença', 1, 0, 'C')
-            pdf.cell(40, 10, 'Valor (UFAR)', 1, 0, 'C')
-            pdf.cell(40, 10, 'Valor (R$)', 1, 0, 'C')
-            pdf.ln()
-
-            pdf.set_font('Arial', '', 10)
-            total = 0
-            for servico, dados in valores.items():
-                pdf.cell(60, 10, f"{dados['codigo']} - {servico}", 1, 0)
-                pdf.cell(40, 10, f"{dados['valor_ufar']:.2f}", 1, 0, 'R')
-                pdf.cell(40, 10, f"R$ {dados['valor_reais']:,.2f}", 1, 0, 'R')
-                pdf.ln()
-                total += dados['valor_reais']
-
-            pdf.ln(5)
-            pdf.set_font('Arial', 'B', 10)
-            pdf.cell(100, 10, 'Total Estimado:', 0, 0, 'R')
-            pdf.cell(40, 10, f"R$ {total:,.2f}", 0, 1, 'R')
-
-            pdf.ln(10)
-            pdf.set_font('Arial', 'I', 8)
-            pdf.multi_cell(0, 5, 'Observação: Os valores são estimativas baseadas na legislação municipal. O valor final pode variar conforme análise técnica do órgão ambiental. As taxas podem ser parceladas em até 6 vezes.')
-
-            return pdf.output(dest='S').encode('latin-1')
-
-        # Botão de Download
+        # O PDF é pedido ao pool de renderização logo após o cálculo e fica pronto enquanto o
+        # usuário lê o resultado; a página não espera por ele e o clique só recolhe os bytes
+        from motor_taxas.pdf import TEMPO_MAXIMO_PDF, solicitar_pdf
+
+        argumentos_pdf = (
+            municipio_selecionado,
+            grupo_selecionado,
+            atividade_selecionada,
+            medida_texto,
+            porte_texto,
+            potencial_poluidor,
+            valor_ufir,
+            todos_valores,
+            cnpj_cpf,
+            cnaes_selecionados
+        )
+        futuro_pdf = solicitar_pdf(*argumentos_pdf)
+
         st.write("")
         col_dl1, col_dl2, col_dl3 = st.columns([1, 2, 1])
         with col_dl2:
-            pdf_bytes = gerar_pdf(
-                municipio_selecionado,
-                grupo_selecionado,
-                atividade_selecionada,
-                medida_texto,
-                porte_texto,
-                potencial_poluidor,
-                valor_ufir,
-                todos_valores,
-                cnpj_cpf,
-                cnaes_selecionados
-            )
-            
             st.download_button(
                 label="📄 BAIXAR RESUMO EM PDF",
-                data=pdf_bytes,
+                data=lambda: futuro_pdf.result(TEMPO_MAXIMO_PDF),
                 file_name="resumo_taxas_ambiental.pdf",
                 mime="application/pdf",
                 width="stretch"
@@ -1029,11 +793,8 @@ with tab_calc:
         # =============================
         import database
         
-        # Inicializa o banco se necessário
-        database.init_db()
-        
-        # Salva o cálculo
-        database.salvar_calculo(
+        # Enfileira o cálculo; a gravação no banco acontece em segundo plano
+        database.enfileirar_calculo(
             municipio=municipio_selecionado,
             grupo=grupo_selecionado,
             atividade=atividade_selecionada,
@@ -1044,7 +805,7 @@ with tab_calc:
             cnpj_cpf=cnpj_cpf,
             cnaes="; ".join(cnaes_selecionados)
         )
-        st.success("✅ Cálculo salvo no histórico com sucesso!")
+        st.success("✅ Cálculo enfileirado para gravação no histórico.")
 
 # =============================
 # HISTÓRICO / AUDITORIA (ADMIN)
@@ -1055,20 +816,154 @@ if tab_admin:
         
         import database
         database.init_db()
-        df_history = database.listar_calculos()
-        
-        if not df_history.empty:
-            st.dataframe(df_history, width="stretch")
-            
-            csv = df_history.to_csv(index=False).encode('utf-8')
+        # Os cálculos ainda na fila de gravação só aparecem na listagem depois de gravados;
+        # esperar por eles a cada execução do painel (filtro, página) bloquearia a tela
+        col_aguardando, col_atualizar = st.columns([3, 1])
+        with col_atualizar:
+            if st.button("🔄 Atualizar histórico", key="hist_atualizar"):
+                if not database.descarregar_fila(timeout=database.TEMPO_MAXIMO_DESCARGA):
+                    st.warning("A fila de gravação ainda não terminou; tente atualizar de novo.")
+        with col_aguardando:
+            aguardando = database.metricas_gravacao()["aguardando_gravacao"]
+            if aguardando:
+                st.caption(f"⏳ {aguardando} cálculo(s) na fila de gravação ainda não aparecem na listagem.")
+
+        with st.expander("Fila de gravação do histórico"):
+            metricas = database.metricas_gravacao()
+            col_fila, col_lotes, col_latencia = st.columns(3)
+            col_fila.metric("Aguardando gravação", metricas["aguardando_gravacao"])
+            col_lotes.metric("Gravados / lotes", f"{metricas['gravados']} / {metricas['lotes']}")
+            col_latencia.metric("Latência média do lote", f"{metricas['latencia_media_lote_ms']:.1f} ms")
+            st.caption(
+                f"Último lote: {metricas['ultimo_lote']} registro(s) em {metricas['latencia_ultimo_lote_ms']:.1f} ms · "
+                f"máx. {metricas['latencia_max_lote_ms']:.1f} ms · "
+                f"gravações síncronas (fila cheia): {metricas['gravacoes_sincronas']} · "
+                f"guardados para nova gravação: {metricas['pendentes']} · regravados: {metricas['recuperados']} · "
+                f"perdidos: {metricas['falhas']}"
+            )
+
+        with st.expander("Renderização de PDFs"):
+            from motor_taxas.pdf import metricas_renderizacao_pdf
+
+            metricas = metricas_renderizacao_pdf()
+            col_fila, col_renderizados, col_tempo = st.columns(3)
+            col_fila.metric("Na fila / em andamento", f"{metricas['profundidade_fila']} / {metricas['em_andamento']}")
+            col_renderizados.metric("Renderizados / coalescidos", f"{metricas['renderizados']} / {metricas['coalescidos']}")
+            col_tempo.metric("Tempo médio de renderização", f"{metricas['tempo_medio_ms']:.1f} ms")
+            st.caption(
+                f"{metricas['trabalhadores']} thread(s) · espera média na fila: {metricas['espera_media_ms']:.1f} ms · "
+                f"renderizações síncronas (fila cheia): {metricas['renderizacoes_sincronas']} · falhas: {metricas['falhas']}"
+            )
+
+        with st.expander("Cache de cotações"):
+            metricas = metricas_cache_cotacoes()
+            col_acertos, col_faltas, col_remocoes = st.columns(3)
+            col_acertos.metric("Acertos", metricas["acertos"])
+            col_faltas.metric("Faltas", metricas["faltas"])
+            col_remocoes.metric("Remoções (LRU)", metricas["remocoes"])
+            st.caption(
+                f"Taxa de acerto: {metricas['taxa_acerto']:.1%} · "
+                f"entradas: {metricas['entradas']} / {metricas['tamanho_maximo']} · "
+                f"versões das tabelas no cache: {metricas['versoes']}"
+            )
+
+        with st.expander("Desempenho por etapa"):
+            janelas = {"Últimos 15 minutos": 900, "Última hora": 3600, "Últimas 24 horas": 86400,
+                       "Últimos 7 dias": 7 * 86400}
+            janela = st.selectbox("Janela", list(janelas), index=1, key="desempenho_janela")
+            # Os percentis só são calculados aqui, com o painel aberto
+            if st.checkbox("Calcular percentis", key="desempenho_calcular"):
+                resumo = database.resumo_tempos(janelas[janela])
+                if resumo.empty:
+                    st.info("Nenhuma amostra de tempo na janela selecionada.")
+                else:
+                    st.dataframe(
+                        resumo,
+                        hide_index=True,
+                        width="stretch",
+                        column_config={
+                            coluna: st.column_config.NumberColumn(format="%.2f")
+                            for coluna in ("p50_ms", "p95_ms", "p99_ms", "max_ms")
+                        },
+                    )
+            metricas = database.metricas_tempos()
+            st.caption(
+                f"Amostras registradas neste processo: {metricas['registradas']} · "
+                f"em memória: {metricas['em_memoria']} · gravadas: {metricas['persistidas']} · "
+                f"descartadas (buffer cheio): {metricas['descartadas']} · falhas: {metricas['falhas']}"
+            )
+
+        # Filtros (aplicados no SQL; só a página visível é lida do banco)
+        col_inicio, col_fim, col_mun, col_porte = st.columns(4)
+        with col_inicio:
+            filtro_inicio = st.date_input("De", value=None, format="DD/MM/YYYY", key="hist_inicio")
+        with col_fim:
+            filtro_fim = st.date_input("Até", value=None, format="DD/MM/YYYY", key="hist_fim")
+        with col_mun:
+            filtro_municipio = st.selectbox("Município", [""] + list(MUNICIPIOS_CONFIG.keys()), key="hist_municipio")
+        with col_porte:
+            filtro_porte = st.selectbox("Porte", [""] + NOMES_PORTE, key="hist_porte")
+        col_cnpj, col_atividade = st.columns(2)
+        with col_cnpj:
+            filtro_cnpj = st.text_input("CNPJ/CPF (começa com)", key="hist_cnpj")
+        with col_atividade:
+            filtro_atividade = st.text_input("Atividade (começa com)", key="hist_atividade")
+
+        filtros = database.FiltrosHistorico(
+            data_inicio=filtro_inicio,
+            data_fim=filtro_fim,
+            municipio=filtro_municipio,
+            cnpj_cpf=filtro_cnpj,
+            atividade=filtro_atividade,
+            porte=filtro_porte,
+        )
+
+        # Pilha de cursores das páginas visitadas; recomeça quando os filtros mudam
+        if st.session_state.get("hist_filtros") != filtros:
+            st.session_state["hist_filtros"] = filtros
+            st.session_state["hist_cursores"] = [None]
+        cursores = st.session_state["hist_cursores"]
+
+        pagina = database.buscar_calculos(filtros, cursor=cursores[-1])
+
+        if not pagina.dados.empty:
+            st.dataframe(pagina.dados, width="stretch")
+
+            col_anterior, col_pagina, col_proxima = st.columns([1, 2, 1])
+            with col_anterior:
+                if st.button("◀ Anterior", disabled=len(cursores) == 1, key="hist_anterior"):
+                    cursores.pop()
+                    st.rerun()
+            with col_pagina:
+                st.caption(f"Página {len(cursores)}")
+            with col_proxima:
+                if st.button("Próxima ▶", disabled=pagina.proximo_cursor is None, key="hist_proxima"):
+                    cursores.append(pagina.proximo_cursor)
+                    st.rerun()
+
+            # A exportação só roda quando o botão é clicado e lê o histórico em blocos
+            # (com os mesmos filtros da tabela) para um arquivo temporário em disco
+            formato_exportacao = st.radio(
+                "Formato da exportação", database.FORMATOS_EXPORTACAO,
+                format_func=str.upper, horizontal=True, key="hist_formato",
+            )
+
+            def gerar_exportacao():
+                import tempfile
+
+                arquivo = tempfile.TemporaryFile()
+                database.exportar_calculos(arquivo, formato_exportacao, filtros)
+                arquivo.seek(0)
+                return arquivo
+
             st.download_button(
-                "📥 Baixar Histórico (CSV)",
-                data=csv,
-                file_name="historico_calculos.csv",
-                mime="text/csv",
+                f"📥 Baixar Histórico ({formato_exportacao.upper()})",
+                data=gerar_exportacao,
+                file_name=f"historico_calculos.{formato_exportacao}",
+                mime="text/csv" if formato_exportacao == "csv" else "application/vnd.apache.parquet",
             )
         else:
-            st.info("Nenhum cálculo registrado ainda.")
+            st.info("Nenhum cálculo encontrado.")
 
 # Rodapé
 st.markdown("---")
@@ -0,0 +1,52 @@
+import argparse
+import sys
+
+from motor_taxas.arquivo import FORMATOS, TAMANHO_BLOCO_PADRAO, cotar_arquivo
+
+# How to use:
+# Cota um CSV/JSONL com uma linha por empreendimento (MUNICIPIO, ITEM, MEDIDA, ...)
+# e grava o resultado com LP/LI/LO em UFAR e R$ e o código de erro de cada linha.
+# Linhas sem ITEM mas com CNAE são cotadas pela atividade do ANEXO I sugerida para o CNAE.
+# Example: python cotar_em_lote.py projetos.csv cotacoes.csv --processos 4
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cota arquivos grandes de empreendimentos em paralelo.")
+    parser.add_argument("entrada", help="arquivo CSV ou JSONL de entrada")
+    parser.add_argument("saida", help="arquivo CSV ou JSONL de saída")
+    parser.add_argument("--processos", type=int, default=None,
+                        help="número de processos (padrão: número de núcleos)")
+    parser.add_argument("--tamanho-bloco", type=int, default=TAMANHO_BLOCO_PADRAO,
+                        help=f"linhas por bloco (padrão: {TAMANHO_BLOCO_PADRAO})")
+    parser.add_argument("--formato-entrada", choices=FORMATOS, default=None,
+                        help="formato da entrada (padrão: pela extensão)")
+    parser.add_argument("--formato-saida", choices=FORMATOS, default=None,
+                        help="formato da saída (padrão: pela extensão)")
+    parser.add_argument("--coluna-municipio", default="MUNICIPIO")
+    parser.add_argument("--coluna-item", default="ITEM")
+    parser.add_argument("--coluna-medida", default="MEDIDA")
+    parser.add_argument("--coluna-cnae", default="CNAE",
+                        help="coluna opcional de CNAE, usada quando o ITEM está vazio")
+    args = parser.parse_args(argv)
+
+    def mostrar_progresso(estatisticas):
+        print(f"\r{estatisticas.linhas:,} linhas  ({estatisticas.linhas_por_segundo:,.0f} linhas/s)",
+              end="", file=sys.stderr, flush=True)
+
+    estatisticas = cotar_arquivo(
+        args.entrada,
+        args.saida,
+        processos=args.processos,
+        tamanho_bloco=args.tamanho_bloco,
+        formato_entrada=args.formato_entrada,
+        formato_saida=args.formato_saida,
+        colunas=(args.coluna_municipio, args.coluna_item, args.coluna_medida, args.coluna_cnae),
+        ao_progredir=mostrar_progresso,
+    )
+    print(file=sys.stderr)
+    print(estatisticas.relatorio())
+    print(f"Resultado salvo em: {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,64 +1,729 @@
+import csv
+import io
+import json
 import sqlite3
 import pandas as pd
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional
+import atexit
+import logging
 import os
+import queue
+import threading
+import time
+
+from motor_taxas.medicao import medido, percentis_por_etapa, registro_tempos
 
 DB_NAME = "historico_calculos.db"
 
+logger = logging.getLogger(__name__)
+
+# =============================
+# CONEXÕES
+# =============================
+# As conexões ficam em um pool por processo (e por arquivo de banco) e são reaproveitadas
+# entre chamadas, em vez de abrir e fechar uma conexão a cada cálculo salvo.
+
+# Máximo de conexões ociosas guardadas no pool de cada banco
+MAX_CONEXOES_OCIOSAS = 8
+
+# Tempo (ms) que uma escrita espera por outra antes de falhar com "database is locked"
+BUSY_TIMEOUT_MS = 5000
+
+# Quantidade de comandos SQL preparados mantidos em cache por conexão
+CACHED_STATEMENTS = 256
+
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL",          # leitores não bloqueiam escritores (e vice-versa)
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+    "PRAGMA synchronous=NORMAL",        # seguro com WAL; fsync só nos checkpoints
+    "PRAGMA cache_size=-20000",         # ~20 MB de cache de páginas por conexão
+    "PRAGMA temp_store=MEMORY",
+]
+
+SQL_CRIAR_TABELA = '''
+    CREATE TABLE IF NOT EXISTS calculos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        data_hora TEXT,
+        municipio TEXT,
+        grupo TEXT,
+        atividade TEXT,
+        medida TEXT,
+        porte TEXT,
+        potencial_poluidor TEXT,
+        valor_total REAL,
+        cnpj_cpf TEXT,
+        cnaes TEXT
+    )
+'''
+
+SQL_INSERIR_CALCULO = '''
+    INSERT INTO calculos (data_hora, municipio, grupo, atividade, medida, porte, potencial_poluidor, valor_total, cnpj_cpf, cnaes)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Colunas de um registro de cálculo, na ordem de SQL_INSERIR_CALCULO
+COLUNAS_REGISTRO = [
+    "data_hora", "municipio", "grupo", "atividade", "medida", "porte",
+    "potencial_poluidor", "valor_total", "cnpj_cpf", "cnaes",
+]
+
+SQL_LISTAR_CALCULOS = "SELECT * FROM calculos ORDER BY id DESC"
+
+# Índices dos filtros do histórico. A data_hora entra em todos para que o filtro por
+# igualdade + período + ordenação (data_hora DESC, id DESC) saiam do mesmo índice, sem sort.
+SQL_CRIAR_INDICES = [
+    "CREATE INDEX IF NOT EXISTS idx_calculos_data_hora ON calculos (data_hora)",
+    "CREATE INDEX IF NOT EXISTS idx_calculos_municipio ON calculos (municipio, data_hora)",
+    "CREATE INDEX IF NOT EXISTS idx_calculos_cnpj_cpf ON calculos (cnpj_cpf, data_hora)",
+    "CREATE INDEX IF NOT EXISTS idx_calculos_atividade ON calculos (atividade, data_hora)",
+    "CREATE INDEX IF NOT EXISTS idx_calculos_porte ON calculos (porte, data_hora)",
+]
+
+# Amostras de tempo por etapa (motor_taxas.medicao), gravadas pela persistência periódica
+SQL_CRIAR_TABELA_TEMPOS = '''
+    CREATE TABLE IF NOT EXISTS tempos_etapas (
+        instante REAL,
+        sessao TEXT,
+        etapa TEXT,
+        duracao_s REAL
+    )
+'''
+
+SQL_CRIAR_INDICE_TEMPOS = "CREATE INDEX IF NOT EXISTS idx_tempos_etapas_instante ON tempos_etapas (instante)"
+
+_trava = threading.Lock()
+_pools = {}
+_pid_dos_pools = os.getpid()
+_esquemas_prontos = set()
+
+
+def _nova_conexao(caminho):
+    conn = sqlite3.connect(
+        caminho,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,
+        cached_statements=CACHED_STATEMENTS,
+    )
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def _pool_do_banco(caminho):
+    global _pools, _pid_dos_pools, _esquemas_prontos
+    with _trava:
+        # Depois de um fork, as conexões herdadas não podem ser usadas pelo processo filho
+        if _pid_dos_pools != os.getpid():
+            _pools, _pid_dos_pools, _esquemas_prontos = {}, os.getpid(), set()
+        if caminho not in _pools:
+            _pools[caminho] = queue.LifoQueue(maxsize=MAX_CONEXOES_OCIOSAS)
+        return _pools[caminho]
+
+
+@contextmanager
+def conexao():
+    """
+    Empresta uma conexão do pool (WAL, busy timeout e cache de comandos já configurados)
+    e a devolve ao final. Use "with conn:" dentro do bloco para delimitar transações.
+    """
+    caminho = DB_NAME
+    pool = _pool_do_banco(caminho)
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        conn = _nova_conexao(caminho)
+    try:
+        yield conn
+    except BaseException:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        try:
+            pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+def fechar_conexoes():
+    """Fecha todas as conexões ociosas do processo."""
+    with _trava:
+        pools = list(_pools.values())
+    for pool in pools:
+        while True:
+            try:
+                pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+atexit.register(fechar_conexoes)
+
+
+@medido("init_db")
 def init_db():
-    """Inicializa o banco de dados e cria a tabela se não existir."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS calculos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            data_hora TEXT,
-            municipio TEXT,
-            grupo TEXT,
-            atividade TEXT,
-            medida TEXT,
-            porte TEXT,
-            potencial_poluidor TEXT,
-            valor_total REAL,
-            cnpj_cpf TEXT,
-            cnaes TEXT
-        )
-    ''')
-    
-    # Migração: verifica se a coluna cnpj_cpf existe, se não, adiciona
-    cursor.execute("PRAGMA table_info(calculos)")
-    columns = [info[1] for info in cursor.fetchall()]
-    if "cnpj_cpf" not in columns:
-        cursor.execute("ALTER TABLE calculos ADD COLUMN cnpj_cpf TEXT")
-    if "cnaes" not in columns:
-        cursor.execute("ALTER TABLE calculos ADD COLUMN cnaes TEXT")
-    
-    conn.commit()
-    conn.close()
+    """Inicializa o banco de dados e cria a tabela se não existir (uma vez por processo)."""
+    caminho = DB_NAME
+    if caminho in _esquemas_prontos and _pid_dos_pools == os.getpid():
+        return
+
+    with conexao() as conn, conn:
+        cursor = conn.cursor()
+        cursor.execute(SQL_CRIAR_TABELA)
+
+        # Migração: verifica se a coluna cnpj_cpf existe, se não, adiciona
+        cursor.execute("PRAGMA table_info(calculos)")
+        columns = [info[1] for info in cursor.fetchall()]
+        if "cnpj_cpf" not in columns:
+            cursor.execute("ALTER TABLE calculos ADD COLUMN cnpj_cpf TEXT")
+        if "cnaes" not in columns:
+            cursor.execute("ALTER TABLE calculos ADD COLUMN cnaes TEXT")
 
+        for sql in SQL_CRIAR_INDICES:
+            cursor.execute(sql)
+
+        cursor.execute(SQL_CRIAR_TABELA_TEMPOS)
+        cursor.execute(SQL_CRIAR_INDICE_TEMPOS)
+
+    with _trava:
+        _esquemas_prontos.add(caminho)
+
+
+@medido("salvar_calculo")
 def salvar_calculo(municipio, grupo, atividade, medida, porte, potencial, valor_total, cnpj_cpf="", cnaes=""):
     """Salva um novo registro de cálculo no banco de dados."""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
     data_hora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    cursor.execute('''
-        INSERT INTO calculos (data_hora, municipio, grupo, atividade, medida, porte, potencial_poluidor, valor_total, cnpj_cpf, cnaes)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (data_hora, municipio, grupo, atividade, medida, porte, potencial, valor_total, cnpj_cpf, cnaes))
-    
-    conn.commit()
-    conn.close()
-
-def listar_calculos():
-    """Retorna todos os cálculos salvos como um DataFrame."""
-    conn = sqlite3.connect(DB_NAME)
+
+    with conexao() as conn, conn:
+        conn.execute(
+            SQL_INSERIR_CALCULO,
+            (data_hora, municipio, grupo, atividade, medida, porte, potencial, valor_total, cnpj_cpf, cnaes),
+        )
+
+
+def listar_calculos(filtros=None):
+    """Retorna todos os cálculos salvos (ou só os que atendem aos filtros) como um DataFrame."""
+    sql, parametros = SQL_LISTAR_CALCULOS, []
+    if filtros is not None:
+        where, parametros = filtros.clausula_where()
+        sql = f"SELECT * FROM calculos {where} {ORDEM_HISTORICO}"
+    with conexao() as conn:
+        try:
+            df = pd.read_sql_query(sql, conn, params=parametros)
+            return df
+        except Exception:
+            return pd.DataFrame()
+
+
+# =============================
+# CONSULTA DO HISTÓRICO (FILTROS E PAGINAÇÃO)
+# =============================
+# Os filtros viram cláusulas WHERE atendidas pelos índices de SQL_CRIAR_INDICES e a
+# paginação é por chave (keyset): cada página começa depois do último (data_hora, id)
+# da anterior, então o custo de uma página não cresce com o tamanho da tabela.
+
+TAMANHO_PAGINA = 50
+
+# Maior caractere Unicode; "prefixo" <= texto < "prefixo" + MAIOR_CARACTERE equivale a
+# texto LIKE 'prefixo%', mas usa o índice (LIKE no SQLite não usa índice por padrão).
+MAIOR_CARACTERE = "\U0010ffff"
+
+ORDEM_HISTORICO = "ORDER BY data_hora DESC, id DESC"
+
+
+@dataclass(frozen=True)
+class FiltrosHistorico:
+    """Filtros do histórico. Campos vazios não filtram; CNPJ/CPF e atividade filtram por prefixo."""
+
+    data_inicio: Optional[date] = None
+    data_fim: Optional[date] = None
+    municipio: str = ""
+    cnpj_cpf: str = ""
+    atividade: str = ""
+    porte: str = ""
+
+    def clausula_where(self):
+        """Retorna (sql, parâmetros) da cláusula WHERE; sql vazio quando não há filtros."""
+        condicoes, parametros = [], []
+        if self.data_inicio:
+            condicoes.append("data_hora >= ?")
+            parametros.append(self.data_inicio.strftime("%Y-%m-%d"))
+        if self.data_fim:
+            # data_hora é texto "AAAA-MM-DD HH:MM:SS": o fim inclui o dia inteiro
+            condicoes.append("data_hora < ?")
+            parametros.append((self.data_fim + timedelta(days=1)).strftime("%Y-%m-%d"))
+        for coluna, valor in (("municipio", self.municipio), ("porte", self.porte)):
+            if valor:
+                condicoes.append(f"{coluna} = ?")
+                parametros.append(valor)
+        for coluna, valor in (("cnpj_cpf", self.cnpj_cpf.strip()), ("atividade", self.atividade.strip())):
+            if valor:
+                condicoes.append(f"{coluna} >= ? AND {coluna} < ?")
+                parametros.extend([valor, valor + MAIOR_CARACTERE])
+        if not condicoes:
+            return "", []
+        return "WHERE " + " AND ".join(condicoes), parametros
+
+
+@dataclass(frozen=True)
+class PaginaHistorico:
+    """Uma página do histórico e o cursor da próxima (None na última página)."""
+
+    dados: pd.DataFrame
+    proximo_cursor: Optional[tuple]
+
+
+def buscar_calculos(filtros: Optional[FiltrosHistorico] = None, cursor: Optional[tuple] = None,
+                    tamanho_pagina: int = TAMANHO_PAGINA) -> PaginaHistorico:
+    """
+    Retorna uma página do histórico (mais recentes primeiro) com os filtros aplicados no SQL.
+    Para a página seguinte, passe como cursor o proximo_cursor da página atual.
+    """
+    where, parametros = (filtros or FiltrosHistorico()).clausula_where()
+    if cursor is not None:
+        # Keyset: só linhas que vêm depois do cursor na ordem (data_hora DESC, id DESC)
+        where = (where + " AND " if where else "WHERE ") + "(data_hora, id) < (?, ?)"
+        parametros = parametros + list(cursor)
+
+    sql = f"SELECT * FROM calculos {where} {ORDEM_HISTORICO} LIMIT ?"
+    with conexao() as conn:
+        # Uma linha a mais indica se existe próxima página
+        df = pd.read_sql_query(sql, conn, params=parametros + [tamanho_pagina + 1])
+
+    proximo_cursor = None
+    if len(df) > tamanho_pagina:
+        df = df.iloc[:tamanho_pagina]
+        ultima = df.iloc[-1]
+        proximo_cursor = (ultima["data_hora"], int(ultima["id"]))
+    return PaginaHistorico(df, proximo_cursor)
+
+
+# =============================
+# EXPORTAÇÃO DO HISTÓRICO
+# =============================
+# A exportação lê a tabela por um cursor, em blocos de TAMANHO_BLOCO_EXPORTACAO linhas,
+# e escreve cada bloco no destino antes de ler o próximo: a memória usada depende do
+# tamanho do bloco, não do tamanho do histórico.
+
+FORMATOS_EXPORTACAO = ("csv", "parquet")
+
+TAMANHO_BLOCO_EXPORTACAO = 10_000
+
+# Tipos das colunas de "calculos" no Parquet (fixos para que todos os blocos tenham o mesmo esquema)
+TIPOS_PARQUET = {
+    "id": "int64",
+    "data_hora": "string",
+    "municipio": "string",
+    "grupo": "string",
+    "atividade": "string",
+    "medida": "string",
+    "porte": "string",
+    "potencial_poluidor": "string",
+    "valor_total": "float64",
+    "cnpj_cpf": "string",
+    "cnaes": "string",
+}
+
+
+def iterar_calculos(filtros: Optional[FiltrosHistorico] = None, tamanho_bloco: int = TAMANHO_BLOCO_EXPORTACAO):
+    """Gera (colunas, linhas) em blocos de até tamanho_bloco linhas, na ordem do histórico."""
+    where, parametros = (filtros or FiltrosHistorico()).clausula_where()
+    sql = f"SELECT * FROM calculos {where} {ORDEM_HISTORICO}"
+    with conexao() as conn:
+        cursor = conn.execute(sql, parametros)
+        colunas = [descricao[0] for descricao in cursor.description]
+        try:
+            while True:
+                linhas = cursor.fetchmany(tamanho_bloco)
+                if not linhas:
+                    break
+                yield colunas, linhas
+        finally:
+            cursor.close()
+
+
+def _exportar_csv(destino, blocos):
+    texto = io.TextIOWrapper(destino, encoding="utf-8", newline="", write_through=True)
+    escritor = csv.writer(texto, lineterminator="\n")
+    total = 0
     try:
-        df = pd.read_sql_query("SELECT * FROM calculos ORDER BY id DESC", conn)
-        return df
-    except Exception:
-        return pd.DataFrame()
+        for numero, (colunas, linhas) in enumerate(blocos):
+            if numero == 0:
+                escritor.writerow(colunas)
+            escritor.writerows(linhas)
+            total += len(linhas)
+        if total == 0:
+            escritor.writerow(TIPOS_PARQUET.keys())
+        texto.flush()
     finally:
-        conn.close()
+        # Devolve o destino sem fechá-lo (quem abriu é quem fecha)
+        texto.detach()
+    return total
+
+
+def _exportar_parquet(destino, blocos):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise RuntimeError("Exportação em Parquet requer o pacote pyarrow.") from exc
+
+    esquema = pa.schema([(coluna, pa.type_for_alias(tipo)) for coluna, tipo in TIPOS_PARQUET.items()])
+    total = 0
+    with pq.ParquetWriter(destino, esquema, compression="zstd") as escritor:
+        for colunas, linhas in blocos:
+            valores = list(zip(*linhas))
+            arrays = [
+                pa.array(valores[colunas.index(campo.name)], type=campo.type) for campo in esquema
+            ]
+            escritor.write_table(pa.Table.from_arrays(arrays, schema=esquema))
+            total += len(linhas)
+    return total
+
+
+def exportar_calculos(destino, formato: str = "csv", filtros: Optional[FiltrosHistorico] = None,
+                      tamanho_bloco: int = TAMANHO_BLOCO_EXPORTACAO) -> int:
+    """
+    Exporta o histórico (com os filtros) para destino, um caminho ou arquivo binário aberto,
+    em CSV ou Parquet. Retorna o número de linhas exportadas.
+    """
+    if formato not in FORMATOS_EXPORTACAO:
+        raise ValueError(f"Formato de exportação inválido: {formato!r} (use {', '.join(FORMATOS_EXPORTACAO)})")
+
+    if isinstance(destino, (str, os.PathLike)):
+        with open(destino, "wb") as arquivo:
+            return exportar_calculos(arquivo, formato, filtros, tamanho_bloco)
+
+    blocos = iterar_calculos(filtros, tamanho_bloco)
+    if formato == "parquet":
+        return _exportar_parquet(destino, blocos)
+    return _exportar_csv(destino, blocos)
+
+
+# =============================
+# GRAVAÇÃO EM SEGUNDO PLANO (WRITE-BEHIND)
+# =============================
+# enfileirar_calculo só coloca o registro em uma fila em memória; uma thread grava
+# os registros em lotes, em uma transação por lote. Na saída do processo a fila é
+# descarregada no banco antes de fechar as conexões. Um lote que não pôde ser gravado
+# vai para um arquivo JSONL ao lado do banco (caminho_pendentes) e é regravado no banco
+# depois da próxima gravação bem-sucedida.
+
+# Máximo de registros aguardando gravação; com a fila cheia, o registro é gravado na hora
+TAMANHO_FILA = 10_000
+
+# Máximo de registros por transação
+TAMANHO_LOTE = 500
+
+# Tempo máximo (s) que um registro espera por outros antes de o lote ser gravado
+INTERVALO_LOTE = 0.5
+
+# Tentativas de gravação de um lote antes de desistir (com espera crescente entre elas)
+TENTATIVAS_GRAVACAO = 3
+
+# Espera máxima (s) pela fila quando o histórico é atualizado a pedido (botão do painel)
+TEMPO_MAXIMO_DESCARGA = 5.0
+
+_PARAR = object()
+
+
+def caminho_pendentes() -> str:
+    """Arquivo JSONL com os cálculos que não puderam ser gravados em DB_NAME."""
+    return os.path.splitext(DB_NAME)[0] + "_pendentes.jsonl"
+
+
+class GravadorCalculos:
+    """Fila limitada de registros de cálculo, gravada em lotes por uma thread em segundo plano."""
+
+    def __init__(self, tamanho_fila=TAMANHO_FILA, tamanho_lote=TAMANHO_LOTE, intervalo=INTERVALO_LOTE):
+        self.tamanho_fila = tamanho_fila
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self._trava = threading.Lock()
+        self._trava_pendentes = threading.Lock()
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self._pid = os.getpid()
+        self._fila = queue.Queue(maxsize=self.tamanho_fila)
+        self._thread = None
+        self.enfileirados = 0
+        self.gravados = 0
+        self.lotes = 0
+        self.falhas = 0
+        self.pendentes = 0
+        self.recuperados = 0
+        self.gravacoes_sincronas = 0
+        self.ultima_latencia = 0.0
+        self.latencia_total = 0.0
+        self.latencia_max = 0.0
+        self.ultimo_lote = 0
+
+    def _garantir_thread(self):
+        with self._trava:
+            if self._pid != os.getpid():
+                # Processo filho (fork): a thread do pai não existe aqui
+                self._reiniciar()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._executar, name="gravador-calculos", daemon=True)
+                self._thread.start()
+
+    def enfileirar(self, registro: tuple):
+        """Coloca um registro (na ordem de SQL_INSERIR_CALCULO) na fila de gravação."""
+        self._garantir_thread()
+        try:
+            self._fila.put_nowait(registro)
+        except queue.Full:
+            # Sem espaço na fila: grava na hora para não perder o registro
+            with self._trava:
+                self.gravacoes_sincronas += 1
+            self._gravar([registro])
+            return
+        with self._trava:
+            self.enfileirados += 1
+
+    def _executar(self):
+        parar = False
+        while not parar:
+            item = self._fila.get()
+            if item is _PARAR:
+                self._fila.task_done()
+                break
+            lote = [item]
+            limite = time.monotonic() + self.intervalo
+            while len(lote) < self.tamanho_lote:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    item = self._fila.get(timeout=restante)
+                except queue.Empty:
+                    break
+                if item is _PARAR:
+                    self._fila.task_done()
+                    parar = True
+                    break
+                lote.append(item)
+            try:
+                self._gravar(lote)
+            finally:
+                for _ in lote:
+                    self._fila.task_done()
+
+    def _gravar(self, lote: list):
+        inicio = time.perf_counter()
+        for tentativa in range(1, TENTATIVAS_GRAVACAO + 1):
+            try:
+                init_db()
+                with conexao() as conn, conn:
+                    conn.executemany(SQL_INSERIR_CALCULO, lote)
+                break
+            except sqlite3.Error:
+                if tentativa == TENTATIVAS_GRAVACAO:
+                    logger.exception("Falha ao gravar %d cálculo(s) no histórico", len(lote))
+                    self._guardar_pendentes(lote)
+                    return
+                time.sleep(0.1 * tentativa)
+
+        latencia = time.perf_counter() - inicio
+        with self._trava:
+            self.gravados += len(lote)
+            self.lotes += 1
+            self.ultimo_lote = len(lote)
+            self.ultima_latencia = latencia
+            self.latencia_total += latencia
+            self.latencia_max = max(self.latencia_max, latencia)
+
+        # O banco voltou a aceitar gravações: regrava o que ficou pendente
+        if os.path.exists(caminho_pendentes()):
+            self.recuperar_pendentes()
+
+    def _guardar_pendentes(self, lote: list):
+        """Acrescenta ao arquivo de pendentes um lote que não pôde ser gravado no banco."""
+        try:
+            with self._trava_pendentes, open(caminho_pendentes(), "a", encoding="utf-8") as arquivo:
+                for registro in lote:
+                    arquivo.write(json.dumps(dict(zip(COLUNAS_REGISTRO, registro)), ensure_ascii=False, default=float))
+                    arquivo.write("\n")
+        except (OSError, TypeError, ValueError):
+            with self._trava:
+                self.falhas += len(lote)
+            logger.exception("Falha ao guardar %d cálculo(s) em %s; eles foram perdidos", len(lote), caminho_pendentes())
+            return
+        with self._trava:
+            self.pendentes += len(lote)
+        logger.error("%d cálculo(s) guardado(s) em %s para nova gravação", len(lote), caminho_pendentes())
+
+    def recuperar_pendentes(self) -> int:
+        """Grava no banco os cálculos do arquivo de pendentes e apaga o arquivo. Retorna quantos foram gravados."""
+        caminho = caminho_pendentes()
+        with self._trava_pendentes:
+            if not os.path.exists(caminho):
+                return 0
+            # Renomear é atômico: só um processo fica com o arquivo
+            em_recuperacao = f"{caminho}.{os.getpid()}"
+            try:
+                os.replace(caminho, em_recuperacao)
+            except FileNotFoundError:
+                return 0
+            try:
+                with open(em_recuperacao, encoding="utf-8") as arquivo:
+                    registros = [
+                        tuple(json.loads(linha)[coluna] for coluna in COLUNAS_REGISTRO)
+                        for linha in arquivo if linha.strip()
+                    ]
+                init_db()
+                with conexao() as conn, conn:
+                    conn.executemany(SQL_INSERIR_CALCULO, registros)
+            except (sqlite3.Error, ValueError, KeyError):
+                # Devolve o arquivo (com o que chegou nesse meio-tempo) para a próxima tentativa
+                if os.path.exists(caminho):
+                    with open(caminho, encoding="utf-8") as novos, open(em_recuperacao, "a", encoding="utf-8") as destino:
+                        destino.write(novos.read())
+                os.replace(em_recuperacao, caminho)
+                logger.exception("Falha ao regravar os cálculos pendentes de %s", caminho)
+                return 0
+            os.remove(em_recuperacao)
+        with self._trava:
+            self.recuperados += len(registros)
+        logger.info("%d cálculo(s) pendente(s) regravado(s) no histórico", len(registros))
+        return len(registros)
+
+    def descarregar(self, timeout=None) -> bool:
+        """Espera até que todos os registros enfileirados tenham sido gravados."""
+        if self._pid != os.getpid():
+            return True
+        limite = None if timeout is None else time.monotonic() + timeout
+        with self._fila.all_tasks_done:
+            while self._fila.unfinished_tasks:
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    return False
+                self._fila.all_tasks_done.wait(restante)
+        return True
+
+    def parar(self, timeout=30):
+        """Grava o que estiver na fila e encerra a thread (chamado na saída do processo)."""
+        if self._pid != os.getpid() or self._thread is None or not self._thread.is_alive():
+            return
+        self._fila.put(_PARAR)
+        self._thread.join(timeout)
+
+    def metricas(self) -> dict:
+        """
+        Profundidade da fila, contadores e latência das gravações em lote. aguardando_gravacao
+        conta também o lote que está sendo gravado (ainda não aparece nas consultas).
+        """
+        with self._trava:
+            return {
+                "profundidade_fila": self._fila.qsize(),
+                "aguardando_gravacao": self._fila.unfinished_tasks,
+                "enfileirados": self.enfileirados,
+                "gravados": self.gravados,
+                "lotes": self.lotes,
+                "ultimo_lote": self.ultimo_lote,
+                "gravacoes_sincronas": self.gravacoes_sincronas,
+                "pendentes": self.pendentes,
+                "recuperados": self.recuperados,
+                "falhas": self.falhas,
+                "latencia_ultimo_lote_ms": self.ultima_latencia * 1000,
+                "latencia_media_lote_ms": self.latencia_total / self.lotes * 1000 if self.lotes else 0.0,
+                "latencia_max_lote_ms": self.latencia_max * 1000,
+            }
+
+
+_gravador = GravadorCalculos()
+atexit.register(_gravador.parar)
+
+
+@medido("enfileirar_calculo")
+def enfileirar_calculo(municipio, grupo, atividade, medida, porte, potencial, valor_total, cnpj_cpf="", cnaes=""):
+    """Como salvar_calculo, mas só enfileira o registro; a gravação acontece em segundo plano."""
+    data_hora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    _gravador.enfileirar(
+        (data_hora, municipio, grupo, atividade, medida, porte, potencial, valor_total, cnpj_cpf, cnaes)
+    )
+
+
+def descarregar_fila(timeout=None) -> bool:
+    """Espera a gravação dos cálculos enfileirados. Retorna False se o timeout acabar antes."""
+    return _gravador.descarregar(timeout)
+
+
+def recuperar_pendentes() -> int:
+    """Regrava no banco os cálculos guardados em caminho_pendentes(); retorna quantos foram gravados."""
+    return _gravador.recuperar_pendentes()
+
+
+def metricas_gravacao() -> dict:
+    """Métricas da fila de gravação em segundo plano."""
+    return _gravador.metricas()
+
+
+# =============================
+# TEMPOS POR ETAPA
+# =============================
+# As amostras do registro de tempos (motor_taxas.medicao) são gravadas periodicamente na
+# tabela tempos_etapas, depois que o app ou a API chamam iniciar_persistencia_tempos (com
+# DB_NAME já definido); importar este módulo não grava nada. O painel de desempenho lê
+# uma janela e calcula os percentis.
+
+# Amostras mais antigas que isso são apagadas
+RETENCAO_TEMPOS_DIAS = 30
+
+# Intervalo mínimo (s) entre duas limpezas das amostras fora da retenção, por banco
+INTERVALO_LIMPEZA_TEMPOS = 3600.0
+
+# Instante da última limpeza de tempos_etapas de cada banco
+_ultima_limpeza_tempos = {}
+
+
+def gravar_tempos(amostras: list):
+    """Grava uma lista de AmostraTempo e, a cada INTERVALO_LIMPEZA_TEMPOS, apaga as amostras fora da retenção."""
+    init_db()
+    agora = time.time()
+    limpar = agora - _ultima_limpeza_tempos.get(DB_NAME, 0.0) >= INTERVALO_LIMPEZA_TEMPOS
+    with conexao() as conn, conn:
+        conn.executemany(
+            "INSERT INTO tempos_etapas (instante, sessao, etapa, duracao_s) VALUES (?, ?, ?, ?)",
+            amostras,
+        )
+        if limpar:
+            conn.execute("DELETE FROM tempos_etapas WHERE instante < ?", (agora - RETENCAO_TEMPOS_DIAS * 86400,))
+    if limpar:
+        _ultima_limpeza_tempos[DB_NAME] = agora
+
+
+def iniciar_persistencia_tempos():
+    """Passa a gravar periodicamente as amostras de tempo em DB_NAME (pode ser chamada a cada execução)."""
+    registro_tempos().configurar_persistencia(gravar_tempos)
+
+
+def resumo_tempos(janela_segundos: float) -> pd.DataFrame:
+    """
+    Amostras e p50/p95/p99/máx (ms) de cada etapa na janela que termina agora, incluindo
+    as amostras ainda não gravadas.
+    """
+    registro_tempos().persistir()
+    init_db()
+    with conexao() as conn:
+        linhas = conn.execute(
+            "SELECT etapa, duracao_s FROM tempos_etapas WHERE instante >= ?",
+            (time.time() - janela_segundos,),
+        ).fetchall()
+    if not linhas:
+        return pd.DataFrame(columns=["etapa", "amostras", "p50_ms", "p95_ms", "p99_ms", "max_ms"])
+    etapas, duracoes = zip(*linhas)
+    return pd.DataFrame(percentis_por_etapa(etapas, duracoes))
+
+
+def metricas_tempos() -> dict:
+    """Contadores do registro de tempos do processo."""
+    return registro_tempos().metricas()
+
+
+# Sem persistência iniciada, parar não grava nada
+atexit.register(registro_tempos().parar)
@@ -0,0 +1,50 @@
+import argparse
+import sys
+from datetime import date
+
+import database
+
+# How to use:
+# Exporta o histórico de cálculos (historico_calculos.db) para CSV ou Parquet, lendo a
+# tabela em blocos; os filtros são os mesmos da aba ADMIN.
+# Example: python exportar_historico.py historico_2025.parquet --de 2025-01-01 --ate 2025-12-31
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta o histórico de cálculos em blocos.")
+    parser.add_argument("saida", help="arquivo de saída (.csv ou .parquet)")
+    parser.add_argument("--formato", choices=database.FORMATOS_EXPORTACAO, default=None,
+                        help="formato da saída (padrão: pela extensão)")
+    parser.add_argument("--banco", default=database.DB_NAME, help=f"banco SQLite (padrão: {database.DB_NAME})")
+    parser.add_argument("--tamanho-bloco", type=int, default=database.TAMANHO_BLOCO_EXPORTACAO,
+                        help=f"linhas lidas por bloco (padrão: {database.TAMANHO_BLOCO_EXPORTACAO})")
+    parser.add_argument("--de", type=date.fromisoformat, default=None, help="data inicial (AAAA-MM-DD)")
+    parser.add_argument("--ate", type=date.fromisoformat, default=None, help="data final (AAAA-MM-DD)")
+    parser.add_argument("--municipio", default="")
+    parser.add_argument("--cnpj-cpf", default="", help="prefixo do CNPJ/CPF")
+    parser.add_argument("--atividade", default="", help="prefixo da atividade")
+    parser.add_argument("--porte", default="")
+    args = parser.parse_args(argv)
+
+    formato = args.formato or ("parquet" if args.saida.lower().endswith(".parquet") else "csv")
+    database.DB_NAME = args.banco
+    filtros = database.FiltrosHistorico(
+        data_inicio=args.de,
+        data_fim=args.ate,
+        municipio=args.municipio,
+        cnpj_cpf=args.cnpj_cpf,
+        atividade=args.atividade,
+        porte=args.porte,
+    )
+
+    try:
+        total = database.exportar_calculos(args.saida, formato, filtros, args.tamanho_bloco)
+    except (RuntimeError, ValueError) as exc:
+        print(f"Erro: {exc}", file=sys.stderr)
+        return 1
+    print(f"{total:,} cálculo(s) exportado(s) para {args.saida} ({formato.upper()})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
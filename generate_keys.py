@@ -1,9 +1,39 @@
+import argparse
+import csv
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
 import streamlit_authenticator as stauth
-import sys
+import yaml
+from yaml.loader import SafeLoader
 
 # How to use:
 # Run this script with the passwords you want to hash as arguments.
 # Example: python generate_keys.py mypassword123 anotherpassword456
+#
+# Cadastro em lote: lê um CSV com as colunas username,name,email,password, gera os hashes
+# em paralelo (um processo por núcleo) e grava os usuários novos no config.yaml, mantendo
+# os existentes. Usuários que já existem no config.yaml não são alterados.
+# Example: python generate_keys.py --csv usuarios.csv --config config.yaml
+#
+# Tempo do bcrypt por custo, para escolher o --custo com base em medição:
+# Example: python generate_keys.py --benchmark 10 11 12 13 14
+
+# Custo padrão do bcrypt (o mesmo do streamlit-authenticator: 2^12 iterações)
+CUSTO_PADRAO = 12
+
+COLUNAS_CSV = ["username", "name", "email", "password"]
+
+# Custos medidos por --benchmark sem argumentos
+CUSTOS_BENCHMARK = [10, 11, 12, 13, 14]
+
+# Tempo mínimo (s) de medição por custo no --benchmark
+TEMPO_MINIMO_BENCHMARK = 2.0
+
 
 def generate_hashes(passwords):
     print("\n🔐 Generating Password Hashes\n" + "="*30)
@@ -18,13 +48,178 @@ def generate_hashes(passwords):
         except Exception as e:
             print(f"Error hashing '{password}': {e}")
 
-if __name__ == "__main__":
-    if len(sys.argv) > 1:
-        passwords_to_hash = sys.argv[1:]
+
+# =============================
+# CADASTRO EM LOTE
+# =============================
+
+def gerar_hash(senha: str, custo: int = CUSTO_PADRAO) -> str:
+    """Hash bcrypt no formato do streamlit-authenticator ($2b$...)."""
+    return bcrypt.hashpw(senha.encode(), bcrypt.gensalt(rounds=custo)).decode()
+
+
+def _gerar_hash_tarefa(tarefa: tuple) -> str:
+    return gerar_hash(*tarefa)
+
+
+def gerar_hashes_em_paralelo(senhas: list, custo: int = CUSTO_PADRAO, processos=None) -> list:
+    """Hashes das senhas, na mesma ordem, calculados em processos separados (um por núcleo)."""
+    processos = min(processos or os.cpu_count() or 1, max(len(senhas), 1))
+    if processos == 1:
+        return [gerar_hash(senha, custo) for senha in senhas]
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        return list(executor.map(_gerar_hash_tarefa, [(senha, custo) for senha in senhas]))
+
+
+def ler_usuarios_csv(caminho: str) -> list:
+    """Usuários do CSV (username, name, email, password), com o username em minúsculas como no login."""
+    with open(caminho, newline="", encoding="utf-8-sig") as arquivo:
+        leitor = csv.DictReader(arquivo)
+        faltando = [coluna for coluna in COLUNAS_CSV if coluna not in (leitor.fieldnames or [])]
+        if faltando:
+            raise ValueError(f"{caminho}: faltam as colunas {', '.join(faltando)}")
+        usuarios, vistos = [], set()
+        for numero, linha in enumerate(leitor, start=2):
+            usuario = {coluna: (linha[coluna] or "").strip() for coluna in COLUNAS_CSV}
+            if not any(usuario.values()):
+                continue
+            usuario["username"] = usuario["username"].lower()
+            if not usuario["username"] or not usuario["password"]:
+                raise ValueError(f"{caminho}, linha {numero}: username e password são obrigatórios")
+            if usuario["username"] in vistos:
+                raise ValueError(f"{caminho}, linha {numero}: username '{usuario['username']}' repetido")
+            vistos.add(usuario["username"])
+            usuarios.append(usuario)
+    return usuarios
+
+
+def gravar_config_atomicamente(caminho: str, config: dict):
+    """Grava o config.yaml num temporário da mesma pasta e troca de uma vez (o app nunca lê pela metade)."""
+    pasta = os.path.dirname(os.path.abspath(caminho))
+    descritor, temporario = tempfile.mkstemp(prefix=".config_", suffix=".tmp", dir=pasta)
+    try:
+        with os.fdopen(descritor, "w", encoding="utf-8") as arquivo:
+            yaml.safe_dump(config, arquivo, sort_keys=False, allow_unicode=True)
+        if os.path.exists(caminho):
+            os.chmod(temporario, os.stat(caminho).st_mode)
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def cadastrar_em_lote(caminho_csv: str, caminho_config: str, custo: int = CUSTO_PADRAO, processos=None) -> dict:
+    """Acrescenta ao config.yaml os usuários do CSV que ainda não existem; devolve os totais."""
+    usuarios = ler_usuarios_csv(caminho_csv)
+    with open(caminho_config) as arquivo:
+        config = yaml.load(arquivo, Loader=SafeLoader) or {}
+    credenciais = config.get("credentials") or {}
+    existentes = credenciais.get("usernames") or {}
+    credenciais["usernames"] = existentes
+    config["credentials"] = credenciais
+    ja_cadastrados = {nome.lower() for nome in existentes}
+
+    novos = [usuario for usuario in usuarios if usuario["username"] not in ja_cadastrados]
+    # Senhas que já vêm em hash no CSV são gravadas como estão
+    a_calcular = [usuario for usuario in novos if not stauth.Hasher.is_hash(usuario["password"])]
+
+    inicio = time.perf_counter()
+    hashes = gerar_hashes_em_paralelo([usuario["password"] for usuario in a_calcular], custo, processos)
+    tempo_hash = time.perf_counter() - inicio
+    for usuario, hash_senha in zip(a_calcular, hashes):
+        usuario["password"] = hash_senha
+
+    for usuario in novos:
+        existentes[usuario["username"]] = {
+            "email": usuario["email"],
+            "name": usuario["name"],
+            "password": usuario["password"],
+            "failed_login_attempts": 0,
+            "logged_in": False,
+        }
+    if novos:
+        gravar_config_atomicamente(caminho_config, config)
+    return {
+        "no_csv": len(usuarios),
+        "cadastrados": len(novos),
+        "ignorados": [usuario["username"] for usuario in usuarios if usuario["username"] in ja_cadastrados],
+        "hashes": len(a_calcular),
+        "tempo_hash": tempo_hash,
+    }
+
+
+# =============================
+# BENCHMARK DO CUSTO DO BCRYPT
+# =============================
+
+def medir_custos(custos: list, tempo_minimo: float = TEMPO_MINIMO_BENCHMARK) -> list:
+    """Tempo de um hash (e de uma conferência de senha no login) para cada custo do bcrypt."""
+    resultados = []
+    for custo in custos:
+        tempos = []
+        inicio = time.perf_counter()
+        while len(tempos) < 3 or (time.perf_counter() - inicio < tempo_minimo and len(tempos) < 50):
+            comeco = time.perf_counter()
+            hash_senha = gerar_hash("senha-de-benchmark", custo)
+            tempos.append(time.perf_counter() - comeco)
+        comeco = time.perf_counter()
+        bcrypt.checkpw(b"senha-de-benchmark", hash_senha.encode())
+        resultados.append({
+            "custo": custo,
+            "amostras": len(tempos),
+            "hash_ms": statistics.median(tempos) * 1000,
+            "conferencia_ms": (time.perf_counter() - comeco) * 1000,
+        })
+    return resultados
+
+
+def imprimir_benchmark(custos: list):
+    nucleos = os.cpu_count() or 1
+    print(f"\n⏱️  bcrypt por custo ({nucleos} núcleo(s); o login confere a senha com o mesmo custo)\n" + "=" * 30)
+    print(f"{'custo':>5} {'amostras':>9} {'hash (ms)':>10} {'login (ms)':>11} {'hashes/s':>9} {'100 usuários':>13}")
+    for r in medir_custos(custos):
+        por_segundo = 1000 / r["hash_ms"]
+        lote = 100 / (por_segundo * nucleos)
+        print(f"{r['custo']:>5} {r['amostras']:>9} {r['hash_ms']:>10.1f} {r['conferencia_ms']:>11.1f} "
+              f"{por_segundo:>9.1f} {lote:>12.1f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera hashes de senha e cadastra usuários no config.yaml.")
+    parser.add_argument("passwords", nargs="*", help="senhas para gerar e imprimir o hash (modo original)")
+    parser.add_argument("--csv", help="CSV com username,name,email,password para cadastrar em lote")
+    parser.add_argument("--config", default="config.yaml", help="config.yaml do app (padrão: config.yaml)")
+    parser.add_argument("--custo", type=int, default=CUSTO_PADRAO,
+                        help=f"custo do bcrypt no cadastro em lote (padrão: {CUSTO_PADRAO})")
+    parser.add_argument("--processos", type=int, default=None,
+                        help="processos para gerar os hashes (padrão: número de núcleos)")
+    parser.add_argument("--benchmark", type=int, nargs="*", metavar="CUSTO",
+                        help=f"mede o tempo do bcrypt por custo (padrão: {' '.join(map(str, CUSTOS_BENCHMARK))})")
+    args = parser.parse_args(argv)
+
+    if args.benchmark is not None:
+        imprimir_benchmark(args.benchmark or CUSTOS_BENCHMARK)
+        return
+
+    if args.csv:
+        resumo = cadastrar_em_lote(args.csv, args.config, args.custo, args.processos)
+        print(f"\n👥 {resumo['cadastrados']} de {resumo['no_csv']} usuário(s) do CSV cadastrado(s) em {args.config}")
+        print(f"   {resumo['hashes']} hash(es) bcrypt (custo {args.custo}) em {resumo['tempo_hash']:.2f}s")
+        if resumo["ignorados"]:
+            print(f"   Já existiam e não foram alterados: {', '.join(resumo['ignorados'])}")
+        return
+
+    if args.passwords:
+        passwords_to_hash = args.passwords
     else:
         # Default if no arguments provided
         print("No passwords provided. Using default '123456' for demonstration.")
         passwords_to_hash = ['123456']
-    
+
     generate_hashes(passwords_to_hash)
     print("\n📋 Copy the hash above and paste it into your config.yaml file under 'password'.")
+
+
+if __name__ == "__main__":
+    main()
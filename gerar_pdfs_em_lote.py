@@ -0,0 +1,47 @@
+import argparse
+import sys
+
+from motor_taxas.arquivo import FORMATOS
+from motor_taxas.pdf_lote import TAMANHO_BLOCO_PDF, gerar_pdfs_em_lote
+
+# How to use:
+# Gera um PDF de resumo por linha de um CSV/JSONL (CNPJ, MUNICIPIO, ITEM, MEDIDA e,
+# opcionalmente, CNAES separados por ';') e grava todos em um único ZIP.
+# Example: python gerar_pdfs_em_lote.py campanha.csv resumos.zip --processos 4
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera PDFs de cotação em lote, em paralelo, dentro de um ZIP.")
+    parser.add_argument("entrada", help="arquivo CSV ou JSONL de entrada")
+    parser.add_argument("saida", help="arquivo ZIP de saída")
+    parser.add_argument("--processos", type=int, default=None,
+                        help="número de processos (padrão: número de núcleos)")
+    parser.add_argument("--tamanho-bloco", type=int, default=TAMANHO_BLOCO_PDF,
+                        help=f"linhas por bloco (padrão: {TAMANHO_BLOCO_PDF})")
+    parser.add_argument("--formato-entrada", choices=FORMATOS, default=None,
+                        help="formato da entrada (padrão: pela extensão)")
+    parser.add_argument("--coluna-municipio", default="MUNICIPIO")
+    parser.add_argument("--coluna-item", default="ITEM")
+    parser.add_argument("--coluna-medida", default="MEDIDA")
+    args = parser.parse_args(argv)
+
+    def mostrar_progresso(estatisticas):
+        print(f"\r{estatisticas.linhas:,} linhas | {estatisticas.pdfs:,} PDFs "
+              f"({estatisticas.pdfs_por_segundo:,.1f} PDFs/s)", end="", file=sys.stderr, flush=True)
+
+    estatisticas = gerar_pdfs_em_lote(
+        args.entrada,
+        args.saida,
+        processos=args.processos,
+        tamanho_bloco=args.tamanho_bloco,
+        formato_entrada=args.formato_entrada,
+        colunas=(args.coluna_municipio, args.coluna_item, args.coluna_medida),
+        ao_progredir=mostrar_progresso,
+    )
+    print(file=sys.stderr)
+    print(estatisticas.relatorio())
+    print(f"PDFs salvos em: {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,34 @@
+import argparse
+import os
+import time
+from typing import Optional
+
+import numpy as np
 import pandas as pd
-import unicodedata
 import re
-import math
+
+from motor_taxas.normalizacao import strip_accents
+
+# How to use:
+# Converte as faixas de porte do ANEXO I ("até2", "de2,0001até 10", "acimade60", ...)
+# em colunas numéricas PORTE_*_MIN / PORTE_*_MAX.
+# Example: python limpar_portes.py
+#          python limpar_portes.py SEMA_ANEXO_I_full.csv outro_anexo.csv
 
 # Updated to use the uploaded filename or your original one
 INPUT_PATH = "SEMA_ANEXO_I_full.csv" 
 OUTPUT_PATH = "ANEXO_I_cleaned_with_portes.csv"
 
+# Sufixo do arquivo de saída quando a entrada não é a padrão
+SUFIXO_SAIDA = "_cleaned_with_portes.csv"
 
-def strip_accents(s: str) -> str:
-    """Remove acentos: 'Até' -> 'Ate'."""
-    return "".join(
-        c for c in unicodedata.normalize("NFD", s)
-        if unicodedata.category(c) != "Mn"
-    )
+PORTE_COLS = [
+    "PORTE_MINIMO",
+    "PORTE_PEQUENO",
+    "PORTE_MEDIO",
+    "PORTE_GRANDE",
+    "PORTE_EXCEPCIONAL",
+]
 
 
 def parse_interval_to_min_max(text: str) -> tuple[float | None, float | None]:
@@ -87,38 +102,141 @@ def parse_interval_to_min_max(text: str) -> tuple[float | None, float | None]:
     return (None, None)
 
 
-def main():
-    # Read the CSV (force dtype=str to handle "2,0001" correctly)
-    df = pd.read_csv(INPUT_PATH, dtype=str)
+# =============================
+# VERSÃO VETORIZADA
+# =============================
+# Mesmas regras de parse_interval_to_min_max, aplicadas com os métodos .str do pandas
+# sobre os textos distintos. As faixas se repetem muito entre as linhas ("até2",
+# "acimade60", ...): cada texto é convertido uma única vez e guardado em MemoIntervalos,
+# compartilhada entre as colunas e os arquivos de uma mesma execução.
+
+_NUMERO = r"\d+(?:\.\d+)?"
+# Primeiro e segundo números, como re.findall(_NUMERO, t)[0] e [1]
+_PRIMEIRO_NUMERO = rf"^\D*({_NUMERO})"
+_SEGUNDO_NUMERO = rf"^\D*(?>{_NUMERO})\D*({_NUMERO})"
+_DE_ATE = rf"^de({_NUMERO})(?:ate|a)({_NUMERO})"
 
-    porte_cols = [
-        "PORTE_MINIMO",
-        "PORTE_PEQUENO",
-        "PORTE_MEDIO",
-        "PORTE_GRANDE",
-        "PORTE_EXCEPCIONAL",
+
+def parsear_intervalos(textos) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Versão vetorizada de parse_interval_to_min_max: devolve os arrays (min, max),
+    com NaN onde a função devolve None.
+    """
+    textos = pd.Series(np.asarray(textos, dtype=object), dtype=object)
+    minimos = np.full(len(textos), np.nan)
+    maximos = np.full(len(textos), np.nan)
+    e_texto = textos.map(lambda v: isinstance(v, str)).to_numpy(dtype=bool)
+    if not e_texto.any():
+        return minimos, maximos
+
+    texto = textos[e_texto].str.strip()
+    vazio = ((texto == "") | (texto == "-")).to_numpy()
+    t = (
+        texto.map(strip_accents).str.lower()
+        .str.replace(" ", "", regex=False)
+        .str.replace(".", "", regex=False)
+        .str.replace(",", ".", regex=False)
+    )
+    primeiro = t.str.extract(_PRIMEIRO_NUMERO)[0].astype(float).to_numpy()
+    segundo = t.str.extract(_SEGUNDO_NUMERO)[0].astype(float).to_numpy()
+    de_ate = t.str.extract(_DE_ATE).astype(float).to_numpy()
+    tem_primeiro = ~np.isnan(primeiro)
+
+    condicoes = [
+        vazio,
+        t.str.startswith("ate").to_numpy(dtype=bool),
+        t.str.startswith("de").to_numpy(dtype=bool) & ~np.isnan(de_ate[:, 0]),
+        t.str.startswith("acima").to_numpy(dtype=bool),
+        ~np.isnan(segundo),
+        tem_primeiro,
     ]
+    minimos[e_texto] = np.select(
+        condicoes, [np.nan, np.where(tem_primeiro, 0.0, np.nan), de_ate[:, 0], primeiro, primeiro, 0.0],
+        default=np.nan,
+    )
+    maximos[e_texto] = np.select(
+        condicoes, [np.nan, primeiro, de_ate[:, 1], np.nan, segundo, primeiro], default=np.nan,
+    )
+    return minimos, maximos
 
-    df_clean = df.copy()
 
-    for col in porte_cols:
-        mins = []
-        maxs = []
-        for val in df_clean[col]:
-            lo, hi = parse_interval_to_min_max(val)
-            mins.append(lo)
-            maxs.append(hi)
-        df_clean[f"{col}_MIN"] = mins
-        df_clean[f"{col}_MAX"] = maxs
+class MemoIntervalos:
+    """Tabela texto bruto -> (min, max) dos textos de porte já convertidos."""
+
+    def __init__(self):
+        self.intervalos_por_texto = {}
+
+    def __len__(self) -> int:
+        return len(self.intervalos_por_texto)
+
+    def intervalos(self, valores: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+        """(min, max) de cada valor; só os textos ainda não vistos são convertidos."""
+        codigos, unicos = pd.factorize(valores)  # células vazias (NaN) ficam com código -1
+        unicos = list(unicos)
+        novos = [texto for texto in unicos if texto not in self.intervalos_por_texto]
+        if novos:
+            minimos, maximos = parsear_intervalos(novos)
+            self.intervalos_por_texto.update(zip(novos, zip(minimos, maximos)))
+        # Última linha da tabela: (NaN, NaN), para o código -1
+        tabela = np.array([self.intervalos_por_texto[texto] for texto in unicos] + [(np.nan, np.nan)])
+        return tabela[codigos, 0], tabela[codigos, 1]
+
+
+def limpar_portes(df: pd.DataFrame, memo: Optional[MemoIntervalos] = None) -> pd.DataFrame:
+    """Cópia do ANEXO I com as colunas PORTE_*_MIN / PORTE_*_MAX (NaN = sem limite)."""
+    memo = memo if memo is not None else MemoIntervalos()
+    df_clean = df.copy()
+    for col in PORTE_COLS:
+        df_clean[f"{col}_MIN"], df_clean[f"{col}_MAX"] = memo.intervalos(df_clean[col])
 
     # Garante que todos *_MIN / *_MAX são numéricos (NaN quando não houver)
     for col in [c for c in df_clean.columns if c.endswith("_MIN") or c.endswith("_MAX")]:
         df_clean[col] = pd.to_numeric(df_clean[col], errors="coerce")
-
-    # Save using Brazilian format (sep=; decimal=,) so Excel opens it correctly
-    df_clean.to_csv(OUTPUT_PATH, index=False, sep=';', decimal=',')
-    print(f"Arquivo limpo salvo em: {OUTPUT_PATH}")
+    return df_clean
+
+
+def caminho_saida(entrada: str) -> str:
+    """Arquivo de saída de cada entrada (o padrão continua em OUTPUT_PATH)."""
+    if entrada == INPUT_PATH:
+        return OUTPUT_PATH
+    return os.path.splitext(entrada)[0] + SUFIXO_SAIDA
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Converte as faixas de porte do ANEXO I em colunas numéricas.")
+    parser.add_argument("entradas", nargs="*", default=[INPUT_PATH],
+                        help=f"CSVs do ANEXO I (padrão: {INPUT_PATH})")
+    parser.add_argument("-o", "--saida", default=None,
+                        help="arquivo de saída (só com uma entrada; padrão: <entrada>" + SUFIXO_SAIDA + ")")
+    args = parser.parse_args(argv)
+    if args.saida and len(args.entradas) > 1:
+        parser.error("--saida só pode ser usado com uma entrada")
+
+    memo = MemoIntervalos()
+    tempos = []
+    for entrada in args.entradas:
+        saida = args.saida or caminho_saida(entrada)
+
+        inicio = time.perf_counter()
+        # Read the CSV (force dtype=str to handle "2,0001" correctly)
+        df = pd.read_csv(entrada, dtype=str)
+        leitura = time.perf_counter()
+        df_clean = limpar_portes(df, memo)
+        conversao = time.perf_counter()
+        # Save using Brazilian format (sep=; decimal=,) so Excel opens it correctly
+        df_clean.to_csv(saida, index=False, sep=';', decimal=',')
+        gravacao = time.perf_counter()
+
+        tempos.append((entrada, len(df), leitura - inicio, conversao - leitura, gravacao - conversao))
+        print(f"Arquivo limpo salvo em: {saida}")
+
+    print(f"\n{'arquivo':40s} {'linhas':>9s} {'leitura':>9s} {'portes':>9s} {'gravação':>9s}")
+    for entrada, linhas, *etapas in tempos:
+        print(f"{entrada[-40:]:40s} {linhas:9,d} " + " ".join(f"{t * 1000:7.1f}ms" for t in etapas))
+    totais = [sum(t[i] for t in tempos) for i in range(2, 5)]
+    print(f"{'total':40s} {sum(t[1] for t in tempos):9,d} " + " ".join(f"{t * 1000:7.1f}ms" for t in totais))
+    print(f"Textos de porte distintos convertidos: {len(memo)}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,91 @@
+"""
+Motor de cálculo das taxas de licenciamento ambiental, sem dependência do Streamlit.
+
+Exemplo:
+    from motor_taxas import cotar
+    cotacao = cotar("Ariquemes - RO", "1.1", 15.0)
+
+Os nomes abaixo são importados do submódulo só no primeiro acesso (PEP 562): importar
+motor_taxas, ou um submódulo leve como motor_taxas.medicao, não carrega pandas nem as
+tabelas. Assim a tela de login do app não espera pelo motor.
+"""
+import importlib
+
+# Submódulo de onde vem cada nome público do pacote
+_EXPORTACOES = {
+    "artefato": (
+        "ARTEFATO_PATH", "VERSAO_ARTEFATO", "TabelasReferencia", "assinatura_fontes",
+        "carregar_tabelas_referencia",
+    ),
+    "arvore": (
+        "ArvoreAtividades", "AtividadeAnexo", "GrupoAtividades",
+    ),
+    "cache": (
+        "TAMANHO_CACHE_COTACOES", "CacheCotacoes", "cache_cotacoes", "metricas_cache_cotacoes",
+    ),
+    "calculo": (
+        "ANEXO_PADRAO", "ERRO_ITEM_NAO_ENCONTRADO", "ERRO_JURISDICAO_SEM_TABELA",
+        "ERRO_MUNICIPIO_DESCONHECIDO", "ERRO_PORTE_NAO_DEFINIDO", "ERRO_TAXA_NAO_ENCONTRADA",
+        "MAPA_PORTE_TABELA_PARA_APP", "MAPEAMENTO_PORTES_TABELA", "MUNICIPIOS_CONFIG", "SERVICOS",
+        "TIPO_LICENCA_COLUNA", "Cotacao", "ValorLicenca", "calcular_taxa", "obter_taxa_ufar",
+        "potencial_e_anexo_da_linha", "texto_da_linha",
+    ),
+    "cnae": (
+        "TOP_K_CNAE", "IndiceCNAE", "ResultadoCNAE",
+    ),
+    "indice": (
+        "COLUNAS_TAXAS", "COLUNAS_TAXAS_UNIDADES", "UNIDADES_TAXA", "IndiceTaxas",
+        "IndiceTaxasJurisdicoes", "TaxasUFAR", "normalizar_anexo", "normalizar_chave_taxa",
+        "normalizar_jurisdicao",
+    ),
+    "lote": (
+        "COLUNAS_RESULTADO", "cotar_lote",
+    ),
+    "medicao": (
+        "AmostraTempo", "RegistroTempos", "definir_sessao", "medido", "medir",
+        "percentis_por_etapa", "registro_tempos",
+    ),
+    "motor": (
+        "MotorTaxas", "cotar", "obter_motor",
+    ),
+    "normalizacao": (
+        "inferir_tipo_medicao_por_unidade", "normalizar_potencial_poluidor",
+        "normalizar_texto_busca", "strip_accents",
+    ),
+    "porte": (
+        "NOMES_PORTE", "PORTE_NAO_DEFINIDO", "SPANS_PORTE", "MatrizPortes",
+        "classificar_porte_por_linha_valor", "rotular_portes",
+    ),
+    "sugestao": (
+        "CANDIDATOS_POR_CNAE", "SugestaoAtividade", "SugestoesCNAE",
+    ),
+    "tabelas": (
+        "ATIVIDADES_CSV_PATH", "CNAE_CSV_PATH", "CURADORIA_CNAE_CSV_PATH", "PADRAO_ARQUIVO_TAXAS",
+        "TABELAS_TAXAS_JURISDICOES", "TAXAS_CSV_PATH", "arquivos_taxas_jurisdicoes",
+        "carregar_atividades_anexo_i", "carregar_cnaes", "carregar_curadoria_cnae",
+        "carregar_tabelas_taxas", "carregar_taxas_jurisdicoes", "colunas_por_unidade",
+    ),
+}
+
+_ORIGEM = {nome: modulo for modulo, nomes in _EXPORTACOES.items() for nome in nomes}
+
+# Submódulos acessíveis como atributo (motor_taxas.artefato) mesmo antes de importados
+_SUBMODULOS = set(_EXPORTACOES) | {"arquivo", "pdf"}
+
+__all__ = sorted(_ORIGEM)
+
+
+def __getattr__(nome: str):
+    if nome in _SUBMODULOS:
+        return importlib.import_module(f".{nome}", __name__)
+    modulo = _ORIGEM.get(nome)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+    valor = getattr(importlib.import_module(f".{modulo}", __name__), nome)
+    # Próximos acessos não passam mais por aqui
+    globals()[nome] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,169 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional
+
+import pandas as pd
+
+from .motor import MotorTaxas
+from .tabelas import ATIVIDADES_CSV_PATH, TAXAS_CSV_PATH
+
+# =============================
+# COTAÇÃO DE ARQUIVOS GRANDES (CSV / JSONL)
+# =============================
+
+FORMATOS = ("csv", "jsonl")
+
+# Linhas por bloco enviado a cada processo
+TAMANHO_BLOCO_PADRAO = 50_000
+
+
+def detectar_formato(caminho: str) -> str:
+    """Formato do arquivo pela extensão (.jsonl/.ndjson => jsonl, demais => csv)."""
+    return "jsonl" if caminho.lower().endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def ler_blocos(caminho: str, tamanho_bloco: int = TAMANHO_BLOCO_PADRAO,
+               formato: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """
+    Lê o arquivo em blocos de até tamanho_bloco linhas, sem carregá-lo inteiro.
+    Todas as colunas chegam como texto, para não transformar o ITEM "3.10" em 3.1.
+    """
+    formato = formato or detectar_formato(caminho)
+    if formato == "jsonl":
+        leitor = pd.read_json(caminho, lines=True, chunksize=tamanho_bloco, dtype=False)
+        for bloco in leitor:
+            yield bloco.astype(str).where(bloco.notna())
+    else:
+        yield from pd.read_csv(caminho, dtype=str, chunksize=tamanho_bloco)
+
+
+def serializar_bloco(df: pd.DataFrame, formato: str, cabecalho: bool) -> str:
+    """Converte um bloco de resultado em texto CSV ou JSONL."""
+    if formato == "jsonl":
+        return df.to_json(orient="records", lines=True, force_ascii=False)
+    return df.to_csv(index=False, header=cabecalho)
+
+
+def mapear_em_ordem(executor: Executor, funcao: Callable, tarefas: Iterable,
+                    max_pendentes: int) -> Iterator:
+    """
+    Aplica funcao às tarefas no executor e devolve os resultados na ordem de entrada.
+    No máximo max_pendentes tarefas ficam em andamento, de modo que a memória não
+    cresce com o tamanho da entrada.
+    """
+    pendentes = deque()
+    for tarefa in tarefas:
+        pendentes.append(executor.submit(funcao, tarefa))
+        if len(pendentes) >= max_pendentes:
+            yield pendentes.popleft().result()
+    while pendentes:
+        yield pendentes.popleft().result()
+
+
+# Motor do processo de trabalho, carregado uma única vez por processo em iniciar_processo
+_motor_do_processo: Optional[MotorTaxas] = None
+
+
+def iniciar_processo(caminho_atividades: str, caminho_taxas: str):
+    """Inicializador do pool: carrega as tabelas uma única vez no processo de trabalho."""
+    global _motor_do_processo
+    _motor_do_processo = MotorTaxas.carregar(caminho_atividades, caminho_taxas)
+
+
+def motor_do_processo() -> MotorTaxas:
+    """Motor carregado por iniciar_processo no processo atual."""
+    return _motor_do_processo
+
+
+def _cotar_bloco(tarefa: tuple) -> tuple[str, int, float, float]:
+    """Cota e serializa um bloco dentro do processo de trabalho."""
+    bloco, formato, cabecalho, colunas = tarefa
+    inicio = time.perf_counter()
+    resultado = motor_do_processo().cotar_lote(bloco, *colunas)
+    meio = time.perf_counter()
+    texto = serializar_bloco(resultado, formato, cabecalho)
+    return texto, len(bloco), meio - inicio, time.perf_counter() - meio
+
+
+class EstatisticasArquivo:
+    """Tempos por etapa e vazão de uma execução de cotar_arquivo."""
+
+    def __init__(self):
+        self.linhas = 0
+        self.blocos = 0
+        self.leitura = 0.0
+        self.cotacao = 0.0
+        self.serializacao = 0.0
+        self.escrita = 0.0
+        self.total = 0.0
+
+    @property
+    def linhas_por_segundo(self) -> float:
+        return self.linhas / self.total if self.total else 0.0
+
+    def relatorio(self) -> str:
+        """Resumo legível. Cotação e serialização somam o tempo de todos os processos."""
+        return "\n".join([
+            f"Linhas: {self.linhas:,} em {self.blocos} bloco(s)",
+            f"Tempo total:           {self.total:9.3f} s  ({self.linhas_por_segundo:,.0f} linhas/s)",
+            f"Leitura (principal):   {self.leitura:9.3f} s",
+            f"Cotação (processos):   {self.cotacao:9.3f} s",
+            f"Serialização (proc.):  {self.serializacao:9.3f} s",
+            f"Escrita (principal):   {self.escrita:9.3f} s",
+        ])
+
+
+def cotar_arquivo(entrada: str, saida: str,
+                  processos: Optional[int] = None,
+                  tamanho_bloco: int = TAMANHO_BLOCO_PADRAO,
+                  formato_entrada: Optional[str] = None,
+                  formato_saida: Optional[str] = None,
+                  colunas: tuple[str, ...] = ("MUNICIPIO", "ITEM", "MEDIDA", "CNAE"),
+                  caminho_atividades: str = ATIVIDADES_CSV_PATH,
+                  caminho_taxas: str = TAXAS_CSV_PATH,
+                  ao_progredir: Optional[Callable[[EstatisticasArquivo], None]] = None) -> EstatisticasArquivo:
+    """
+    Cota um arquivo CSV/JSONL de qualquer tamanho, em blocos distribuídos por vários processos.
+
+    Cada processo carrega o ANEXO I e a tabela de taxas uma única vez. Os resultados
+    são gravados à medida que ficam prontos, na ordem da entrada. colunas indica os
+    nomes das colunas de município, ITEM, medida e (opcional) CNAE.
+    """
+    formato_saida = formato_saida or detectar_formato(saida)
+    processos = processos or os.cpu_count() or 1
+    estatisticas = EstatisticasArquivo()
+    inicio_total = time.perf_counter()
+
+    def tarefas():
+        leitor = ler_blocos(entrada, tamanho_bloco, formato_entrada)
+        while True:
+            inicio = time.perf_counter()
+            bloco = next(leitor, None)
+            estatisticas.leitura += time.perf_counter() - inicio
+            if bloco is None:
+                return
+            yield bloco, formato_saida, estatisticas.blocos == 0, colunas
+            estatisticas.blocos += 1
+
+    with ProcessPoolExecutor(
+        max_workers=processos,
+        initializer=iniciar_processo,
+        initargs=(caminho_atividades, caminho_taxas),
+    ) as executor, open(saida, "w", encoding="utf-8", newline="") as arquivo_saida:
+        for texto, linhas, t_cotacao, t_serializacao in mapear_em_ordem(
+            executor, _cotar_bloco, tarefas(), max_pendentes=2 * processos
+        ):
+            inicio = time.perf_counter()
+            arquivo_saida.write(texto)
+            estatisticas.escrita += time.perf_counter() - inicio
+            estatisticas.linhas += linhas
+            estatisticas.cotacao += t_cotacao
+            estatisticas.serializacao += t_serializacao
+            estatisticas.total = time.perf_counter() - inicio_total
+            if ao_progredir:
+                ao_progredir(estatisticas)
+
+    estatisticas.total = time.perf_counter() - inicio_total
+    return estatisticas
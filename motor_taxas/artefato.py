@@ -0,0 +1,162 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import NamedTuple, Optional
+
+import pandas as pd
+
+from .cnae import IndiceCNAE
+from .indice import IndiceTaxasJurisdicoes
+from .tabelas import (
+    ATIVIDADES_CSV_PATH,
+    CNAE_CSV_PATH,
+    arquivos_taxas_jurisdicoes,
+    carregar_atividades_anexo_i,
+    carregar_cnaes,
+    carregar_taxas_jurisdicoes,
+)
+
+# =============================
+# ARTEFATO COMPILADO DAS TABELAS DE REFERÊNCIA
+# =============================
+# Os CSVs de referência são lidos e tratados uma vez e gravados em um único arquivo
+# binário (pickle) com as colunas já tipadas (texto e float, exatamente como os
+# carregadores de tabelas.py devolvem) e as chaves já normalizadas nos índices de
+# taxas e de busca de CNAEs. Nas
+# partidas seguintes basta ler esse arquivo. O artefato guarda o hash do conteúdo dos
+# CSVs e a versão do formato: se um CSV mudar, entrar ou sair (ou o formato mudar), ele
+# é recompilado sozinho.
+# O arquivo é gerado localmente por compilar_artefato; não carregue artefatos de terceiros.
+
+# Versão do formato do artefato; aumente ao mudar o conteúdo gravado
+VERSAO_ARTEFATO = 2
+
+# Arquivo do artefato compilado (ignorado pelo git)
+ARTEFATO_PATH = "tabelas_referencia.pkl"
+
+_CARREGADORES = {
+    "atividades": carregar_atividades_anexo_i,
+    "taxas": carregar_taxas_jurisdicoes,
+    "cnaes": carregar_cnaes,
+}
+
+
+def fontes_padrao() -> dict:
+    """
+    CSVs que entram no artefato: nome da tabela -> caminho (as taxas são um dicionário
+    jurisdição -> caminhos, com todas as tabelas de taxas encontradas na pasta).
+    """
+    return {
+        "atividades": ATIVIDADES_CSV_PATH,
+        "taxas": arquivos_taxas_jurisdicoes(),
+        "cnaes": CNAE_CSV_PATH,
+    }
+
+
+class TabelasReferencia(NamedTuple):
+    """Tabelas de referência prontas para uso (iguais às lidas dos CSVs) e os índices montados."""
+    atividades: pd.DataFrame
+    taxas: pd.DataFrame
+    cnaes: pd.DataFrame
+    taxas_jurisdicoes: IndiceTaxasJurisdicoes
+    indice_cnae: IndiceCNAE
+    hash_fontes: str
+    origem: str  # "artefato" (lido do arquivo) ou "csv" (recompilado agora)
+
+
+def _arquivos_das_fontes(fontes: dict):
+    """(rótulo, caminho) de cada CSV das fontes, em ordem fixa."""
+    for nome in sorted(fontes):
+        if isinstance(fontes[nome], dict):
+            for jurisdicao, caminhos in fontes[nome].items():
+                for caminho in caminhos:
+                    yield f"{nome}/{jurisdicao}/{os.path.basename(caminho)}", caminho
+        else:
+            yield nome, fontes[nome]
+
+
+def hash_fontes(fontes: dict) -> str:
+    """SHA-256 do conteúdo dos CSVs de origem (e dos nomes das tabelas)."""
+    h = hashlib.sha256(f"v{VERSAO_ARTEFATO}".encode())
+    for rotulo, caminho in _arquivos_das_fontes(fontes):
+        h.update(rotulo.encode())
+        with open(caminho, "rb") as arquivo:
+            h.update(hashlib.sha256(arquivo.read()).digest())
+    return h.hexdigest()
+
+
+def assinatura_fontes(fontes: Optional[dict] = None) -> tuple:
+    """
+    (rótulo, mtime_ns, tamanho) de cada CSV das fontes: barata o bastante para conferir a
+    cada rerun se alguma tabela mudou (ou foi acrescentada) sem ler os arquivos.
+    """
+    assinatura = []
+    for rotulo, caminho in _arquivos_das_fontes(fontes or fontes_padrao()):
+        try:
+            estado = os.stat(caminho)
+            assinatura.append((rotulo, estado.st_mtime_ns, estado.st_size))
+        except OSError:
+            assinatura.append((rotulo, None, None))
+    return tuple(assinatura)
+
+
+def _gravar_atomicamente(caminho: str, conteudo: dict):
+    pasta = os.path.dirname(os.path.abspath(caminho))
+    descritor, temporario = tempfile.mkstemp(prefix=".tabelas_", suffix=".tmp", dir=pasta)
+    try:
+        with os.fdopen(descritor, "wb") as arquivo:
+            pickle.dump(conteudo, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def compilar_artefato(caminho_artefato: str = ARTEFATO_PATH, fontes: Optional[dict] = None,
+                      hash_atual: Optional[str] = None) -> TabelasReferencia:
+    """
+    Lê os CSVs, monta os índices de taxas e de CNAEs e grava o artefato. Se o arquivo não puder ser
+    gravado (ex.: pasta somente leitura), as tabelas são devolvidas mesmo assim.
+    """
+    fontes = fontes or fontes_padrao()
+    hash_atual = hash_atual or hash_fontes(fontes)
+    tabelas = {nome: _CARREGADORES[nome](caminho) for nome, caminho in fontes.items()}
+    taxas_jurisdicoes = IndiceTaxasJurisdicoes.from_dataframe(tabelas["taxas"])
+    indice_cnae = IndiceCNAE.from_dataframe(tabelas["cnaes"])
+
+    conteudo = {
+        "versao": VERSAO_ARTEFATO,
+        "hash": hash_atual,
+        "tabelas": tabelas,
+        "taxas_jurisdicoes": taxas_jurisdicoes,
+        "indice_cnae": indice_cnae,
+    }
+    try:
+        _gravar_atomicamente(caminho_artefato, conteudo)
+    except OSError:
+        pass
+    return TabelasReferencia(tabelas["atividades"], tabelas["taxas"], tabelas["cnaes"],
+                             taxas_jurisdicoes, indice_cnae, hash_atual, "csv")
+
+
+def carregar_tabelas_referencia(caminho_artefato: str = ARTEFATO_PATH,
+                                fontes: Optional[dict] = None) -> TabelasReferencia:
+    """
+    Lê as tabelas de referência do artefato compilado; recompila a partir dos CSVs se o
+    artefato não existir, for de outra versão ou se algum CSV tiver mudado.
+    """
+    fontes = fontes or fontes_padrao()
+    hash_atual = hash_fontes(fontes)
+    try:
+        with open(caminho_artefato, "rb") as arquivo:
+            conteudo = pickle.load(arquivo)
+        if conteudo.get("versao") == VERSAO_ARTEFATO and conteudo.get("hash") == hash_atual:
+            tabelas = conteudo["tabelas"]
+            return TabelasReferencia(tabelas["atividades"], tabelas["taxas"], tabelas["cnaes"],
+                                     conteudo["taxas_jurisdicoes"], conteudo["indice_cnae"], hash_atual, "artefato")
+    except (OSError, EOFError, KeyError, AttributeError, TypeError, ValueError, ImportError,
+            pickle.UnpicklingError):
+        pass
+    return compilar_artefato(caminho_artefato, fontes, hash_atual)
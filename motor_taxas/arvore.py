@@ -0,0 +1,101 @@
+from types import MappingProxyType
+from typing import NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from .medicao import medido
+from .porte import NOMES_PORTE
+
+# =============================
+# ÁRVORE DE ATIVIDADES DO ANEXO I
+# =============================
+# Grupos (ITEM sem ponto: 1, 2, 3, ...) e suas subatividades, montados uma única vez
+# por motor e compartilhados por todas as sessões do app. A árvore é imutável (tuplas e
+# MappingProxyType): a cada rerun a interface só faz consultas em dicionários.
+
+
+class AtividadeAnexo(NamedTuple):
+    """Subatividade do ANEXO I com os campos que a interface e a cotação usam."""
+    posicao: int  # linha no DataFrame do ANEXO I
+    item: str
+    atividade: str
+    unidade_medida: str
+    potencial_poluidor: str
+    anexo: str
+    # Limites de cada porte (na ordem de NOMES_PORTE), como em MatrizPortes
+    limites_inf: tuple
+    limites_sup: tuple
+
+    @medido("classificar_porte")
+    def classificar_porte(self, medida: float) -> Optional[str]:
+        """Mesmo resultado de classificar_porte_por_linha_valor para a linha da atividade."""
+        for nome, inferior, superior in zip(NOMES_PORTE, self.limites_inf, self.limites_sup):
+            if inferior <= medida <= superior:
+                return nome
+        return None
+
+
+class GrupoAtividades(NamedTuple):
+    """Grupo do ANEXO I e os nomes das suas subatividades, na ordem do arquivo."""
+    base: str
+    rotulo: str
+    atividades: tuple
+
+
+class ArvoreAtividades:
+    """
+    Grupos do ANEXO I (ordenados pelo ITEM do grupo, como texto) e, por grupo, as
+    subatividades já extraídas em AtividadeAnexo.
+    """
+
+    def __init__(self, grupos: Sequence[GrupoAtividades], atividades: dict):
+        self.grupos = tuple(grupos)
+        self.rotulos_grupo = tuple(grupo.rotulo for grupo in self.grupos)
+        self._grupo_por_rotulo = MappingProxyType({grupo.rotulo: grupo for grupo in self.grupos})
+        self._atividades = MappingProxyType(dict(atividades))
+
+    @classmethod
+    @medido("arvore_atividades")
+    def montar(cls, itens: Sequence[str], atividades: Sequence[str], unidades: Sequence[str],
+               potenciais: Sequence[str], anexos: Sequence[str],
+               limites_inf: np.ndarray, limites_sup: np.ndarray) -> "ArvoreAtividades":
+        """Monta a árvore a partir das colunas já extraídas do ANEXO I (uma entrada por linha)."""
+        rotulos = {}
+        filhos = {}
+        registros = {}
+        for posicao, (item, atividade) in enumerate(zip(itens, atividades)):
+            base = item.split(".")[0]
+            if "." not in item:
+                rotulos.setdefault(f"{base} - {atividade}", base)
+                continue
+            if not atividade:
+                continue
+            filhos.setdefault(base, []).append(atividade)
+            # Atividade repetida no mesmo grupo: vale a primeira linha
+            registros.setdefault((base, atividade), AtividadeAnexo(
+                posicao=posicao,
+                item=item,
+                atividade=atividade,
+                unidade_medida=unidades[posicao],
+                potencial_poluidor=potenciais[posicao],
+                anexo=anexos[posicao],
+                limites_inf=tuple(float(v) for v in limites_inf[posicao]),
+                limites_sup=tuple(float(v) for v in limites_sup[posicao]),
+            ))
+
+        grupos = [
+            GrupoAtividades(base, rotulo, tuple(filhos.get(base, ())))
+            for rotulo, base in sorted(rotulos.items(), key=lambda par: par[1])
+        ]
+        return cls(grupos, registros)
+
+    def __len__(self) -> int:
+        return len(self.grupos)
+
+    def grupo(self, rotulo: str) -> Optional[GrupoAtividades]:
+        """Grupo pelo rótulo exibido ("1 - PESQUISA MINERAL"), ou None."""
+        return self._grupo_por_rotulo.get(rotulo)
+
+    def atividade(self, base: str, atividade: str) -> Optional[AtividadeAnexo]:
+        """Subatividade do grupo pelo nome (a primeira linha, se o nome se repetir), ou None."""
+        return self._atividades.get((base, atividade))
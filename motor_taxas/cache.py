@@ -0,0 +1,84 @@
+import threading
+from collections import Counter, OrderedDict
+from typing import Hashable, Optional
+
+# =============================
+# CACHE DE COTAÇÕES
+# =============================
+# Resultado das buscas de taxa (LP/LI/LO ou o erro) por combinação, compartilhado por
+# todas as sessões do processo. O tamanho é limitado (sai a combinação usada há mais
+# tempo) e a versão das tabelas do motor faz parte da chave: motores com tabelas
+# diferentes no mesmo processo não se atrapalham, e as entradas de uma versão antiga
+# (CSVs de taxas ou do ANEXO I alterados) deixam de ser consultadas e saem pelo LRU.
+
+# Máximo de combinações guardadas
+TAMANHO_CACHE_COTACOES = 4096
+
+
+class CacheCotacoes:
+    """Cache LRU, seguro entre threads, com contadores de acertos, faltas e remoções."""
+
+    def __init__(self, tamanho: int = TAMANHO_CACHE_COTACOES):
+        self.tamanho = tamanho
+        self._trava = threading.Lock()
+        self._entradas = OrderedDict()
+        self._entradas_por_versao = Counter()
+        self.acertos = 0
+        self.faltas = 0
+        self.remocoes = 0
+
+    def obter(self, versao: str, chave: Hashable):
+        """Valor guardado para a chave nas tabelas da versão informada, ou None."""
+        with self._trava:
+            valor = self._entradas.get((versao, chave))
+            if valor is None:
+                self.faltas += 1
+                return None
+            self._entradas.move_to_end((versao, chave))
+            self.acertos += 1
+            return valor
+
+    def guardar(self, versao: str, chave: Hashable, valor):
+        with self._trava:
+            if (versao, chave) not in self._entradas:
+                self._entradas_por_versao[versao] += 1
+            self._entradas[(versao, chave)] = valor
+            self._entradas.move_to_end((versao, chave))
+            while len(self._entradas) > self.tamanho:
+                (versao_removida, _), _ = self._entradas.popitem(last=False)
+                self._entradas_por_versao[versao_removida] -= 1
+                if not self._entradas_por_versao[versao_removida]:
+                    del self._entradas_por_versao[versao_removida]
+                self.remocoes += 1
+
+    def limpar(self):
+        with self._trava:
+            self._entradas.clear()
+            self._entradas_por_versao.clear()
+
+    def metricas(self) -> dict:
+        """Tamanho, contadores, versões das tabelas com entradas e taxa de acerto do cache."""
+        with self._trava:
+            consultas = self.acertos + self.faltas
+            return {
+                "entradas": len(self._entradas),
+                "tamanho_maximo": self.tamanho,
+                "acertos": self.acertos,
+                "faltas": self.faltas,
+                "remocoes": self.remocoes,
+                "versoes": len(self._entradas_por_versao),
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+            }
+
+
+_cache_cotacoes = CacheCotacoes()
+
+
+def cache_cotacoes() -> CacheCotacoes:
+    """Cache de cotações do processo."""
+    return _cache_cotacoes
+
+
+def metricas_cache_cotacoes(cache: Optional[CacheCotacoes] = None) -> dict:
+    """Métricas do cache de cotações do processo."""
+    return (cache or _cache_cotacoes).metricas()
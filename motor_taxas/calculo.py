@@ -0,0 +1,183 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .indice import COLUNAS_TAXAS, IndiceTaxas
+from .medicao import medido
+from .normalizacao import normalizar_potencial_poluidor
+
+# =============================
+# MAPAS DE COLUNAS E PORTES
+# =============================
+
+# Mapeia o tipo de serviço para a coluna correspondente na tabela de taxas (TLP/TLI/TLO)
+TIPO_LICENCA_COLUNA = {
+    "Licença Prévia": "TLP",
+    "Licença de Instalação": "TLI",
+    "Licença de Operação": "TLO",
+}
+
+# Mapeia o porte usado na interface para o porte da tabela
+MAPEAMENTO_PORTES_TABELA = {
+    "Mínimo": "Mínimo",
+    "Pequeno": "Pequeno",
+    "Médio": "Médio",
+    "Grande": "Grande",
+    "Excepcional": "Excepcional",
+}
+
+# Mapa inverso: porte da tabela -> porte exibido na UI
+MAPA_PORTE_TABELA_PARA_APP = {
+    "Mínimo": "Mínimo",
+    "Pequeno": "Pequeno",
+    "Médio": "Médio",
+    "Grande": "Grande",
+    "Excepcional": "Excepcional",
+}
+
+
+# =============================
+# DADOS FIXOS
+# =============================
+
+SERVICOS = {
+    "Licença Prévia": {"codigo": "LP", "descricao": "Fase de planejamento do empreendimento"},
+    "Licença de Instalação": {"codigo": "LI", "descricao": "Autoriza a instalação do empreendimento"},
+    "Licença de Operação": {"codigo": "LO", "descricao": "Autoriza a operação da atividade"},
+    }
+
+# "jurisdicao" aponta a tabela de taxas do município (ver tabelas.TABELAS_TAXAS_JURISDICOES).
+# "jurisdicao_substituta" (opcional) é a tabela usada enquanto a do município não existe:
+# a cotação sai marcada com a tabela emprestada (Cotacao.tabela_emprestada) e a interface
+# avisa o usuário. Porto Velho usa a de Ariquemes até que taxas_porto_velho_ufar.csv exista.
+MUNICIPIOS_CONFIG = {
+    "Ariquemes - RO": {"ufir": 85.15, "lei": "Lei 2.349/2019", "jurisdicao": "ariquemes"},
+    "Porto Velho - RO": {"ufir": 81.22, "lei": "Lei Municipal", "jurisdicao": "porto_velho",
+                         "jurisdicao_substituta": "ariquemes"},
+}
+
+# ANEXO usado quando a atividade não informa ANEXO_OU_TAXA
+ANEXO_PADRAO = "ANEXO II"
+
+# Códigos de erro de uma cotação
+ERRO_MUNICIPIO_DESCONHECIDO = "MUNICIPIO_DESCONHECIDO"
+ERRO_JURISDICAO_SEM_TABELA = "JURISDICAO_SEM_TABELA"
+ERRO_ITEM_NAO_ENCONTRADO = "ITEM_NAO_ENCONTRADO"
+ERRO_PORTE_NAO_DEFINIDO = "PORTE_NAO_DEFINIDO"
+ERRO_TAXA_NAO_ENCONTRADA = "TAXA_NAO_ENCONTRADA"
+
+
+# =============================
+# LÓGICA DE CÁLCULO
+# =============================
+
+@medido("obter_taxa_ufar")
+def obter_taxa_ufar(indice: IndiceTaxas, anexo: str, porte_app: str,
+                    potencial_poluidor: str, servico: str) -> Optional[float]:
+    """
+    Busca a taxa (em UFAR) no índice da tabela oficial, dado anexo, porte, potencial e tipo de licença.
+    Retorna None quando a combinação anexo/porte/potencial não existe na tabela.
+    """
+    if servico not in TIPO_LICENCA_COLUNA:
+        raise ValueError(f"Serviço não mapeado: {servico}")
+
+    porte_tabela = MAPEAMENTO_PORTES_TABELA.get(porte_app, porte_app)
+    taxas = indice.buscar(anexo, porte_tabela, potencial_poluidor)
+    if taxas is None:
+        return None
+
+    return taxas[COLUNAS_TAXAS.index(TIPO_LICENCA_COLUNA[servico])]
+
+
+def calcular_taxa(servico: str, porte_nome: str, anexo: str,
+                  potencial_poluidor: str, indice: IndiceTaxas,
+                  valor_ufir: float) -> Optional[tuple[float, float]]:
+    """
+    Calcula o valor da taxa ambiental com base nas tabelas oficiais (em UFAR).
+    Retorna None quando não há taxa cadastrada para a combinação informada.
+    """
+    valor_ufar = obter_taxa_ufar(
+        indice=indice,
+        anexo=anexo,
+        porte_app=porte_nome,
+        potencial_poluidor=potencial_poluidor,
+        servico=servico,
+    )
+    if valor_ufar is None:
+        return None
+
+    valor_reais = valor_ufar * valor_ufir
+    return valor_reais, valor_ufar
+
+
+# =============================
+# COTAÇÃO
+# =============================
+
+@dataclass(frozen=True)
+class ValorLicenca:
+    """Valor de uma licença (LP/LI/LO) em UFAR e em R$."""
+    servico: str
+    codigo: str
+    descricao: str
+    valor_ufar: float
+    valor_reais: float
+
+
+@dataclass(frozen=True)
+class Cotacao:
+    """Resultado do cálculo de taxas de uma atividade em um município."""
+    municipio: str
+    item: str
+    atividade: str
+    unidade_medida: str
+    medida: float
+    porte: Optional[str]
+    potencial_poluidor: str
+    anexo: str
+    valor_ufir: float
+    licencas: tuple[ValorLicenca, ...] = ()
+    erro: Optional[str] = None
+    # Jurisdição cuja tabela foi usada porque o município ainda não tem a própria
+    tabela_emprestada: Optional[str] = None
+
+    @property
+    def valor_total_reais(self) -> float:
+        """Soma das licenças, como se todas fossem solicitadas."""
+        return sum(lic.valor_reais for lic in self.licencas)
+
+
+def texto_da_linha(linha: pd.Series, coluna: str) -> str:
+    """Lê um campo texto da linha do ANEXO I, tratando ausente/NaN como vazio."""
+    valor = linha.get(coluna, "")
+    if valor is None or pd.isna(valor):
+        return ""
+    return str(valor).strip()
+
+
+def textos_da_coluna(df: pd.DataFrame, coluna: str) -> np.ndarray:
+    """Como texto_da_linha para a coluna inteira de uma vez (array de objetos; ausente/NaN vira "")."""
+    if coluna not in df.columns:
+        return np.full(len(df), "", dtype=object)
+    textos = df[coluna].astype(str).str.strip().to_numpy(dtype=object)
+    textos[df[coluna].isna().to_numpy()] = ""
+    return textos
+
+
+def potenciais_e_anexos_da_coluna(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """Como potencial_e_anexo_da_linha para todas as linhas do ANEXO I de uma vez."""
+    potenciais_texto = textos_da_coluna(df, "POTENCIAL_POLUIDOR")
+    unicos, inversos = np.unique(potenciais_texto, return_inverse=True)
+    potenciais = np.array([normalizar_potencial_poluidor(v) for v in unicos], dtype=object)[inversos]
+    anexos = textos_da_coluna(df, "ANEXO_OU_TAXA")
+    anexos[anexos == ""] = ANEXO_PADRAO
+    return potenciais, anexos
+
+
+def potencial_e_anexo_da_linha(linha: pd.Series) -> tuple[str, str]:
+    """Potencial poluidor normalizado e ANEXO da tabela de taxas de uma linha do ANEXO I."""
+    potencial = normalizar_potencial_poluidor(texto_da_linha(linha, "POTENCIAL_POLUIDOR"))
+    anexo = texto_da_linha(linha, "ANEXO_OU_TAXA") or ANEXO_PADRAO
+    return potencial, anexo
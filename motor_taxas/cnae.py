@@ -0,0 +1,237 @@
+import bisect
+import re
+from collections import Counter, defaultdict
+from typing import NamedTuple, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .normalizacao import normalizar_texto_busca
+
+# =============================
+# BUSCA DE CNAEs
+# =============================
+# Índice montado uma vez a partir de carregar_cnaes: a busca roda no servidor e só os
+# melhores resultados vão para o widget. Aceita prefixo de código ("4731", "4731-8/00")
+# ou texto da denominação, sem diferenciar acentos e maiúsculas.
+
+# Quantidade padrão de resultados devolvidos por busca
+TOP_K_CNAE = 20
+
+# Palavras ignoradas na busca por texto (a não ser que a consulta só tenha elas)
+PALAVRAS_VAZIAS = frozenset({
+    "a", "as", "o", "os", "e", "de", "da", "das", "do", "dos", "em", "na", "nas", "no", "nos",
+    "para", "por", "com", "sem", "ou", "um", "uma",
+})
+
+# Pesos de cada tipo de casamento de uma palavra da consulta com uma palavra da denominação
+PESO_EXATO = 1.0
+PESO_PREFIXO = 0.85
+PESO_TRIGRAMA = 0.6
+
+# Similaridade mínima (Jaccard de trigramas) para o casamento aproximado (erros de digitação)
+SIMILARIDADE_MINIMA_TRIGRAMA = 0.4
+
+# Bônus para denominações que contêm a consulta inteira, na ordem digitada
+BONUS_FRASE = 0.5
+
+_DIGITOS = re.compile(r"\D+")
+_TEM_LETRA = re.compile(r"[^\W\d_]")
+
+
+class ResultadoCNAE(NamedTuple):
+    """Um CNAE encontrado pela busca."""
+    subclasse: str
+    denominacao: str
+    rotulo: str
+    pontuacao: float
+
+
+def _trigramas(palavra: str) -> set:
+    texto = f" {palavra} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def _palavras(texto_normalizado: str) -> list:
+    palavras = texto_normalizado.split()
+    uteis = [p for p in palavras if p not in PALAVRAS_VAZIAS]
+    return uteis or palavras
+
+
+class IndiceCNAE:
+    """
+    Índice de busca das subclasses CNAE.
+
+    Guarda os códigos só com dígitos (ordenados, para busca por prefixo com bisect), um
+    índice invertido palavra -> CNAEs com peso IDF e um índice de trigramas do vocabulário
+    para tolerar erros de digitação.
+    """
+
+    def __init__(self, subclasses: list, denominacoes: list):
+        self.subclasses = list(subclasses)
+        self.denominacoes = list(denominacoes)
+        self.rotulos = [f"{s} - {d}" for s, d in zip(self.subclasses, self.denominacoes)]
+        self._textos = [normalizar_texto_busca(d) for d in self.denominacoes]
+        self._n_palavras = np.array([len(t.split()) for t in self._textos])
+        self._posicao_por_subclasse = {s: i for i, s in enumerate(self.subclasses)}
+        self._posicao_por_digitos = {_DIGITOS.sub("", s): i for i, s in enumerate(self.subclasses)}
+
+        # Códigos só com dígitos, ordenados, para busca por prefixo
+        codigos = sorted((_DIGITOS.sub("", s), i) for i, s in enumerate(self.subclasses))
+        self._codigos = [c for c, _ in codigos]
+        self._posicoes_codigos = [i for _, i in codigos]
+
+        # Índice invertido palavra -> posições (CSR sobre o vocabulário ordenado, para que
+        # todas as palavras com um mesmo prefixo fiquem num só trecho contíguo), com IDF
+        documentos = defaultdict(set)
+        for posicao, texto in enumerate(self._textos):
+            for palavra in set(_palavras(texto)):
+                documentos[palavra].add(posicao)
+        total = max(len(self._textos), 1)
+        self._vocabulario = sorted(documentos)
+        self._indice_palavra = {p: i for i, p in enumerate(self._vocabulario)}
+        tamanhos = [len(documentos[p]) for p in self._vocabulario]
+        self._inicio_postagens = np.concatenate([[0], np.cumsum(tamanhos)]).astype(np.int64)
+        self._postagens = np.fromiter(
+            (posicao for p in self._vocabulario for posicao in sorted(documentos[p])),
+            dtype=np.int32, count=int(self._inicio_postagens[-1]),
+        )
+        self._idf = np.log1p(total / np.maximum(np.array(tamanhos, dtype=float), 1))
+
+        self._trigramas_palavra = {}
+        self._palavras_por_trigrama = defaultdict(list)
+        for palavra in self._vocabulario:
+            trigramas = _trigramas(palavra)
+            self._trigramas_palavra[palavra] = len(trigramas)
+            for trigrama in trigramas:
+                self._palavras_por_trigrama[trigrama].append(palavra)
+
+    @classmethod
+    def from_dataframe(cls, df_cnaes: pd.DataFrame) -> "IndiceCNAE":
+        """Monta o índice a partir do DataFrame de carregar_cnaes (colunas subclasse, denominacao)."""
+        if not {"subclasse", "denominacao"}.issubset(df_cnaes.columns):
+            return cls([], [])
+        df = df_cnaes.dropna(subset=["subclasse", "denominacao"])
+        return cls(df["subclasse"].astype(str).str.strip().tolist(),
+                   df["denominacao"].astype(str).str.strip().tolist())
+
+    def __len__(self) -> int:
+        return len(self.subclasses)
+
+    def resultado(self, posicao: int, pontuacao: float = 0.0) -> ResultadoCNAE:
+        return ResultadoCNAE(self.subclasses[posicao], self.denominacoes[posicao],
+                             self.rotulos[posicao], pontuacao)
+
+    def por_subclasse(self, subclasse: str):
+        """Resultado do CNAE com o código informado (ex.: "4731-8/00"), ou None."""
+        posicao = self._posicao_por_subclasse.get((subclasse or "").strip())
+        return None if posicao is None else self.resultado(posicao, 1.0)
+
+    def posicoes_dos_codigos(self, codigos: Sequence[str]) -> np.ndarray:
+        """
+        Posição de cada CNAE no índice (-1 quando não existe). Aceita "4731-8/00", "4731800"
+        ou o rótulo "4731-8/00 - ..."; com vários CNAEs separados por ";", vale o primeiro.
+        """
+        # Em lote os mesmos CNAEs se repetem muito: o texto é tratado uma vez por valor distinto
+        inverso, codigos_unicos = pd.factorize(pd.Series(list(codigos), dtype=object).fillna("").astype(str))
+        posicoes = np.array([
+            self._posicao_por_digitos.get(_DIGITOS.sub("", codigo.split(";")[0].split(" - ")[0]), -1)
+            for codigo in codigos_unicos
+        ], dtype=np.int64)
+        return posicoes[inverso] if len(posicoes) else np.zeros(0, dtype=np.int64)
+
+    # -----------------------------
+    # Busca por código
+    # -----------------------------
+    def _buscar_codigo(self, digitos: str, k: int) -> list:
+        inicio = bisect.bisect_left(self._codigos, digitos)
+        resultados = []
+        for i in range(inicio, len(self._codigos)):
+            if len(resultados) >= k or not self._codigos[i].startswith(digitos):
+                break
+            # Código completo vale mais que um prefixo
+            pontuacao = len(digitos) / len(self._codigos[i])
+            resultados.append(self.resultado(self._posicoes_codigos[i], pontuacao))
+        return resultados
+
+    # -----------------------------
+    # Busca por texto
+    # -----------------------------
+    def _valores_do_termo(self, termo: str) -> np.ndarray:
+        """Para cada CNAE, o maior peso * IDF entre as palavras que casam com o termo."""
+        valores = np.zeros(len(self.subclasses))
+
+        # Palavra exata e palavras que começam com o termo: um trecho contínuo do vocabulário
+        # (o texto normalizado só tem a-z0-9, e "{" vem depois de "z")
+        inicio = bisect.bisect_left(self._vocabulario, termo)
+        fim = bisect.bisect_left(self._vocabulario, termo + "{", inicio)
+        if fim > inicio:
+            pesos = np.full(fim - inicio, PESO_PREFIXO)
+            if self._vocabulario[inicio] == termo:
+                pesos[0] = PESO_EXATO
+            palavras = np.arange(inicio, fim)
+        elif len(termo) >= 3:
+            # Nenhuma palavra com o prefixo: casamento aproximado por trigramas
+            trigramas = _trigramas(termo)
+            comuns = Counter(
+                palavra for trigrama in trigramas for palavra in self._palavras_por_trigrama.get(trigrama, ())
+            )
+            semelhantes = []
+            for palavra, n_comuns in comuns.items():
+                similaridade = n_comuns / (len(trigramas) + self._trigramas_palavra[palavra] - n_comuns)
+                if similaridade >= SIMILARIDADE_MINIMA_TRIGRAMA:
+                    semelhantes.append((self._indice_palavra[palavra], PESO_TRIGRAMA * similaridade))
+            if not semelhantes:
+                return valores
+            palavras = np.array([i for i, _ in semelhantes])
+            pesos = np.array([peso for _, peso in semelhantes])
+        else:
+            return valores
+
+        inicios = self._inicio_postagens[palavras]
+        tamanhos = self._inicio_postagens[palavras + 1] - inicios
+        if fim > inicio:
+            posicoes = self._postagens[self._inicio_postagens[inicio]:self._inicio_postagens[fim]]
+        else:
+            posicoes = np.concatenate([self._postagens[a:a + n] for a, n in zip(inicios, tamanhos)])
+        np.maximum.at(valores, posicoes, np.repeat(pesos * self._idf[palavras], tamanhos))
+        return valores
+
+    def _buscar_texto(self, consulta_normalizada: str, k: int) -> list:
+        termos = _palavras(consulta_normalizada)
+        pontuacoes = np.zeros(len(self.subclasses))
+        cobertura = np.zeros(len(self.subclasses), dtype=np.int32)
+        for termo in termos:
+            valores = self._valores_do_termo(termo)
+            pontuacoes += valores
+            cobertura += valores > 0
+
+        candidatos = np.flatnonzero(cobertura)
+        if not len(candidatos):
+            return []
+        for posicao in candidatos:
+            if consulta_normalizada in self._textos[posicao]:
+                pontuacoes[posicao] *= 1 + BONUS_FRASE
+
+        # Primeiro os CNAEs que casam com mais palavras da consulta; depois pela pontuação
+        # e, no empate, as denominações mais curtas
+        ordem = np.lexsort((candidatos, self._n_palavras[candidatos], -pontuacoes[candidatos],
+                            -cobertura[candidatos]))
+        n_termos = len(termos)
+        return [
+            self.resultado(int(posicao), float(cobertura[posicao] / n_termos * pontuacoes[posicao]))
+            for posicao in candidatos[ordem[:k]]
+        ]
+
+    def buscar(self, consulta: str, k: int = TOP_K_CNAE) -> list:
+        """
+        Os k CNAEs mais relevantes para a consulta, do melhor para o pior.
+        Consultas sem letras ("4731", "47.31-8") buscam por prefixo do código.
+        """
+        consulta = (consulta or "").strip()
+        if not consulta or k <= 0:
+            return []
+        if not _TEM_LETRA.search(consulta):
+            digitos = _DIGITOS.sub("", consulta)
+            return self._buscar_codigo(digitos, k) if digitos else []
+        return self._buscar_texto(normalizar_texto_busca(consulta), k)
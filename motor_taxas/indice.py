@@ -0,0 +1,226 @@
+from typing import NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# =============================
+# ÍNDICE DE TAXAS (TLP/TLI/TLO)
+# =============================
+
+# Colunas de valores da tabela de taxas, na ordem LP / LI / LO
+COLUNAS_TAXAS = ["TLP", "TLI", "TLO"]
+
+# Unidades das tabelas de taxas: UFAR (municípios) e UPFS (estado, SEDAM)
+UNIDADES_TAXA = ("UFAR", "UPFS")
+
+# Colunas de valores do índice de jurisdições: TLP/TLI/TLO de cada unidade, lado a lado
+COLUNAS_TAXAS_UNIDADES = [f"{col}_{unidade}" for unidade in UNIDADES_TAXA for col in COLUNAS_TAXAS]
+
+
+class TaxasUFAR(NamedTuple):
+    """Valores de TLP/TLI/TLO (em UFAR) de uma combinação anexo/porte/potencial."""
+    tlp: float
+    tli: float
+    tlo: float
+
+
+def normalizar_anexo(anexo: Optional[str]) -> str:
+    """Normaliza o ANEXO para comparação (ex.: "ANEXO II" == "ANEXOII")."""
+    return (anexo or "").replace(" ", "").upper().strip()
+
+
+def normalizar_chave_taxa(anexo: Optional[str], porte: Optional[str],
+                          potencial_poluidor: Optional[str]) -> tuple[str, str, str]:
+    """Monta a chave (anexo, porte, potencial) usada pelo índice de taxas."""
+    return (
+        normalizar_anexo(anexo),
+        (porte or "").strip(),
+        (potencial_poluidor or "").strip().upper(),
+    )
+
+
+def _normalizar_colunas_chave(anexos: pd.Series, portes: pd.Series,
+                              potenciais: pd.Series) -> pd.Series:
+    """Versão vetorizada de normalizar_chave_taxa, devolvendo a chave como texto único."""
+    anexos = anexos.fillna("").astype(str).str.replace(" ", "", regex=False).str.upper().str.strip()
+    portes = portes.fillna("").astype(str).str.strip()
+    potenciais = potenciais.fillna("").astype(str).str.strip().str.upper()
+    return anexos + "|" + portes + "|" + potenciais
+
+
+class IndiceTaxas:
+    """
+    Índice em memória da tabela de taxas, montado uma única vez a partir do DataFrame
+    carregado por carregar_tabelas_taxas.
+
+    A busca é O(1) por chave normalizada (anexo, porte, potencial) e devolve
+    TLP/TLI/TLO de uma só vez. Uma chave ausente devolve None (não há mais valores padrão).
+    """
+
+    def __init__(self, chaves: pd.Index, valores: np.ndarray):
+        self._chaves = chaves
+        self._valores = valores
+        self._posicoes = {chave: i for i, chave in enumerate(chaves)}
+
+    @classmethod
+    def from_dataframe(cls, df_taxas: pd.DataFrame) -> "IndiceTaxas":
+        """Compila o índice a partir da tabela de taxas (colunas ANEXO/PORTE/POTENCIAL_POLUIDOR/TLP/TLI/TLO)."""
+        if df_taxas.empty:
+            return cls(pd.Index([], dtype=object), np.empty((0, 3), dtype=float))
+
+        df = df_taxas.dropna(subset=["ANEXO", "PORTE", "POTENCIAL_POLUIDOR"])
+        chaves = _normalizar_colunas_chave(df["ANEXO"], df["PORTE"], df["POTENCIAL_POLUIDOR"])
+
+        # Mantém a primeira ocorrência de cada chave, como o filtro original (iloc[0])
+        primeiras = ~chaves.duplicated(keep="first").to_numpy()
+        valores = df[COLUNAS_TAXAS].to_numpy(dtype=float)[primeiras]
+        return cls(pd.Index(chaves.to_numpy()[primeiras], dtype=object), valores)
+
+    def __len__(self) -> int:
+        return len(self._chaves)
+
+    def __contains__(self, chave: tuple) -> bool:
+        return "|".join(normalizar_chave_taxa(*chave)) in self._posicoes
+
+    def buscar(self, anexo: Optional[str], porte: Optional[str],
+               potencial_poluidor: Optional[str]) -> Optional[TaxasUFAR]:
+        """Retorna TLP/TLI/TLO da combinação informada, ou None se ela não existir na tabela."""
+        pos = self._posicoes.get("|".join(normalizar_chave_taxa(anexo, porte, potencial_poluidor)))
+        if pos is None:
+            return None
+        tlp, tli, tlo = self._valores[pos]
+        return TaxasUFAR(float(tlp), float(tli), float(tlo))
+
+    @property
+    def valores(self) -> np.ndarray:
+        """Matriz (n_chaves, 3) com TLP/TLI/TLO, na ordem das posições do índice."""
+        return self._valores
+
+    def posicoes_lote(self, anexos: Sequence, portes: Sequence, potenciais: Sequence) -> np.ndarray:
+        """Posição de cada combinação em valores (-1 quando ausente), na ordem das entradas."""
+        chaves = _normalizar_colunas_chave(
+            pd.Series(anexos, dtype=object),
+            pd.Series(portes, dtype=object),
+            pd.Series(potenciais, dtype=object),
+        )
+        return self._chaves.get_indexer(chaves.to_numpy())
+
+    def buscar_lote(self, anexos: Sequence, portes: Sequence,
+                    potenciais: Sequence) -> pd.DataFrame:
+        """
+        Busca várias combinações de uma vez.
+
+        Retorna um DataFrame com as colunas TLP, TLI, TLO (NaN quando ausente) e
+        ENCONTRADO (bool), na mesma ordem das entradas.
+        """
+        posicoes = self.posicoes_lote(anexos, portes, potenciais)
+        encontrado = posicoes >= 0
+
+        valores = np.full((len(posicoes), 3), np.nan)
+        valores[encontrado] = self._valores[posicoes[encontrado]]
+
+        resultado = pd.DataFrame(valores, columns=COLUNAS_TAXAS)
+        resultado["ENCONTRADO"] = encontrado
+        return resultado
+
+
+# =============================
+# ÍNDICE DE TAXAS POR JURISDIÇÃO
+# =============================
+
+def normalizar_jurisdicao(jurisdicao: Optional[str]) -> str:
+    """Normaliza o nome da jurisdição (ex.: " Ariquemes" -> "ariquemes")."""
+    return (jurisdicao or "").strip().lower()
+
+
+class IndiceTaxasJurisdicoes:
+    """
+    Índice único das tabelas de taxas de todas as jurisdições (municípios em UFAR e o
+    estado em UPFS), montado uma única vez a partir de carregar_taxas_jurisdicoes.
+
+    A chave é (jurisdição, anexo, porte, potencial) e os valores são TLP/TLI/TLO em
+    cada unidade de UNIDADES_TAXA, lado a lado (NaN quando a tabela da jurisdição não
+    traz a unidade; uma unidade só é considerada ausente quando TLP, TLI e TLO estão
+    todos vazios). A busca é O(1) para qualquer jurisdição.
+    """
+
+    def __init__(self, chaves: pd.Index, valores: np.ndarray):
+        self._chaves = chaves
+        self._valores = valores
+        self._posicoes = {chave: i for i, chave in enumerate(chaves)}
+        self.jurisdicoes = sorted({chave.split("|", 1)[0] for chave in chaves})
+        # IndiceTaxas de cada (jurisdição, unidade), montados no primeiro uso
+        self._indices = {}
+
+    @classmethod
+    def from_dataframe(cls, df_taxas: pd.DataFrame) -> "IndiceTaxasJurisdicoes":
+        """Compila o índice a partir da tabela de carregar_taxas_jurisdicoes (coluna JURISDICAO + TLP_UFAR/.../TLO_UPFS)."""
+        df = df_taxas.dropna(subset=["JURISDICAO", "ANEXO", "PORTE", "POTENCIAL_POLUIDOR"])
+        # Linhas sem nenhum valor não contam: a chave fica para a próxima tabela da jurisdição
+        df = df.loc[df.reindex(columns=COLUNAS_TAXAS_UNIDADES).notna().any(axis=1)]
+        if df.empty:
+            return cls(pd.Index([], dtype=object), np.empty((0, len(COLUNAS_TAXAS_UNIDADES)), dtype=float))
+
+        jurisdicoes = df["JURISDICAO"].astype(str).str.strip().str.lower()
+        chaves = jurisdicoes + "|" + _normalizar_colunas_chave(df["ANEXO"], df["PORTE"], df["POTENCIAL_POLUIDOR"])
+
+        # Mantém a primeira ocorrência de cada chave (a tabela de maior prioridade da jurisdição)
+        primeiras = ~chaves.duplicated(keep="first").to_numpy()
+        valores = df.reindex(columns=COLUNAS_TAXAS_UNIDADES).to_numpy(dtype=float)[primeiras]
+        return cls(pd.Index(chaves.to_numpy()[primeiras], dtype=object), valores)
+
+    def __len__(self) -> int:
+        return len(self._chaves)
+
+    def tem_jurisdicao(self, jurisdicao: Optional[str]) -> bool:
+        """Se há tabela de taxas cadastrada para a jurisdição."""
+        return normalizar_jurisdicao(jurisdicao) in self.jurisdicoes
+
+    def _colunas_unidade(self, unidade: str) -> slice:
+        if unidade not in UNIDADES_TAXA:
+            raise ValueError(f"Unidade de taxa não mapeada: {unidade}")
+        inicio = UNIDADES_TAXA.index(unidade) * len(COLUNAS_TAXAS)
+        return slice(inicio, inicio + len(COLUNAS_TAXAS))
+
+    def buscar(self, jurisdicao: Optional[str], anexo: Optional[str], porte: Optional[str],
+               potencial_poluidor: Optional[str], unidade: str = "UFAR") -> Optional[TaxasUFAR]:
+        """TLP/TLI/TLO da combinação na unidade pedida, ou None se a jurisdição não tiver essa taxa."""
+        chave = normalizar_jurisdicao(jurisdicao) + "|" + "|".join(
+            normalizar_chave_taxa(anexo, porte, potencial_poluidor)
+        )
+        pos = self._posicoes.get(chave)
+        if pos is None:
+            return None
+        tlp, tli, tlo = self._valores[pos, self._colunas_unidade(unidade)]
+        if np.isnan(tlp) and np.isnan(tli) and np.isnan(tlo):
+            return None
+        return TaxasUFAR(float(tlp), float(tli), float(tlo))
+
+    def valores(self, unidade: str = "UFAR") -> np.ndarray:
+        """Matriz (n_chaves, 3) com TLP/TLI/TLO na unidade pedida, na ordem das posições do índice."""
+        return self._valores[:, self._colunas_unidade(unidade)]
+
+    def posicoes_lote(self, jurisdicoes: Sequence, anexos: Sequence, portes: Sequence,
+                      potenciais: Sequence) -> np.ndarray:
+        """Posição de cada combinação em valores() (-1 quando ausente), na ordem das entradas."""
+        jurisdicoes = pd.Series(jurisdicoes, dtype=object).fillna("").astype(str).str.strip().str.lower()
+        chaves = jurisdicoes + "|" + _normalizar_colunas_chave(
+            pd.Series(anexos, dtype=object),
+            pd.Series(portes, dtype=object),
+            pd.Series(potenciais, dtype=object),
+        )
+        return self._chaves.get_indexer(chaves.to_numpy())
+
+    def indice(self, jurisdicao: Optional[str], unidade: str = "UFAR") -> IndiceTaxas:
+        """IndiceTaxas só com as taxas da jurisdição na unidade pedida (vazio se não houver)."""
+        jurisdicao = normalizar_jurisdicao(jurisdicao)
+        indice = self._indices.get((jurisdicao, unidade))
+        if indice is None:
+            prefixo = jurisdicao + "|"
+            posicoes = [i for i, chave in enumerate(self._chaves) if chave.startswith(prefixo)]
+            valores = self.valores(unidade)[posicoes]
+            com_valor = ~np.isnan(valores).all(axis=1)
+            chaves = [self._chaves[i][len(prefixo):] for i in np.asarray(posicoes, dtype=int)[com_valor]]
+            indice = IndiceTaxas(pd.Index(chaves, dtype=object), valores[com_valor])
+            self._indices[(jurisdicao, unidade)] = indice
+        return indice
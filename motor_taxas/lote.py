@@ -0,0 +1,172 @@
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from .calculo import (
+    ERRO_ITEM_NAO_ENCONTRADO,
+    ERRO_JURISDICAO_SEM_TABELA,
+    ERRO_MUNICIPIO_DESCONHECIDO,
+    ERRO_PORTE_NAO_DEFINIDO,
+    ERRO_TAXA_NAO_ENCONTRADA,
+    MAPA_PORTE_TABELA_PARA_APP,
+    SERVICOS,
+)
+from .porte import NOMES_PORTE, PORTE_NAO_DEFINIDO
+
+if TYPE_CHECKING:
+    from .motor import MotorTaxas
+
+# =============================
+# COTAÇÃO EM LOTE
+# =============================
+
+# Colunas de entrada esperadas por padrão
+COLUNA_MUNICIPIO = "MUNICIPIO"
+COLUNA_ITEM = "ITEM"
+COLUNA_MEDIDA = "MEDIDA"
+# Opcional: quando o ITEM vem vazio (ou a coluna ITEM não existe), ele é sugerido pelo CNAE
+COLUNA_CNAE = "CNAE"
+
+# Códigos LP/LI/LO, na ordem das colunas TLP/TLI/TLO
+CODIGOS_LICENCA = [info["codigo"] for info in SERVICOS.values()]
+
+# Colunas acrescentadas ao DataFrame de saída
+COLUNAS_RESULTADO = (
+    ["ATIVIDADE", "PORTE", "POTENCIAL_POLUIDOR", "ANEXO", "VALOR_UFIR", "TABELA_EMPRESTADA"]
+    + [f"{codigo}_UFAR" for codigo in CODIGOS_LICENCA]
+    + [f"{codigo}_REAIS" for codigo in CODIGOS_LICENCA]
+    + ["TOTAL_REAIS", "ERRO"]
+)
+
+
+def medidas_numericas(coluna: pd.Series) -> np.ndarray:
+    """Converte a coluna de medidas em float, aceitando vírgula decimal ("2,5")."""
+    if not pd.api.types.is_numeric_dtype(coluna):
+        coluna = coluna.astype(str).str.strip().str.replace(",", ".", regex=False)
+    return pd.to_numeric(coluna, errors="coerce").to_numpy(dtype=float)
+
+
+def _itens_da_entrada(motor: "MotorTaxas", df: pd.DataFrame, coluna_item: str, coluna_cnae: str):
+    """ITEM de cada linha e, se houver coluna de CNAE, o ITEM sugerido nas linhas sem ITEM (ou None)."""
+    if coluna_cnae not in df.columns:
+        return df[coluna_item].to_numpy(), None
+
+    if coluna_item in df.columns:
+        itens = df[coluna_item].to_numpy(dtype=object)
+        sem_item = df[coluna_item].isna().to_numpy() | (df[coluna_item].astype(str).str.strip() == "").to_numpy()
+    else:
+        itens = np.full(len(df), "", dtype=object)
+        sem_item = np.ones(len(df), dtype=bool)
+
+    itens_sugeridos = np.full(len(df), None, dtype=object)
+    if sem_item.any():
+        sugeridos = motor.sugestoes_cnae.melhores_itens(df[coluna_cnae].to_numpy()[sem_item])
+        itens = itens.copy()
+        itens[sem_item] = sugeridos
+        itens_sugeridos[sem_item] = np.where(sugeridos == "", None, sugeridos)
+    return itens, itens_sugeridos
+
+
+def itens_cotados(resultado: pd.DataFrame, coluna_item: str = COLUNA_ITEM) -> np.ndarray:
+    """
+    ITEM com que cada linha de cotar_lote foi cotada: o da entrada ou, nas linhas sem ITEM
+    cotadas pelo CNAE, o ITEM_SUGERIDO.
+    """
+    if coluna_item in resultado.columns:
+        itens = resultado[coluna_item].to_numpy(dtype=object)
+    else:
+        itens = np.full(len(resultado), "", dtype=object)
+    if "ITEM_SUGERIDO" in resultado.columns:
+        sugeridos = resultado["ITEM_SUGERIDO"].to_numpy(dtype=object)
+        itens = np.where(pd.notna(sugeridos), sugeridos, itens)
+    return pd.Series(itens, dtype=object).fillna("").astype(str).str.strip().to_numpy(dtype=object)
+
+
+def cotar_lote(motor: "MotorTaxas", df: pd.DataFrame,
+               coluna_municipio: str = COLUNA_MUNICIPIO,
+               coluna_item: str = COLUNA_ITEM,
+               coluna_medida: str = COLUNA_MEDIDA,
+               coluna_cnae: str = COLUNA_CNAE) -> pd.DataFrame:
+    """
+    Cota um DataFrame inteiro de uma vez (uma linha por empreendimento).
+
+    Cada linha é ligada ao ANEXO I pelo ITEM e à tabela de taxas pelo
+    (jurisdição do município, anexo, porte, potencial), tudo por operações vetorizadas. O resultado é uma
+    cópia da entrada com as colunas de COLUNAS_RESULTADO; a coluna ERRO traz
+    o código do primeiro problema encontrado na linha (ou None):
+      - ITEM_NAO_ENCONTRADO: ITEM ausente do ANEXO I;
+      - MUNICIPIO_DESCONHECIDO: município fora de MUNICIPIOS_CONFIG;
+      - JURISDICAO_SEM_TABELA: não há tabela de taxas para a jurisdição do município;
+      - PORTE_NAO_DEFINIDO: a medida não cai em nenhuma faixa de porte;
+      - TAXA_NAO_ENCONTRADA: o anexo/porte/potencial não existe na tabela de taxas.
+    Linhas com erro ficam com os valores em NaN. TABELA_EMPRESTADA traz a jurisdição cuja
+    tabela foi usada quando o município ainda não tem a própria (ver MotorTaxas.tabela_emprestada).
+
+    O ITEM deve vir como texto ("3.10" e "3.1" são atividades diferentes). Se a entrada
+    tiver a coluna de CNAE, as linhas sem ITEM são cotadas pela atividade sugerida para
+    o CNAE (motor.sugestoes_cnae) e o resultado ganha a coluna ITEM_SUGERIDO.
+    """
+    n = len(df)
+    itens, itens_sugeridos = _itens_da_entrada(motor, df, coluna_item, coluna_cnae)
+    posicoes = motor.matriz_portes.posicoes_dos_itens(itens)
+    item_ok = posicoes >= 0
+    pos = np.where(item_ok, posicoes, 0)
+
+    codigos = motor.matriz_portes.classificar_codigos_por_linha(posicoes, medidas_numericas(df[coluna_medida]))
+    porte_ok = codigos != PORTE_NAO_DEFINIDO
+
+    ufir = df[coluna_municipio].map(
+        {nome: config["ufir"] for nome, config in motor.municipios.items()}
+    ).to_numpy(dtype=float)
+    municipio_ok = ~np.isnan(ufir)
+
+    # Jurisdição de cada linha, como posição em motor.taxas_jurisdicoes.jurisdicoes (-1 sem tabela)
+    jurisdicoes = motor.taxas_jurisdicoes.jurisdicoes
+    posicoes_jurisdicao = {
+        nome: jurisdicoes.index(motor.jurisdicao(nome)) for nome in motor.municipios if motor.jurisdicao(nome)
+    }
+    jur = df[coluna_municipio].map(posicoes_jurisdicao).fillna(-1).to_numpy(dtype=np.int64)
+    jurisdicao_ok = jur >= 0
+
+    # Posição da taxa de cada (jurisdição, atividade, porte), pré-calculada pelo motor
+    pos_taxa = motor.posicoes_taxas_por_porte[np.maximum(jur, 0), pos, np.where(porte_ok, codigos, 0)]
+    valores_ufar = np.full((n, len(CODIGOS_LICENCA)), np.nan)
+    encontrada = jurisdicao_ok & item_ok & porte_ok & (pos_taxa >= 0)
+    valores_ufar[encontrada] = motor.taxas_jurisdicoes.valores("UFAR")[pos_taxa[encontrada]]
+    # Jurisdições só com UPFS (estado) não têm valor em UFAR
+    taxa_ok = encontrada & ~np.isnan(valores_ufar).all(axis=1)
+    valores_ufar[~(municipio_ok & taxa_ok)] = np.nan
+    valores_reais = valores_ufar * ufir[:, None]
+
+    erro = np.select(
+        # Mesma ordem de verificação de MotorTaxas.cotar
+        [~item_ok, ~municipio_ok, ~jurisdicao_ok, ~porte_ok, ~taxa_ok],
+        [ERRO_ITEM_NAO_ENCONTRADO, ERRO_MUNICIPIO_DESCONHECIDO, ERRO_JURISDICAO_SEM_TABELA,
+         ERRO_PORTE_NAO_DEFINIDO, ERRO_TAXA_NAO_ENCONTRADA],
+        default="",
+    )
+
+    rotulos_porte = np.array(
+        [MAPA_PORTE_TABELA_PARA_APP.get(nome, nome) for nome in NOMES_PORTE] + [None], dtype=object
+    )
+
+    resultado = df.copy()
+    if itens_sugeridos is not None:
+        resultado["ITEM_SUGERIDO"] = itens_sugeridos
+    resultado["ATIVIDADE"] = np.where(item_ok, motor.atividades_por_linha[pos], None)
+    resultado["PORTE"] = np.where(item_ok, rotulos_porte[codigos], None)
+    resultado["POTENCIAL_POLUIDOR"] = np.where(item_ok, motor.potenciais_por_linha[pos], None)
+    resultado["ANEXO"] = np.where(item_ok, motor.anexos_por_linha[pos], None)
+    resultado["VALOR_UFIR"] = ufir
+    emprestadas = df[coluna_municipio].map(
+        {nome: motor.tabela_emprestada(nome) for nome in motor.municipios}
+    ).astype(object)
+    resultado["TABELA_EMPRESTADA"] = emprestadas.where(emprestadas.notna(), None)
+    for j, codigo in enumerate(CODIGOS_LICENCA):
+        resultado[f"{codigo}_UFAR"] = valores_ufar[:, j]
+    for j, codigo in enumerate(CODIGOS_LICENCA):
+        resultado[f"{codigo}_REAIS"] = valores_reais[:, j]
+    resultado["TOTAL_REAIS"] = valores_reais.sum(axis=1)
+    resultado["ERRO"] = pd.Series(erro, index=df.index, dtype=object).replace("", None)
+    return resultado
@@ -0,0 +1,201 @@
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from itertools import islice
+from typing import Callable, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# =============================
+# TEMPOS POR ETAPA
+# =============================
+# Cada etapa medida (carregamento das tabelas, porte, busca de taxas, PDF, gravação...)
+# vira uma amostra (instante, sessão, etapa, duração) num buffer circular em memória. Medir
+# custa duas leituras de relógio e um append; os percentis só são calculados quando o
+# painel de desempenho é aberto. Com um destino configurado (database.iniciar_persistencia_tempos,
+# chamado pelo app e pela API), uma thread grava periodicamente as amostras novas no SQLite.
+
+# Máximo de amostras em memória; as mais antigas saem primeiro
+TAMANHO_BUFFER_TEMPOS = 50_000
+
+# Intervalo (s) entre as gravações das amostras novas
+INTERVALO_PERSISTENCIA_TEMPOS = 30.0
+
+PERCENTIS = (50, 95, 99)
+
+_sessao_atual = contextvars.ContextVar("sessao_medicao", default="")
+
+
+class AmostraTempo(NamedTuple):
+    instante: float  # time.time() do fim da etapa
+    sessao: str
+    etapa: str
+    duracao: float  # segundos
+
+
+def definir_sessao(sessao: str):
+    """Sessão atribuída às amostras medidas a partir daqui (na thread/contexto atual)."""
+    _sessao_atual.set(sessao)
+
+
+class RegistroTempos:
+    """Buffer circular de amostras de tempo, seguro entre threads, com gravação periódica."""
+
+    def __init__(self, tamanho: int = TAMANHO_BUFFER_TEMPOS, intervalo: float = INTERVALO_PERSISTENCIA_TEMPOS):
+        self.tamanho = tamanho
+        self.intervalo = intervalo
+        self.ativo = True
+        self._trava = threading.Lock()
+        self._gravar = None
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self._pid = os.getpid()
+        self._amostras = deque(maxlen=self.tamanho)
+        self._pendentes = 0
+        self._thread = None
+        self._parar = threading.Event()
+        self.registradas = 0
+        self.persistidas = 0
+        self.descartadas = 0
+        self.falhas = 0
+
+    def registrar(self, etapa: str, duracao: float, sessao: Optional[str] = None):
+        amostra = AmostraTempo(time.time(), _sessao_atual.get() if sessao is None else sessao, etapa, duracao)
+        with self._trava:
+            if self._pid != os.getpid():
+                # Processo filho (fork): as amostras e a thread do pai ficam com o pai
+                self._reiniciar()
+            self._amostras.append(amostra)
+            self.registradas += 1
+            if self._pendentes < self.tamanho:
+                self._pendentes += 1
+            else:
+                # Buffer cheio antes da gravação: a amostra mais antiga não chega ao banco
+                self.descartadas += 1
+        if self._gravar is not None and self._thread is None:
+            self._garantir_thread()
+
+    def amostras(self, desde: Optional[float] = None) -> list:
+        """Amostras em memória (a partir do instante desde, se informado)."""
+        with self._trava:
+            amostras = list(self._amostras)
+        if desde is not None:
+            amostras = [a for a in amostras if a.instante >= desde]
+        return amostras
+
+    def configurar_persistencia(self, gravar: Callable[[list], None]):
+        """Define a função que grava uma lista de AmostraTempo e inicia (ou mantém) a gravação periódica."""
+        self._gravar = gravar
+        self._garantir_thread()
+
+    def _garantir_thread(self):
+        with self._trava:
+            if self._thread is None or not self._thread.is_alive():
+                self._parar.clear()
+                self._thread = threading.Thread(target=self._executar, name="persistencia-tempos", daemon=True)
+                self._thread.start()
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            self.persistir()
+
+    def persistir(self) -> int:
+        """Grava as amostras ainda não gravadas; retorna quantas foram gravadas."""
+        if self._gravar is None or self._pid != os.getpid():
+            return 0
+        with self._trava:
+            n = self._pendentes
+            # As n amostras pendentes são as últimas do buffer
+            novas = list(islice(reversed(self._amostras), n))[::-1]
+            self._pendentes = 0
+        if not novas:
+            return 0
+        try:
+            self._gravar(novas)
+        except Exception:
+            with self._trava:
+                self.falhas += len(novas)
+            logger.exception("Falha ao gravar %d amostra(s) de tempo", len(novas))
+            return 0
+        with self._trava:
+            self.persistidas += len(novas)
+        return len(novas)
+
+    def parar(self):
+        """Grava o que estiver pendente e encerra a thread (chamado na saída do processo)."""
+        self._parar.set()
+        self.persistir()
+
+    def metricas(self) -> dict:
+        return {
+            "em_memoria": len(self._amostras),
+            "pendentes": self._pendentes,
+            "registradas": self.registradas,
+            "persistidas": self.persistidas,
+            "descartadas": self.descartadas,
+            "falhas": self.falhas,
+        }
+
+
+_registro = RegistroTempos()
+
+
+def registro_tempos() -> RegistroTempos:
+    """Registro de tempos do processo."""
+    return _registro
+
+
+@contextmanager
+def medir(etapa: str):
+    """Mede o bloco como uma amostra da etapa."""
+    if not _registro.ativo:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        _registro.registrar(etapa, time.perf_counter() - inicio)
+
+
+def medido(etapa: str):
+    """Decorador: cada chamada da função é uma amostra da etapa."""
+    def decorar(funcao):
+        @wraps(funcao)
+        def medida(*args, **kwargs):
+            if not _registro.ativo:
+                return funcao(*args, **kwargs)
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                _registro.registrar(etapa, time.perf_counter() - inicio)
+        return medida
+    return decorar
+
+
+def percentis_por_etapa(etapas, duracoes, percentis=PERCENTIS) -> list[dict]:
+    """
+    Resumo por etapa (amostras e percentis em ms), ordenado pelo maior p50. etapas e
+    duracoes (segundos) são sequências paralelas, uma posição por amostra.
+    """
+    # numpy só aqui: o app importa este módulo antes da tela de login
+    import numpy as np
+
+    etapas = np.asarray(etapas, dtype=object)
+    duracoes = np.asarray(duracoes, dtype=float) * 1000
+    resumo = []
+    for etapa in sorted(set(etapas.tolist())):
+        tempos = duracoes[etapas == etapa]
+        linha = {"etapa": etapa, "amostras": len(tempos)}
+        for p, valor in zip(percentis, np.percentile(tempos, percentis)):
+            linha[f"p{p}_ms"] = float(valor)
+        linha["max_ms"] = float(tempos.max())
+        resumo.append(linha)
+    return sorted(resumo, key=lambda linha: -linha[f"p{percentis[0]}_ms"])
@@ -0,0 +1,292 @@
+import uuid
+from functools import cached_property, lru_cache
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .calculo import (
+    ERRO_ITEM_NAO_ENCONTRADO,
+    ERRO_JURISDICAO_SEM_TABELA,
+    ERRO_MUNICIPIO_DESCONHECIDO,
+    ERRO_PORTE_NAO_DEFINIDO,
+    ERRO_TAXA_NAO_ENCONTRADA,
+    MAPA_PORTE_TABELA_PARA_APP,
+    MAPEAMENTO_PORTES_TABELA,
+    MUNICIPIOS_CONFIG,
+    SERVICOS,
+    Cotacao,
+    ValorLicenca,
+    calcular_taxa,
+    potencial_e_anexo_da_linha,
+    potenciais_e_anexos_da_coluna,
+    texto_da_linha,
+    textos_da_coluna,
+)
+from .artefato import carregar_tabelas_referencia
+from .arvore import ArvoreAtividades, AtividadeAnexo
+from .cache import CacheCotacoes, cache_cotacoes
+from .cnae import IndiceCNAE
+from .indice import IndiceTaxasJurisdicoes, normalizar_jurisdicao
+from .lote import COLUNA_CNAE, COLUNA_ITEM, COLUNA_MEDIDA, COLUNA_MUNICIPIO, cotar_lote
+from .porte import NOMES_PORTE, MatrizPortes, classificar_porte_por_linha_valor
+from .sugestao import SugestoesCNAE
+from .tabelas import (
+    ATIVIDADES_CSV_PATH,
+    TAXAS_CSV_PATH,
+    carregar_atividades_anexo_i,
+    carregar_cnaes,
+    carregar_curadoria_cnae,
+    carregar_tabelas_taxas,
+    colunas_por_unidade,
+)
+
+
+class MotorTaxas:
+    """
+    Tabelas do ANEXO I e de taxas já carregadas e compiladas (índice de taxas por
+    jurisdição e matriz de portes), prontas para cotar sem depender do Streamlit.
+
+    taxas é a tabela de carregar_taxas_jurisdicoes (coluna JURISDICAO); uma tabela única
+    sem essa coluna (carregar_tabelas_taxas) vale para todos os municípios.
+
+    versao_tabelas identifica as tabelas no cache de cotações do processo (o hash das
+    fontes, quando vêm do artefato); sem ela, cada motor tem uma versão própria.
+    """
+
+    def __init__(self, atividades: pd.DataFrame, taxas: pd.DataFrame,
+                 municipios: Optional[dict] = None, cnaes: Optional[pd.DataFrame] = None,
+                 curadoria_cnae: Optional[pd.DataFrame] = None,
+                 taxas_jurisdicoes: Optional[IndiceTaxasJurisdicoes] = None,
+                 indice_cnae: Optional[IndiceCNAE] = None,
+                 versao_tabelas: Optional[str] = None,
+                 cache: Optional[CacheCotacoes] = None):
+        self.atividades = atividades
+        self.versao_tabelas = versao_tabelas or uuid.uuid4().hex
+        self.cache = cache if cache is not None else cache_cotacoes()
+        self.municipios = municipios if municipios is not None else MUNICIPIOS_CONFIG
+        if "JURISDICAO" not in taxas.columns:
+            jurisdicoes = sorted({config.get("jurisdicao", "") for config in self.municipios.values()})
+            taxas = pd.concat([colunas_por_unidade(taxas).assign(JURISDICAO=j) for j in jurisdicoes],
+                              ignore_index=True)
+        self.taxas = taxas
+        self._cnaes = cnaes
+        self._curadoria_cnae = curadoria_cnae
+        self._indice_cnae = indice_cnae
+        # Índices já montados (ex.: lidos do artefato compilado) evitam refazer a normalização
+        self.taxas_jurisdicoes = (
+            taxas_jurisdicoes if taxas_jurisdicoes is not None else IndiceTaxasJurisdicoes.from_dataframe(taxas)
+        )
+        self.matriz_portes = MatrizPortes.from_dataframe(atividades)
+        self._compilar_linhas()
+
+    def _compilar_linhas(self):
+        """
+        Pré-calcula, por linha do ANEXO I, o potencial, o anexo e a posição no índice de
+        taxas de cada jurisdição e porte (-1 quando não há taxa), usados pela cotação em
+        lote, e os rótulos dos grupos.
+        """
+        self.itens_por_linha = textos_da_coluna(self.atividades, "ITEM")
+        self.atividades_por_linha = textos_da_coluna(self.atividades, "Atividade")
+        self.unidades_por_linha = textos_da_coluna(self.atividades, "UNIDADE_DE_MEDIDA")
+        self.potenciais_por_linha, self.anexos_por_linha = potenciais_e_anexos_da_coluna(self.atividades)
+
+        # Rótulo "1 - PESQUISA MINERAL" de cada grupo (linhas do ANEXO I cujo ITEM não tem ponto)
+        self.rotulos_grupo = {}
+        sem_ponto = ~pd.Series(self.itens_por_linha, dtype=object).str.contains(".", regex=False).to_numpy()
+        for item, atividade in zip(self.itens_por_linha[sem_ponto], self.atividades_por_linha[sem_ponto]):
+            self.rotulos_grupo.setdefault(item, f"{item} - {atividade}")
+
+        # posicoes_taxas_por_porte[j, linha, porte], com j na ordem de taxas_jurisdicoes.jurisdicoes
+        n = len(self.atividades)
+        n_jurisdicoes = len(self.taxas_jurisdicoes.jurisdicoes)
+        portes_tabela = [MAPEAMENTO_PORTES_TABELA.get(nome, nome) for nome in NOMES_PORTE]
+        self.posicoes_taxas_por_porte = self.taxas_jurisdicoes.posicoes_lote(
+            np.repeat(np.array(self.taxas_jurisdicoes.jurisdicoes, dtype=object), n * len(portes_tabela)),
+            np.tile(np.repeat(self.anexos_por_linha, len(portes_tabela)), n_jurisdicoes),
+            np.tile(np.array(portes_tabela, dtype=object), n * n_jurisdicoes),
+            np.tile(np.repeat(self.potenciais_por_linha, len(portes_tabela)), n_jurisdicoes),
+        ).reshape(n_jurisdicoes, n, len(portes_tabela))
+
+    def jurisdicao(self, municipio: str) -> Optional[str]:
+        """
+        Jurisdição cuja tabela de taxas vale para o município: a dele ou, enquanto ela não
+        existir, a jurisdicao_substituta da configuração (None se nenhuma tiver tabela).
+        """
+        config_municipio = self.municipios.get(municipio)
+        if config_municipio is None:
+            return None
+        for chave in ("jurisdicao", "jurisdicao_substituta"):
+            jurisdicao = normalizar_jurisdicao(config_municipio.get(chave, ""))
+            if self.taxas_jurisdicoes.tem_jurisdicao(jurisdicao):
+                return jurisdicao
+        return None
+
+    def tabela_emprestada(self, municipio: str) -> Optional[str]:
+        """Jurisdição substituta cuja tabela o município está usando (None se usa a própria ou nenhuma)."""
+        jurisdicao = self.jurisdicao(municipio)
+        if jurisdicao is None or jurisdicao == normalizar_jurisdicao(self.municipios[municipio].get("jurisdicao", "")):
+            return None
+        return jurisdicao
+
+    @cached_property
+    def arvore_atividades(self) -> ArvoreAtividades:
+        """Grupos e subatividades do ANEXO I para a interface, montados no primeiro uso."""
+        return ArvoreAtividades.montar(
+            self.itens_por_linha, self.atividades_por_linha, self.unidades_por_linha,
+            self.potenciais_por_linha, self.anexos_por_linha,
+            self.matriz_portes.limites_inf, self.matriz_portes.limites_sup,
+        )
+
+    @cached_property
+    def sugestoes_cnae(self) -> SugestoesCNAE:
+        """
+        Sugestões CNAE -> atividade do ANEXO I, montadas no primeiro uso (com os CNAEs e a
+        curadoria padrão quando não foram passados ao motor).
+        """
+        indice_cnae = self._indice_cnae
+        if indice_cnae is None:
+            indice_cnae = IndiceCNAE.from_dataframe(self._cnaes if self._cnaes is not None else carregar_cnaes())
+        curadoria = self._curadoria_cnae if self._curadoria_cnae is not None else carregar_curadoria_cnae()
+        return SugestoesCNAE(self.atividades, indice_cnae, curadoria)
+
+    @classmethod
+    def carregar(cls, caminho_atividades: str = ATIVIDADES_CSV_PATH,
+                 caminho_taxas: str = TAXAS_CSV_PATH) -> "MotorTaxas":
+        """
+        Lê o ANEXO I e a tabela de taxas e compila o motor. Com os caminhos padrão, as
+        tabelas (com as taxas de todas as jurisdições) vêm do artefato compilado,
+        recompilado sozinho se algum CSV mudar; outro caminho_taxas é uma tabela única
+        que vale para todos os municípios.
+        """
+        if (caminho_atividades, caminho_taxas) == (ATIVIDADES_CSV_PATH, TAXAS_CSV_PATH):
+            referencia = carregar_tabelas_referencia()
+            return cls(referencia.atividades, referencia.taxas, cnaes=referencia.cnaes,
+                       taxas_jurisdicoes=referencia.taxas_jurisdicoes, indice_cnae=referencia.indice_cnae,
+                       versao_tabelas=referencia.hash_fontes)
+        return cls(carregar_atividades_anexo_i(caminho_atividades), carregar_tabelas_taxas(caminho_taxas))
+
+    def linha_atividade(self, item: str) -> Optional[pd.Series]:
+        """Linha do ANEXO I do ITEM informado (a primeira, se o ITEM se repetir)."""
+        pos = self.matriz_portes.posicoes_dos_itens([item])[0]
+        if pos < 0:
+            return None
+        return self.atividades.iloc[pos]
+
+    def rotulo_grupo(self, item: str) -> str:
+        """Rótulo do grupo do ANEXO I a que o ITEM pertence (ex.: "1.1" -> "1 - PESQUISA MINERAL")."""
+        base = str(item).strip().split(".")[0]
+        return self.rotulos_grupo.get(base, base)
+
+    def atividade_da_linha(self, posicao: int) -> AtividadeAnexo:
+        """Linha do ANEXO I já extraída (os mesmos campos da árvore de atividades)."""
+        return AtividadeAnexo(
+            posicao=posicao,
+            item=self.itens_por_linha[posicao],
+            atividade=self.atividades_por_linha[posicao],
+            unidade_medida=self.unidades_por_linha[posicao],
+            potencial_poluidor=self.potenciais_por_linha[posicao],
+            anexo=self.anexos_por_linha[posicao],
+            limites_inf=tuple(float(v) for v in self.matriz_portes.limites_inf[posicao]),
+            limites_sup=tuple(float(v) for v in self.matriz_portes.limites_sup[posicao]),
+        )
+
+    def cotar(self, municipio: str, item: str, medida: float) -> Cotacao:
+        """Calcula porte, potencial poluidor e LP/LI/LO (UFAR e R$) de um ITEM do ANEXO I."""
+        posicao = self.matriz_portes.posicao_do_item(item)
+        if posicao < 0:
+            return Cotacao(
+                municipio=municipio, item=str(item), atividade="", unidade_medida="",
+                medida=medida, porte=None, potencial_poluidor="", anexo="",
+                valor_ufir=self.municipios.get(municipio, {}).get("ufir", 0.0),
+                erro=ERRO_ITEM_NAO_ENCONTRADO, tabela_emprestada=self.tabela_emprestada(municipio),
+            )
+        return self.cotar_atividade(municipio, self.atividade_da_linha(posicao), medida)
+
+    def cotar_linha(self, municipio: str, linha: pd.Series, medida: float) -> Cotacao:
+        """Como cotar, recebendo diretamente a linha do ANEXO I já selecionada."""
+        potencial, anexo = potencial_e_anexo_da_linha(linha)
+        return self._cotar(
+            municipio, texto_da_linha(linha, "ITEM"), texto_da_linha(linha, "Atividade"),
+            texto_da_linha(linha, "UNIDADE_DE_MEDIDA"), potencial, anexo,
+            classificar_porte_por_linha_valor(float(medida), linha), medida,
+        )
+
+    def cotar_atividade(self, municipio: str, atividade: AtividadeAnexo, medida: float) -> Cotacao:
+        """Como cotar_linha, recebendo a subatividade da árvore de atividades (sem pandas)."""
+        return self._cotar(
+            municipio, atividade.item, atividade.atividade, atividade.unidade_medida,
+            atividade.potencial_poluidor, atividade.anexo, atividade.classificar_porte(float(medida)), medida,
+        )
+
+    def _cotar(self, municipio: str, item: str, atividade: str, unidade_medida: str, potencial: str,
+               anexo: str, porte_encontrado: Optional[str], medida: float) -> Cotacao:
+        porte = None if porte_encontrado is None else MAPA_PORTE_TABELA_PARA_APP.get(porte_encontrado, porte_encontrado)
+
+        config_municipio = self.municipios.get(municipio)
+        base = dict(
+            municipio=municipio,
+            item=item,
+            atividade=atividade,
+            unidade_medida=unidade_medida,
+            medida=medida,
+            porte=porte,
+            potencial_poluidor=potencial,
+            anexo=anexo,
+            valor_ufir=config_municipio["ufir"] if config_municipio else 0.0,
+            tabela_emprestada=self.tabela_emprestada(municipio),
+        )
+
+        if config_municipio is None:
+            return Cotacao(**base, erro=ERRO_MUNICIPIO_DESCONHECIDO)
+        jurisdicao = self.jurisdicao(municipio)
+        if jurisdicao is None:
+            return Cotacao(**base, erro=ERRO_JURISDICAO_SEM_TABELA)
+        if porte is None:
+            return Cotacao(**base, erro=ERRO_PORTE_NAO_DEFINIDO)
+
+        # Os valores só dependem da tabela da jurisdição, da UFIR, do anexo, do porte e do potencial
+        chave = (jurisdicao, config_municipio["ufir"], anexo, porte, potencial)
+        resultado = self.cache.obter(self.versao_tabelas, chave)
+        if resultado is None:
+            resultado = self._licencas(jurisdicao, config_municipio["ufir"], anexo, porte, potencial)
+            self.cache.guardar(self.versao_tabelas, chave, resultado)
+        if isinstance(resultado, str):
+            return Cotacao(**base, erro=resultado)
+        return Cotacao(**base, licencas=resultado)
+
+    def _licencas(self, jurisdicao: str, valor_ufir: float, anexo: str, porte: str, potencial: str):
+        """LP/LI/LO da combinação, ou ERRO_TAXA_NAO_ENCONTRADA se faltar alguma taxa."""
+        licencas = []
+        for servico, info in SERVICOS.items():
+            valores = calcular_taxa(
+                servico=servico,
+                porte_nome=porte,
+                anexo=anexo,
+                potencial_poluidor=potencial,
+                indice=self.taxas_jurisdicoes.indice(jurisdicao),
+                valor_ufir=valor_ufir,
+            )
+            if valores is None:
+                return ERRO_TAXA_NAO_ENCONTRADA
+            valor_reais, valor_ufar = valores
+            licencas.append(ValorLicenca(servico, info["codigo"], info["descricao"], valor_ufar, valor_reais))
+        return tuple(licencas)
+
+    def cotar_lote(self, df: pd.DataFrame, coluna_municipio: str = COLUNA_MUNICIPIO,
+                   coluna_item: str = COLUNA_ITEM, coluna_medida: str = COLUNA_MEDIDA,
+                   coluna_cnae: str = COLUNA_CNAE) -> pd.DataFrame:
+        """Cota um DataFrame de empreendimentos de uma vez (ver motor_taxas.lote.cotar_lote)."""
+        return cotar_lote(self, df, coluna_municipio, coluna_item, coluna_medida, coluna_cnae)
+
+
+@lru_cache(maxsize=None)
+def obter_motor(caminho_atividades: str = ATIVIDADES_CSV_PATH,
+                caminho_taxas: str = TAXAS_CSV_PATH) -> MotorTaxas:
+    """Motor compartilhado pelo processo: as tabelas são lidas uma única vez por caminho."""
+    return MotorTaxas.carregar(caminho_atividades, caminho_taxas)
+
+
+def cotar(municipio: str, item: str, medida: float) -> Cotacao:
+    """Atalho para obter_motor().cotar com as tabelas padrão."""
+    return obter_motor().cotar(municipio, item, medida)
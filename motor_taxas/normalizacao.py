@@ -0,0 +1,50 @@
+import re
+import unicodedata
+
+# =============================
+# NORMALIZAÇÕES
+# =============================
+
+def normalizar_potencial_poluidor(valor: str) -> str:
+    """Normaliza o potencial poluidor vindo do CSV (BAIXO/MÉDIO/ALTO) para Baixo/Médio/Alto."""
+    if not valor:
+        return "Médio"
+    v = valor.strip().upper()
+    if "BAIX" in v:
+        return "Baixo"
+    if "MÉD" in v or "MED" in v:
+        return "Médio"
+    if "ALTO" in v:
+        return "Alto"
+    return "Médio"
+
+
+def inferir_tipo_medicao_por_unidade(unidade: str) -> str:
+    """Inferir o tipo de medição (area, potencia, funcionarios) a partir do texto da UNIDADE_DE_MEDIDA."""
+    if not unidade:
+        return "area"
+    u = unidade.lower()
+    if any(token in u for token in ["hectare", "ha", "m²", "m2", "área", "area"]):
+        return "area"
+    if any(token in u for token in ["kw", "potência", "potencia"]):
+        return "potencia"
+    if any(token in u for token in ["funcion", "empregado", "trabalhador", "pessoa"]):
+        return "funcionarios"
+    # Padrão
+    return "area"
+
+
+def strip_accents(s: str) -> str:
+    """Remove acentos: 'Até' -> 'Ate'."""
+    return "".join(
+        c for c in unicodedata.normalize("NFD", s)
+        if unicodedata.category(c) != "Mn"
+    )
+
+
+_NAO_ALFANUMERICO = re.compile(r"[^a-z0-9]+")
+
+
+def normalizar_texto_busca(texto: str) -> str:
+    """Texto para busca: sem acentos, minúsculo e só com letras/dígitos separados por espaço."""
+    return _NAO_ALFANUMERICO.sub(" ", strip_accents(texto or "").lower()).strip()
@@ -0,0 +1,336 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import Optional
+
+from fpdf import FPDF
+
+from .medicao import medido
+
+# =============================
+# GERAÇÃO DE PDF
+# =============================
+
+# Logo impresso no cabeçalho de cada página
+LOGO_PATH = 'atenas.jpeg'
+
+# Caracteres comuns no ANEXO I que não existem em latin-1 (única codificação das fontes do FPDF)
+SUBSTITUICOES_LATIN1 = str.maketrans({"–": "-", "—": "-", "‘": "'", "’": "'", "“": '"', "”": '"', "…": "..."})
+
+OBSERVACAO = ('Observação: Os valores são estimativas baseadas na legislação municipal. O valor final pode variar '
+              'conforme análise técnica do órgão ambiental. As taxas podem ser parceladas em até 6 vezes.')
+
+
+def texto_latin1(texto) -> str:
+    """Adapta o texto às fontes do FPDF (latin-1), trocando ou descartando caracteres fora dela."""
+    return str(texto).translate(SUBSTITUICOES_LATIN1).encode('latin-1', 'replace').decode('latin-1')
+
+
+# =============================
+# PARTES FIXAS DO DOCUMENTO
+# =============================
+# Cada função desenha um trecho que não depende da cotação, sempre pela API pública do FPDF.
+# Os trechos são desenhados de novo em cada PDF: o FPDF 1.7 não tem API pública para
+# reaproveitar entre documentos a imagem já decodificada ou o conteúdo já desenhado, e
+# copiar um documento pré-desenhado (copy.deepcopy) custa mais do que redesenhá-lo. Só a
+# conferência do logo é feita uma vez por processo (logo_do_cabecalho).
+
+def _desenhar_cabecalho(pdf, logo: Optional[str]):
+    # Logo
+    if logo is not None:
+        pdf.image(logo, 10, 8, 33)
+    pdf.set_font('Arial', 'B', 15)
+    pdf.cell(80)
+    pdf.cell(30, 10, 'Calculadora de Taxas Ambientais', 0, 0, 'C')
+    pdf.ln(20)
+
+
+def _desenhar_inicio(pdf):
+    pdf.ln(10)
+    pdf.set_font('Arial', '', 12)
+
+    # Dados do Empreendimento
+    pdf.set_fill_color(200, 220, 255)
+    pdf.cell(0, 10, 'Dados do Empreendimento', 0, 1, 'L', 1)
+    pdf.ln(5)
+
+    pdf.set_font('Arial', 'B', 10)
+    pdf.cell(40, 10, 'CNPJ/CPF:', 0, 0)
+
+
+def _desenhar_rotulo(pdf, rotulo):
+    pdf.set_font('Arial', 'B', 10)
+    pdf.cell(40, 10, rotulo, 0, 0)
+
+
+def _desenhar_cabecalho_tabela(pdf):
+    pdf.ln(10)
+
+    # Valores
+    pdf.set_font('Arial', '', 12)
+    pdf.set_fill_color(200, 220, 255)
+    pdf.cell(0, 10, 'Valores Estimados das Taxas', 0, 1, 'L', 1)
+    pdf.ln(5)
+
+    pdf.set_font('Arial', 'B', 10)
+    pdf.cell(60, 10, 'Licença', 1, 0, 'C')
+    pdf.cell(40, 10, 'Valor (UFAR)', 1, 0, 'C')
+    pdf.cell(40, 10, 'Valor (R$)', 1, 0, 'C')
+    pdf.ln()
+
+
+def _desenhar_rotulo_total(pdf):
+    pdf.ln(5)
+    pdf.set_font('Arial', 'B', 10)
+    pdf.cell(100, 10, 'Total Estimado:', 0, 0, 'R')
+
+
+def _desenhar_observacao(pdf):
+    pdf.ln(10)
+    pdf.set_font('Arial', 'I', 8)
+    pdf.multi_cell(0, 5, OBSERVACAO)
+
+
+@lru_cache(maxsize=None)
+def logo_do_cabecalho(caminho: str = LOGO_PATH) -> Optional[str]:
+    """
+    Caminho do logo, se o FPDF consegue imprimi-lo (conferido uma vez por processo, num
+    documento de rascunho), ou None. Antes, cada página tentava abri-lo e engolia o erro.
+    """
+    rascunho = FPDF()
+    rascunho.add_page()
+    try:
+        rascunho.image(caminho, 10, 8, 33)
+    except Exception:
+        return None
+    return caminho
+
+
+class PDF(FPDF):
+    def __init__(self, logo: Optional[str] = None):
+        super().__init__()
+        self.logo = logo
+
+    def header(self):
+        _desenhar_cabecalho(self, self.logo)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font('Arial', 'I', 8)
+        self.cell(0, 10, 'Atenas Projetos Ambientais - Página ' + str(self.page_no()) + '/{nb}', 0, 0, 'C')
+
+
+@medido("gerar_pdf")
+def gerar_pdf(municipio, grupo, atividade, medida, porte, potencial, ufir, valores, cnpj_cpf, cnaes_list):
+    """Gera o resumo da cotação em PDF e retorna os bytes do documento."""
+    municipio, grupo, atividade, medida, porte, potencial, cnpj_cpf = map(
+        texto_latin1, (municipio, grupo, atividade, medida, porte, potencial, cnpj_cpf)
+    )
+    cnaes_list = [texto_latin1(cnae) for cnae in cnaes_list]
+
+    pdf = PDF(logo_do_cabecalho())
+    pdf.alias_nb_pages()
+    pdf.add_page()
+
+    _desenhar_inicio(pdf)
+    pdf.set_font('Arial', '', 10)
+    pdf.cell(0, 10, cnpj_cpf, 0, 1)
+
+    # Multi-cell para CNAEs pois pode ser longo
+    _desenhar_rotulo(pdf, 'CNAEs:')
+    pdf.set_font('Arial', '', 10)
+    pdf.multi_cell(0, 10, "; ".join(cnaes_list))
+
+    for rotulo, valor, multilinha in [
+        ('Município:', municipio, False),
+        ('Grupo:', grupo, True),
+        ('Atividade:', atividade, True),
+        ('Medida:', medida, False),
+        ('Porte:', porte, False),
+        ('Potencial Poluidor:', potencial, False),
+    ]:
+        _desenhar_rotulo(pdf, rotulo)
+        pdf.set_font('Arial', '', 10)
+        if multilinha:
+            pdf.multi_cell(0, 10, valor)
+        else:
+            pdf.cell(0, 10, valor, 0, 1)
+
+    _desenhar_cabecalho_tabela(pdf)
+
+    pdf.set_font('Arial', '', 10)
+    total = 0
+    for servico, dados in valores.items():
+        pdf.cell(60, 10, f"{dados['codigo']} - {servico}", 1, 0)
+        pdf.cell(40, 10, f"{dados['valor_ufar']:.2f}", 1, 0, 'R')
+        pdf.cell(40, 10, f"R$ {dados['valor_reais']:,.2f}", 1, 0, 'R')
+        pdf.ln()
+        total += dados['valor_reais']
+
+    _desenhar_rotulo_total(pdf)
+    pdf.set_font('Arial', 'B', 10)
+    pdf.cell(40, 10, f"R$ {total:,.2f}", 0, 1, 'R')
+
+    _desenhar_observacao(pdf)
+
+    return pdf.output(dest='S').encode('latin-1')
+
+
+# =============================
+# RENDERIZAÇÃO EM SEGUNDO PLANO
+# =============================
+# solicitar_pdf devolve na hora um Future com os bytes do resumo; threads compartilhadas
+# pelo processo renderizam os pedidos de uma fila limitada. Pedidos idênticos (mesmos
+# argumentos) que chegam enquanto o primeiro ainda não terminou recebem o mesmo Future.
+
+# Threads que renderizam PDFs
+TRABALHADORES_PDF = 2
+
+# Máximo de PDFs aguardando renderização; com a fila cheia, o PDF é gerado na hora
+TAMANHO_FILA_PDF = 64
+
+# Espera máxima (s) pelos bytes quando o usuário pede o download
+TEMPO_MAXIMO_PDF = 30.0
+
+_PARAR = object()
+
+
+class RenderizadorPDF:
+    """Pool de threads com fila limitada que gera os PDFs fora do script da página."""
+
+    def __init__(self, trabalhadores=TRABALHADORES_PDF, tamanho_fila=TAMANHO_FILA_PDF):
+        self.trabalhadores = trabalhadores
+        self.tamanho_fila = tamanho_fila
+        self._trava = threading.Lock()
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self._pid = os.getpid()
+        self._fila = queue.Queue(maxsize=self.tamanho_fila)
+        self._threads = []
+        self._em_andamento = {}
+        self.solicitados = 0
+        self.coalescidos = 0
+        self.renderizados = 0
+        self.renderizacoes_sincronas = 0
+        self.falhas = 0
+        self.tempo_total = 0.0
+        self.espera_total = 0.0
+
+    def _garantir_threads(self):
+        # Chamado com a trava
+        if self._pid != os.getpid():
+            # Processo filho (fork): as threads do pai não existem aqui
+            self._reiniciar()
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        while len(self._threads) < self.trabalhadores:
+            thread = threading.Thread(target=self._executar, name=f"renderizador-pdf-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def solicitar(self, *argumentos) -> Future:
+        """Agenda gerar_pdf(*argumentos) e devolve o Future com os bytes do documento."""
+        chave = repr(argumentos)
+        with self._trava:
+            self._garantir_threads()
+            self.solicitados += 1
+            futuro = self._em_andamento.get(chave)
+            if futuro is not None:
+                self.coalescidos += 1
+                return futuro
+            futuro = Future()
+            self._em_andamento[chave] = futuro
+        tarefa = (chave, argumentos, futuro, time.perf_counter())
+        try:
+            self._fila.put_nowait(tarefa)
+        except queue.Full:
+            # Sem espaço na fila: renderiza na hora para não perder o pedido
+            with self._trava:
+                self.renderizacoes_sincronas += 1
+            self._renderizar(*tarefa)
+        return futuro
+
+    def _executar(self):
+        while True:
+            tarefa = self._fila.get()
+            try:
+                if tarefa is _PARAR:
+                    break
+                self._renderizar(*tarefa)
+            finally:
+                self._fila.task_done()
+
+    def _renderizar(self, chave, argumentos, futuro: Future, enfileirado: float):
+        inicio = time.perf_counter()
+        try:
+            futuro.set_result(gerar_pdf(*argumentos))
+            falhou = False
+        except Exception as erro:
+            futuro.set_exception(erro)
+            falhou = True
+        fim = time.perf_counter()
+        with self._trava:
+            self._em_andamento.pop(chave, None)
+            self.falhas += falhou
+            self.renderizados += not falhou
+            self.tempo_total += fim - inicio
+            self.espera_total += inicio - enfileirado
+
+    def descarregar(self, timeout=None) -> bool:
+        """Espera até que todos os PDFs enfileirados tenham sido renderizados."""
+        if self._pid != os.getpid():
+            return True
+        limite = None if timeout is None else time.monotonic() + timeout
+        with self._fila.all_tasks_done:
+            while self._fila.unfinished_tasks:
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    return False
+                self._fila.all_tasks_done.wait(restante)
+        return True
+
+    def parar(self, timeout=10):
+        """Renderiza o que estiver na fila e encerra as threads (chamado na saída do processo)."""
+        if self._pid != os.getpid():
+            return
+        threads = [thread for thread in self._threads if thread.is_alive()]
+        for _ in threads:
+            self._fila.put(_PARAR)
+        for thread in threads:
+            thread.join(timeout)
+
+    def metricas(self) -> dict:
+        """Profundidade da fila, pedidos coalescidos e tempos de espera e de renderização."""
+        concluidos = self.renderizados + self.falhas
+        return {
+            "profundidade_fila": self._fila.qsize(),
+            "em_andamento": len(self._em_andamento),
+            "trabalhadores": self.trabalhadores,
+            "solicitados": self.solicitados,
+            "coalescidos": self.coalescidos,
+            "renderizados": self.renderizados,
+            "renderizacoes_sincronas": self.renderizacoes_sincronas,
+            "falhas": self.falhas,
+            "tempo_medio_ms": self.tempo_total / concluidos * 1000 if concluidos else 0.0,
+            "espera_media_ms": self.espera_total / concluidos * 1000 if concluidos else 0.0,
+        }
+
+
+_renderizador = RenderizadorPDF()
+atexit.register(_renderizador.parar)
+
+
+def solicitar_pdf(municipio, grupo, atividade, medida, porte, potencial, ufir, valores, cnpj_cpf, cnaes_list) -> Future:
+    """Como gerar_pdf, mas em segundo plano: devolve na hora um Future com os bytes do documento."""
+    return _renderizador.solicitar(
+        municipio, grupo, atividade, medida, porte, potencial, ufir, valores, cnpj_cpf, list(cnaes_list)
+    )
+
+
+def metricas_renderizacao_pdf() -> dict:
+    """Métricas do pool de renderização de PDFs."""
+    return _renderizador.metricas()
@@ -0,0 +1,185 @@
+import csv
+import os
+import re
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+import numpy as np
+
+from .arquivo import iniciar_processo, ler_blocos, mapear_em_ordem, motor_do_processo
+from .calculo import SERVICOS
+from .lote import itens_cotados
+from .pdf import gerar_pdf
+from .tabelas import ATIVIDADES_CSV_PATH, TAXAS_CSV_PATH
+
+# =============================
+# GERAÇÃO DE PDFs EM LOTE (ZIP)
+# =============================
+
+# Colunas de entrada além de MUNICIPIO / ITEM / MEDIDA
+COLUNA_CNPJ = "CNPJ"
+COLUNA_CNAES = "CNAES"
+
+# Linhas por bloco: cada bloco gera um PDF por linha dentro do processo de trabalho
+TAMANHO_BLOCO_PDF = 200
+
+# Código de erro de uma linha cotada cujo PDF não pôde ser gerado
+ERRO_PDF = "ERRO_PDF"
+
+# Arquivo, dentro do ZIP, com o resultado de cada linha da entrada
+NOME_INDICE_ZIP = "indice.csv"
+
+
+def nome_arquivo_pdf(numero_linha: int, cnpj_cpf: str) -> str:
+    """Nome do PDF no ZIP: número da linha (garante unicidade) + CNPJ/CPF só com dígitos."""
+    digitos = re.sub(r"\D", "", cnpj_cpf or "") or "sem_documento"
+    return f"{numero_linha:07d}_{digitos}.pdf"
+
+
+def valores_da_linha(linha: dict) -> dict:
+    """Monta o dicionário de valores por licença, no formato de gerar_pdf, a partir de uma linha de cotar_lote."""
+    return {
+        servico: {
+            "valor_reais": linha[f"{info['codigo']}_REAIS"],
+            "valor_ufar": linha[f"{info['codigo']}_UFAR"],
+            "codigo": info["codigo"],
+            "descricao": info["descricao"],
+        }
+        for servico, info in SERVICOS.items()
+    }
+
+
+def _renderizar_bloco(tarefa: tuple) -> tuple[list, list, float]:
+    """Cota um bloco e gera um PDF por linha cotada, dentro do processo de trabalho."""
+    bloco, primeira_linha, colunas = tarefa
+    motor = motor_do_processo()
+    inicio = time.perf_counter()
+
+    resultado = motor.cotar_lote(bloco, *colunas)
+    coluna_item, coluna_medida = colunas[1], colunas[2]
+    itens = itens_cotados(resultado, coluna_item)
+    posicoes = motor.matriz_portes.posicoes_dos_itens(itens)
+    unidades = np.where(posicoes >= 0, motor.unidades_por_linha[np.maximum(posicoes, 0)], "")
+
+    pdfs, indice = [], []
+    # Tuplas simples (name=None): com namedtuple, colunas como "Município - UF" seriam renomeadas
+    nomes_colunas = list(resultado.columns)
+    linhas = zip(resultado.itertuples(index=False, name=None), itens, unidades)
+    for numero, (valores, item, unidade) in enumerate(linhas, start=primeira_linha):
+        linha = dict(zip(nomes_colunas, valores))
+        cnpj_cpf = str(linha.get(COLUNA_CNPJ) or "")
+        erro = linha["ERRO"]
+        nome = ""
+        if erro is None:
+            medida = linha[coluna_medida]
+            cnaes = str(linha.get(COLUNA_CNAES) or "")
+            try:
+                pdf_bytes = gerar_pdf(
+                    linha[colunas[0]],
+                    motor.rotulo_grupo(item),
+                    linha["ATIVIDADE"],
+                    f"{medida} ({unidade})" if unidade else f"{medida}",
+                    linha["PORTE"],
+                    linha["POTENCIAL_POLUIDOR"],
+                    linha["VALOR_UFIR"],
+                    valores_da_linha(linha),
+                    cnpj_cpf,
+                    [c.strip() for c in cnaes.split(";") if c.strip()],
+                )
+                nome = nome_arquivo_pdf(numero, cnpj_cpf)
+                pdfs.append((nome, pdf_bytes))
+            except Exception:
+                erro = ERRO_PDF
+        indice.append((numero, cnpj_cpf, nome, erro or ""))
+
+    return pdfs, indice, time.perf_counter() - inicio
+
+
+class EstatisticasPdfLote:
+    """Progresso e vazão de uma execução de gerar_pdfs_em_lote."""
+
+    def __init__(self):
+        self.linhas = 0
+        self.pdfs = 0
+        self.bytes_pdf = 0
+        self.renderizacao = 0.0
+        self.escrita_zip = 0.0
+        self.total = 0.0
+
+    @property
+    def pdfs_por_segundo(self) -> float:
+        return self.pdfs / self.total if self.total else 0.0
+
+    def relatorio(self) -> str:
+        """Resumo legível. Renderização soma o tempo de todos os processos."""
+        return "\n".join([
+            f"Linhas: {self.linhas:,} | PDFs: {self.pdfs:,} | sem PDF: {self.linhas - self.pdfs:,}",
+            f"Tempo total:              {self.total:9.3f} s  ({self.pdfs_por_segundo:,.1f} PDFs/s)",
+            f"Renderização (processos): {self.renderizacao:9.3f} s",
+            f"Escrita do ZIP:           {self.escrita_zip:9.3f} s",
+            f"Tamanho médio do PDF:     {self.bytes_pdf / max(self.pdfs, 1) / 1024:9.1f} KiB",
+        ])
+
+
+def gerar_pdfs_em_lote(entrada: str, saida_zip: str,
+                       processos: Optional[int] = None,
+                       tamanho_bloco: int = TAMANHO_BLOCO_PDF,
+                       formato_entrada: Optional[str] = None,
+                       colunas: tuple[str, str, str] = ("MUNICIPIO", "ITEM", "MEDIDA"),
+                       caminho_atividades: str = ATIVIDADES_CSV_PATH,
+                       caminho_taxas: str = TAXAS_CSV_PATH,
+                       ao_progredir: Optional[Callable[[EstatisticasPdfLote], None]] = None) -> EstatisticasPdfLote:
+    """
+    Gera um PDF (mesmo layout de gerar_pdf) para cada linha de um arquivo CSV/JSONL e
+    grava todos em um ZIP, com o trabalho dividido entre vários processos.
+
+    Os PDFs são escritos no ZIP à medida que cada bloco fica pronto, na ordem da entrada;
+    só os blocos em andamento ficam em memória. O ZIP inclui NOME_INDICE_ZIP com o
+    arquivo gerado ou o código de erro de cada linha.
+    """
+    processos = processos or os.cpu_count() or 1
+    estatisticas = EstatisticasPdfLote()
+    inicio_total = time.perf_counter()
+
+    def tarefas():
+        primeira_linha = 1
+        for bloco in ler_blocos(entrada, tamanho_bloco, formato_entrada):
+            yield bloco, primeira_linha, colunas
+            primeira_linha += len(bloco)
+
+    with ProcessPoolExecutor(
+        max_workers=processos,
+        initializer=iniciar_processo,
+        initargs=(caminho_atividades, caminho_taxas),
+    ) as executor, zipfile.ZipFile(saida_zip, "w", zipfile.ZIP_DEFLATED) as arquivo_zip, \
+            tempfile.TemporaryFile("w+", encoding="utf-8", newline="") as arquivo_indice:
+        escritor_indice = csv.writer(arquivo_indice)
+        escritor_indice.writerow(["LINHA", COLUNA_CNPJ, "ARQUIVO", "ERRO"])
+
+        for pdfs, indice, t_renderizacao in mapear_em_ordem(
+            executor, _renderizar_bloco, tarefas(), max_pendentes=2 * processos
+        ):
+            inicio = time.perf_counter()
+            for nome, pdf_bytes in pdfs:
+                arquivo_zip.writestr(nome, pdf_bytes)
+                estatisticas.bytes_pdf += len(pdf_bytes)
+            escritor_indice.writerows(indice)
+            estatisticas.escrita_zip += time.perf_counter() - inicio
+
+            estatisticas.linhas += len(indice)
+            estatisticas.pdfs += len(pdfs)
+            estatisticas.renderizacao += t_renderizacao
+            estatisticas.total = time.perf_counter() - inicio_total
+            if ao_progredir:
+                ao_progredir(estatisticas)
+
+        arquivo_indice.seek(0)
+        with arquivo_zip.open(NOME_INDICE_ZIP, "w") as destino:
+            for linha in arquivo_indice:
+                destino.write(linha.encode("utf-8"))
+
+    estatisticas.total = time.perf_counter() - inicio_total
+    return estatisticas
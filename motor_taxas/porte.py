@@ -0,0 +1,174 @@
+from functools import cached_property
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .medicao import medido
+
+# =============================
+# CÁLCULO DE PORTE A PARTIR DE PORTE_*_MIN/MAX
+# =============================
+
+# Faixas de porte do ANEXO I, na ordem de avaliação
+SPANS_PORTE = [
+    ("Mínimo",       "PORTE_MINIMO_MIN",       "PORTE_MINIMO_MAX"),
+    ("Pequeno",      "PORTE_PEQUENO_MIN",      "PORTE_PEQUENO_MAX"),
+    ("Médio",        "PORTE_MEDIO_MIN",        "PORTE_MEDIO_MAX"),
+    ("Grande",       "PORTE_GRANDE_MIN",       "PORTE_GRANDE_MAX"),
+    ("Excepcional",  "PORTE_EXCEPCIONAL_MIN",  "PORTE_EXCEPCIONAL_MAX"),
+]
+
+NOMES_PORTE = [nome for nome, _, _ in SPANS_PORTE]
+
+# Código devolvido pela classificação em lote quando nenhuma faixa se aplica
+PORTE_NAO_DEFINIDO = -1
+
+
+@medido("classificar_porte")
+def classificar_porte_por_linha_valor(valor: float, linha: pd.Series) -> Optional[str]:
+    """
+    Classifica o porte com lógica inclusiva para evitar 'buracos' entre faixas.
+    """
+    for nome, col_min, col_max in SPANS_PORTE:
+        lo = linha.get(col_min)
+        hi = linha.get(col_max)
+
+        # Se ambos são NaN, não há definição para este porte
+        if pd.isna(lo) and pd.isna(hi):
+            continue
+
+        # Normaliza limites
+        limit_lo = 0.0 if pd.isna(lo) else lo
+        limit_hi = float('inf') if pd.isna(hi) else hi
+
+        # Lógica de comparação
+        if limit_lo == 0.0:
+            # Faixa inicial (ex: Até 2): 0 <= valor <= 2
+            if valor <= limit_hi:
+                return nome
+        else:
+            # Faixas intermediárias (ex: De 2 até 10)
+            # AQUI ESTAVA O ERRO: Mudamos de > para >=
+            # Isso garante que se o intervalo começa em 2.0, o valor 2.0 seja aceito.
+            if valor >= limit_lo and valor <= limit_hi:
+                return nome
+
+    return None
+
+
+class MatrizPortes:
+    """
+    Limites de porte do ANEXO I pré-compilados em matrizes densas (uma linha por atividade,
+    uma coluna por porte), para classificar muitas medidas de uma só vez.
+
+    As matrizes reproduzem a lógica inclusiva de classificar_porte_por_linha_valor:
+      - MIN ausente vira 0 e MAX ausente vira infinito;
+      - faixa que começa em 0 aceita qualquer valor <= MAX (o limite inferior vira -infinito);
+      - faixa sem MIN e sem MAX nunca é escolhida;
+      - vale a primeira faixa, na ordem de SPANS_PORTE, que contém o valor.
+    """
+
+    def __init__(self, itens: pd.Index, limites_inf: np.ndarray, limites_sup: np.ndarray):
+        self._itens = itens
+        self._limites_inf = limites_inf
+        self._limites_sup = limites_sup
+
+    @classmethod
+    def from_dataframe(cls, df_atividades: pd.DataFrame) -> "MatrizPortes":
+        """Compila as matrizes a partir do DataFrame de carregar_atividades_anexo_i."""
+        n = len(df_atividades)
+        limites_inf = np.empty((n, len(SPANS_PORTE)))
+        limites_sup = np.empty((n, len(SPANS_PORTE)))
+
+        for j, (_, col_min, col_max) in enumerate(SPANS_PORTE):
+            lo = cls._coluna_numerica(df_atividades, col_min, n)
+            hi = cls._coluna_numerica(df_atividades, col_max, n)
+            indefinida = np.isnan(lo) & np.isnan(hi)
+
+            lo = np.where(np.isnan(lo), 0.0, lo)
+            hi = np.where(np.isnan(hi), np.inf, hi)
+            lo = np.where(lo == 0.0, -np.inf, lo)
+
+            # Faixa vazia: nenhum valor satisfaz lo <= v <= hi
+            limites_inf[:, j] = np.where(indefinida, np.inf, lo)
+            limites_sup[:, j] = np.where(indefinida, -np.inf, hi)
+
+        itens = df_atividades["ITEM"].astype(str).str.strip() if "ITEM" in df_atividades.columns \
+            else pd.Series([""] * n)
+        return cls(pd.Index(itens.to_numpy(), dtype=object), limites_inf, limites_sup)
+
+    @staticmethod
+    def _coluna_numerica(df: pd.DataFrame, coluna: str, n: int) -> np.ndarray:
+        if coluna not in df.columns:
+            return np.full(n, np.nan)
+        return pd.to_numeric(df[coluna], errors="coerce").to_numpy(dtype=float)
+
+    def __len__(self) -> int:
+        return len(self._itens)
+
+    @property
+    def limites_inf(self) -> np.ndarray:
+        """Limite inferior de cada (linha, porte); +infinito nas faixas sem definição."""
+        return self._limites_inf
+
+    @property
+    def limites_sup(self) -> np.ndarray:
+        """Limite superior de cada (linha, porte); -infinito nas faixas sem definição."""
+        return self._limites_sup
+
+    @cached_property
+    def _posicao_por_item(self) -> dict:
+        posicoes = {}
+        for posicao, item in enumerate(self._itens):
+            posicoes.setdefault(item, posicao)
+        return posicoes
+
+    def posicao_do_item(self, item) -> int:
+        """Como posicoes_dos_itens para um único ITEM, sem passar pelo pandas."""
+        return self._posicao_por_item.get(str(item).strip(), -1)
+
+    def posicoes_dos_itens(self, itens: Sequence) -> np.ndarray:
+        """
+        Converte ITENS do ANEXO I em posições de linha (-1 quando o ITEM não existe).
+        Para ITENS repetidos no ANEXO I, vale a primeira linha.
+        """
+        itens = pd.Series(itens, dtype=object).astype(str).str.strip().to_numpy()
+        if self._itens.is_unique:
+            return self._itens.get_indexer(itens)
+        primeiros = ~self._itens.duplicated(keep="first")
+        unicos = pd.Index(self._itens[primeiros])
+        posicoes_originais = np.flatnonzero(primeiros)
+        pos = unicos.get_indexer(itens)
+        return np.where(pos >= 0, posicoes_originais[pos], -1)
+
+    def classificar_codigos_por_linha(self, posicoes: Sequence[int], medidas: Sequence[float]) -> np.ndarray:
+        """
+        Classifica cada medida contra a linha do ANEXO I de mesma posição.
+        Retorna o índice do porte em NOMES_PORTE, ou PORTE_NAO_DEFINIDO.
+        """
+        posicoes = np.asarray(posicoes, dtype=np.intp)
+        medidas = np.asarray(medidas, dtype=float)
+        validas = posicoes >= 0
+        pos = np.where(validas, posicoes, 0)
+
+        v = medidas[:, None]
+        dentro = (v >= self._limites_inf[pos]) & (v <= self._limites_sup[pos])
+
+        codigos = np.argmax(dentro, axis=1)
+        encontrado = dentro[np.arange(len(codigos)), codigos] & validas
+        return np.where(encontrado, codigos, PORTE_NAO_DEFINIDO).astype(np.int8)
+
+    def classificar_codigos(self, itens: Sequence, medidas: Sequence[float]) -> np.ndarray:
+        """Como classificar_codigos_por_linha, recebendo o ITEM do ANEXO I em vez da posição."""
+        return self.classificar_codigos_por_linha(self.posicoes_dos_itens(itens), medidas)
+
+    def classificar(self, itens: Sequence, medidas: Sequence[float]) -> np.ndarray:
+        """Retorna o nome do porte de cada par (ITEM, medida), ou None quando não houver faixa."""
+        return rotular_portes(self.classificar_codigos(itens, medidas))
+
+
+def rotular_portes(codigos: np.ndarray) -> np.ndarray:
+    """Converte códigos de porte em nomes (None para PORTE_NAO_DEFINIDO)."""
+    rotulos = np.array(NOMES_PORTE + [None], dtype=object)
+    return rotulos[np.asarray(codigos)]
@@ -0,0 +1,237 @@
+import re
+from collections import defaultdict
+from typing import NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .calculo import potencial_e_anexo_da_linha, texto_da_linha
+from .cnae import PALAVRAS_VAZIAS, IndiceCNAE
+from .normalizacao import normalizar_texto_busca
+
+# =============================
+# SUGESTÃO CNAE -> ATIVIDADE DO ANEXO I
+# =============================
+# Para cada subclasse CNAE, as atividades do ANEXO I mais parecidas são calculadas uma
+# única vez (similaridade de cosseno TF-IDF entre a denominação do CNAE e a atividade,
+# com o nome do grupo como contexto) e guardadas em uma tabela compacta
+# (n_cnaes x CANDIDATOS_POR_CNAE). A curadoria, quando existe, vem antes da sugestão
+# automática. Consultar a sugestão de um CNAE é só uma leitura nessa tabela.
+
+# Quantidade de atividades candidatas guardadas por CNAE
+CANDIDATOS_POR_CNAE = 5
+
+# Similaridade mínima para uma atividade ser sugerida
+SIMILARIDADE_MINIMA = 0.35
+
+# Peso das palavras do nome do grupo no vetor de cada atividade
+PESO_GRUPO = 0.5
+
+# Tamanho do radical: as palavras são cortadas nesse número de letras, o que junta
+# plurais e variações ("resina"/"resinas", "combustível"/"combustíveis")
+TAMANHO_RADICAL = 6
+
+# Palavras que não ajudam a distinguir atividades
+PALAVRAS_GENERICAS = PALAVRAS_VAZIAS | frozenset({
+    "atividade", "atividades", "outros", "outras", "outro", "outra", "geral", "tipo", "tipos",
+    "especificados", "especificadas", "anteriormente", "nao", "inclusive", "qualquer",
+})
+
+# Pontuação das atividades vindas da curadoria
+PONTUACAO_CURADORIA = 1.0
+
+_EXCETO = re.compile(r"\bexceto\b.*")
+
+
+class SugestaoAtividade(NamedTuple):
+    """Atividade do ANEXO I sugerida para um CNAE."""
+    subclasse: str
+    item: str
+    atividade: str
+    unidade_medida: str
+    potencial_poluidor: str
+    anexo: str
+    pontuacao: float
+    curado: bool
+
+
+def radicais(texto: str) -> list:
+    """Radicais das palavras relevantes do texto (o que vem depois de "exceto" é ignorado)."""
+    texto = _EXCETO.sub("", normalizar_texto_busca(texto))
+    return [
+        palavra[:TAMANHO_RADICAL] for palavra in texto.split()
+        if len(palavra) > 2 and palavra not in PALAVRAS_GENERICAS and not palavra.isdigit()
+    ]
+
+
+def _vetores_tfidf(documentos: list, vocabulario: dict, idf: np.ndarray, idf_ausente: float) -> np.ndarray:
+    """Matriz (n_documentos x vocabulário) normalizada; documentos = [{radical: peso}, ...]."""
+    matriz = np.zeros((len(documentos), len(vocabulario)), dtype=np.float32)
+    normas = np.zeros(len(documentos))
+    for i, pesos in enumerate(documentos):
+        for radical, peso in pesos.items():
+            j = vocabulario.get(radical)
+            if j is None:
+                # Palavra que não aparece no ANEXO I: não casa com nada, mas conta na norma
+                normas[i] += (peso * idf_ausente) ** 2
+            else:
+                matriz[i, j] = peso * idf[j]
+        normas[i] += float(np.dot(matriz[i], matriz[i]))
+    normas = np.sqrt(normas)
+    normas[normas == 0] = 1.0
+    return matriz / normas[:, None].astype(np.float32)
+
+
+class SugestoesCNAE:
+    """
+    Tabela pré-calculada CNAE -> atividades candidatas do ANEXO I.
+
+    posicoes[i] traz as linhas do ANEXO I sugeridas para o i-ésimo CNAE do IndiceCNAE
+    (-1 quando não há mais candidatas) e pontuacoes[i] a similaridade de cada uma.
+    """
+
+    def __init__(self, atividades: pd.DataFrame, indice_cnae: IndiceCNAE,
+                 curadoria: Optional[pd.DataFrame] = None, candidatos: int = CANDIDATOS_POR_CNAE):
+        self.indice_cnae = indice_cnae
+        self.atividades = atividades
+        self._compilar_atividades()
+
+        n_cnaes = len(indice_cnae)
+        self.posicoes = np.full((n_cnaes, candidatos), -1, dtype=np.int32)
+        self.pontuacoes = np.zeros((n_cnaes, candidatos), dtype=np.float32)
+        self.curados = np.zeros((n_cnaes, candidatos), dtype=bool)
+        if n_cnaes and len(self._candidatas):
+            self._calcular_similaridades(candidatos)
+        if curadoria is not None and not curadoria.empty:
+            self._aplicar_curadoria(curadoria)
+
+    def _compilar_atividades(self):
+        """Textos, ITEM, unidade, potencial e anexo de cada linha do ANEXO I."""
+        itens, textos, unidades, potenciais, anexos = [], [], [], [], []
+        grupos = {}
+        for _, linha in self.atividades.iterrows():
+            item = texto_da_linha(linha, "ITEM")
+            atividade = texto_da_linha(linha, "Atividade")
+            potencial, anexo = potencial_e_anexo_da_linha(linha)
+            itens.append(item)
+            textos.append(atividade)
+            unidades.append(texto_da_linha(linha, "UNIDADE_DE_MEDIDA"))
+            potenciais.append(potencial)
+            anexos.append(anexo)
+            if "." not in item:
+                grupos.setdefault(item, atividade)
+
+        self.itens = np.array(itens, dtype=object)
+        self.textos_atividade = np.array(textos, dtype=object)
+        self.unidades = np.array(unidades, dtype=object)
+        self.potenciais = np.array(potenciais, dtype=object)
+        self.anexos = np.array(anexos, dtype=object)
+
+        # Só subatividades (ITEM com ponto) podem ser sugeridas; o grupo entra como contexto
+        self._candidatas = np.array([i for i, item in enumerate(itens) if "." in item], dtype=np.int32)
+        self._documentos_atividade = []
+        for posicao in self._candidatas:
+            pesos = defaultdict(float)
+            for radical in radicais(textos[posicao]):
+                pesos[radical] += 1.0
+            for radical in radicais(grupos.get(itens[posicao].split(".")[0], "")):
+                pesos[radical] = max(pesos[radical], PESO_GRUPO)
+            self._documentos_atividade.append(dict(pesos))
+        self._posicao_por_item = {}
+        for posicao, item in enumerate(itens):
+            self._posicao_por_item.setdefault(item, posicao)
+
+    def _calcular_similaridades(self, candidatos: int):
+        vocabulario = {}
+        frequencia = defaultdict(int)
+        for pesos in self._documentos_atividade:
+            for radical in pesos:
+                frequencia[radical] += 1
+                vocabulario.setdefault(radical, len(vocabulario))
+        total = len(self._documentos_atividade)
+        idf = np.zeros(len(vocabulario))
+        for radical, j in vocabulario.items():
+            idf[j] = np.log1p(total / frequencia[radical])
+        idf_ausente = float(np.log1p(total))
+
+        documentos_cnae = []
+        for denominacao in self.indice_cnae.denominacoes:
+            pesos = defaultdict(float)
+            for radical in radicais(denominacao):
+                pesos[radical] += 1.0
+            documentos_cnae.append(dict(pesos))
+
+        matriz_atividades = _vetores_tfidf(self._documentos_atividade, vocabulario, idf, idf_ausente)
+        matriz_cnaes = _vetores_tfidf(documentos_cnae, vocabulario, idf, idf_ausente)
+        similaridade = matriz_cnaes @ matriz_atividades.T
+
+        k = min(candidatos, similaridade.shape[1])
+        melhores = np.argpartition(-similaridade, k - 1, axis=1)[:, :k]
+        valores = np.take_along_axis(similaridade, melhores, axis=1)
+        ordem = np.argsort(-valores, axis=1, kind="stable")
+        melhores = np.take_along_axis(melhores, ordem, axis=1)
+        valores = np.take_along_axis(valores, ordem, axis=1)
+
+        aceitas = valores >= SIMILARIDADE_MINIMA
+        self.posicoes[:, :k] = np.where(aceitas, self._candidatas[melhores], -1)
+        self.pontuacoes[:, :k] = np.where(aceitas, np.minimum(valores, 1.0), 0.0)
+
+    def _aplicar_curadoria(self, curadoria: pd.DataFrame):
+        """Coloca as atividades da curadoria na frente das sugeridas automaticamente."""
+        for subclasse, grupo in curadoria.groupby("subclasse", sort=False):
+            i = self.indice_cnae.posicoes_dos_codigos([subclasse])[0]
+            if i < 0:
+                continue
+            curadas = [self._posicao_por_item[item] for item in grupo["ITEM"] if item in self._posicao_por_item]
+            automaticas = [p for p in self.posicoes[i] if p >= 0 and p not in curadas]
+            pontos = dict(zip(self.posicoes[i], self.pontuacoes[i]))
+            linha = (curadas + automaticas)[: self.posicoes.shape[1]]
+            self.posicoes[i] = -1
+            self.pontuacoes[i] = 0.0
+            self.curados[i] = False
+            for j, posicao in enumerate(linha):
+                self.posicoes[i, j] = posicao
+                self.curados[i, j] = posicao in curadas
+                self.pontuacoes[i, j] = PONTUACAO_CURADORIA if posicao in curadas else pontos[posicao]
+
+    def _sugestao(self, i: int, j: int) -> SugestaoAtividade:
+        posicao = self.posicoes[i, j]
+        return SugestaoAtividade(
+            subclasse=self.indice_cnae.subclasses[i],
+            item=self.itens[posicao],
+            atividade=self.textos_atividade[posicao],
+            unidade_medida=self.unidades[posicao],
+            potencial_poluidor=self.potenciais[posicao],
+            anexo=self.anexos[posicao],
+            pontuacao=float(self.pontuacoes[i, j]),
+            curado=bool(self.curados[i, j]),
+        )
+
+    def sugerir(self, cnae: str, k: int = CANDIDATOS_POR_CNAE) -> list:
+        """Atividades sugeridas para um CNAE ("4731-8/00", "4731800" ou o rótulo completo)."""
+        i = self.indice_cnae.posicoes_dos_codigos([cnae])[0]
+        if i < 0:
+            return []
+        return [self._sugestao(i, j) for j in range(min(k, self.posicoes.shape[1])) if self.posicoes[i, j] >= 0]
+
+    def sugerir_para_cnaes(self, cnaes: Sequence[str], k: int = 3) -> list:
+        """
+        Atividades sugeridas para vários CNAEs juntos (melhor pontuação de cada atividade
+        entre os CNAEs; curadas primeiro).
+        """
+        melhores = {}
+        for cnae in cnaes:
+            for sugestao in self.sugerir(cnae):
+                atual = melhores.get(sugestao.item)
+                if atual is None or (sugestao.curado, sugestao.pontuacao) > (atual.curado, atual.pontuacao):
+                    melhores[sugestao.item] = sugestao
+        return sorted(melhores.values(), key=lambda s: (s.curado, s.pontuacao), reverse=True)[:k]
+
+    def melhores_itens(self, cnaes: Sequence[str]) -> np.ndarray:
+        """ITEM da melhor atividade de cada CNAE (vetorizado; "" quando não há sugestão)."""
+        linhas = self.indice_cnae.posicoes_dos_codigos(cnaes)
+        if not len(self.indice_cnae):
+            return np.full(len(linhas), "", dtype=object)
+        melhor_posicao = np.where(linhas >= 0, self.posicoes[np.maximum(linhas, 0), 0], -1)
+        itens = np.append(self.itens, "")
+        return itens[melhor_posicao]
@@ -0,0 +1,179 @@
+import os
+import re
+from typing import Optional
+
+import pandas as pd
+
+from .indice import COLUNAS_TAXAS, COLUNAS_TAXAS_UNIDADES, UNIDADES_TAXA
+
+# =============================
+# CONFIGURAÇÃO DE ARQUIVOS CSV
+# =============================
+
+# CSV com atividades (ANEXO I) já limpo, incluindo colunas *_MIN / *_MAX
+ATIVIDADES_CSV_PATH = "ANEXO_I_cleaned_with_portes.csv"
+
+# CSV único com todas as taxas em UFAR (TLP/TLI/TLO)
+# colunas esperadas:
+#   ANEXO, DESCRICAO, PORTE, POTENCIAL_POLUIDOR, TLP, TLI, TLO
+TAXAS_CSV_PATH = "taxas_ambientais_ufar.csv"
+
+# Tabelas de taxas de cada jurisdição (município ou estado), na ordem de prioridade:
+# numa chave repetida vale a primeira tabela. Além destas, todo arquivo
+# "taxas_<jurisdicao>_<ufar|upfs>.csv" da pasta entra na jurisdição do nome (depois das
+# listadas aqui): para cadastrar um município basta incluir a tabela dele, ex.:
+# "taxas_porto_velho_ufar.csv", e apontar MUNICIPIOS_CONFIG[...]["jurisdicao"] para ela.
+# Colunas aceitas: ANEXO, PORTE, POTENCIAL_POLUIDOR e TLP/TLI/TLO (na unidade do nome
+# do arquivo) ou TLP_UFAR/.../TLO_UPFS.
+TABELAS_TAXAS_JURISDICOES = {
+    "ariquemes": [TAXAS_CSV_PATH],
+}
+PADRAO_ARQUIVO_TAXAS = re.compile(r"^taxas_(?P<jurisdicao>[a-z0-9_]+?)_(?P<unidade>ufar|upfs)\.csv$")
+
+# CSV com CNAEs (subclasse, denominacao)
+CNAE_CSV_PATH = "IBGE_CNAE_Subclass2.3.csv"
+
+# CSV opcional com a curadoria CNAE -> ITEM do ANEXO I (tem prioridade sobre a sugestão automática)
+# colunas esperadas:
+#   subclasse, ITEM   (uma linha por par; vários ITEMs do mesmo CNAE seguem a ordem do arquivo)
+CURADORIA_CNAE_CSV_PATH = "cnae_anexo_i_curadoria.csv"
+
+
+# =============================
+# CARREGAMENTO DE TABELAS
+# =============================
+# Os carregadores não fazem cache nem tratam erros: quem chama decide
+# (o app Streamlit usa st.cache_data e mostra st.error; scripts deixam a exceção subir).
+
+def carregar_tabelas_taxas(caminho_csv: str = TAXAS_CSV_PATH) -> pd.DataFrame:
+    """
+    Carrega a tabela única de TLP/TLI/TLO em UFAR.
+
+    Espera colunas:
+      - ANEXO
+      - DESCRICAO
+      - PORTE
+      - POTENCIAL_POLUIDOR
+      - TLP
+      - TLI
+      - TLO
+    """
+    df = pd.read_csv(caminho_csv, dtype=str)
+
+    # Normaliza nomes de colunas (maiúsculas, sem espaços extras)
+    df.columns = [c.strip().upper() for c in df.columns]
+
+    # Normaliza campos de filtro
+    for col in ["ANEXO", "PORTE", "POTENCIAL_POLUIDOR"]:
+        if col in df.columns:
+            df[col] = df[col].astype(str).str.strip()
+
+    # Garante que colunas TLP/TLI/TLO sejam numéricas (UFAR)
+    for col in ["TLP", "TLI", "TLO"]:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    return df
+
+
+def colunas_por_unidade(df_taxas: pd.DataFrame, unidade: str = "UFAR") -> pd.DataFrame:
+    """
+    Converte uma tabela de taxas para as colunas TLP_UFAR/.../TLO_UPFS: as colunas
+    TLP/TLI/TLO passam a valer na unidade informada; as unidades ausentes ficam NaN.
+    """
+    df = df_taxas.rename(columns={col: f"{col}_{unidade}" for col in COLUNAS_TAXAS})
+    for col in COLUNAS_TAXAS_UNIDADES:
+        df[col] = pd.to_numeric(df[col], errors="coerce") if col in df.columns else float("nan")
+    return df
+
+
+def arquivos_taxas_jurisdicoes(pasta: str = ".", tabelas: dict = TABELAS_TAXAS_JURISDICOES) -> dict:
+    """
+    Tabelas de taxas de cada jurisdição: as de TABELAS_TAXAS_JURISDICOES e, depois delas,
+    os arquivos "taxas_<jurisdicao>_<ufar|upfs>.csv" encontrados na pasta.
+    """
+    arquivos = {jurisdicao: list(caminhos) for jurisdicao, caminhos in tabelas.items()}
+    registrados = {os.path.basename(c) for caminhos in tabelas.values() for c in caminhos}
+    for nome in sorted(os.listdir(pasta)):
+        encontrado = PADRAO_ARQUIVO_TAXAS.match(nome)
+        if encontrado and nome not in registrados:
+            caminho = nome if pasta == "." else os.path.join(pasta, nome)
+            arquivos.setdefault(encontrado["jurisdicao"], []).append(caminho)
+    return arquivos
+
+
+def carregar_taxas_jurisdicoes(arquivos: Optional[dict] = None) -> pd.DataFrame:
+    """
+    Junta as tabelas de taxas de todas as jurisdições numa só, com as colunas JURISDICAO,
+    ANEXO, PORTE, POTENCIAL_POLUIDOR e TLP/TLI/TLO em UFAR e em UPFS, lado a lado.
+    """
+    arquivos = arquivos if arquivos is not None else arquivos_taxas_jurisdicoes()
+    partes = []
+    for jurisdicao, caminhos in arquivos.items():
+        for caminho in caminhos:
+            encontrado = PADRAO_ARQUIVO_TAXAS.match(os.path.basename(caminho))
+            unidade = encontrado["unidade"].upper() if encontrado else UNIDADES_TAXA[0]
+            df = colunas_por_unidade(carregar_tabelas_taxas(caminho), unidade)
+            df.insert(0, "JURISDICAO", jurisdicao)
+            partes.append(df[["JURISDICAO", "ANEXO", "PORTE", "POTENCIAL_POLUIDOR"] + COLUNAS_TAXAS_UNIDADES])
+    if not partes:
+        return pd.DataFrame(columns=["JURISDICAO", "ANEXO", "PORTE", "POTENCIAL_POLUIDOR"] + COLUNAS_TAXAS_UNIDADES)
+    return pd.concat(partes, ignore_index=True)
+
+
+def carregar_atividades_anexo_i(caminho_csv: str = ATIVIDADES_CSV_PATH) -> pd.DataFrame:
+    """Carrega o ANEXO I limpo, tratando separadores brasileiros (semicolon/comma)."""
+    # Tenta ler assumindo o padrão criado pelo script de limpeza (sep=';' e decimal=',')
+    df = pd.read_csv(caminho_csv, sep=';', dtype=str)
+
+    # Verificação de segurança: Se carregou tudo em 1 coluna só, tenta o separador padrão
+    if df.shape[1] < 2:
+        df = pd.read_csv(caminho_csv, sep=',', dtype=str)
+
+    if "ITEM" in df.columns:
+        df["ITEM"] = df["ITEM"].astype(str).str.strip()
+
+    for col in ["Atividade", "UNIDADE_DE_MEDIDA", "POTENCIAL_POLUIDOR", "ANEXO_OU_TAXA"]:
+        if col in df.columns:
+            df[col] = df[col].astype(str).str.strip()
+
+    # Converte colunas *_MIN / *_MAX para numérico com tratamento de vírgula
+    for col in df.columns:
+        if col.endswith("_MIN") or col.endswith("_MAX"):
+            # 1. Troca vírgula por ponto (para o Python entender que é decimal)
+            # 2. Converte para número
+            df[col] = (
+                df[col]
+                .astype(str)
+                .str.replace(",", ".", regex=False)
+            )
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    return df
+
+
+def carregar_cnaes(caminho_csv: str = CNAE_CSV_PATH) -> pd.DataFrame:
+    """Carrega a lista de CNAEs (subclasse, denominacao)."""
+    df = pd.read_csv(caminho_csv, dtype=str)
+    # Cria coluna combinada para exibição
+    if "subclasse" in df.columns and "denominacao" in df.columns:
+        df["DISPLAY"] = df["subclasse"] + " - " + df["denominacao"]
+    return df
+
+
+def carregar_curadoria_cnae(caminho_csv: str = CURADORIA_CNAE_CSV_PATH) -> pd.DataFrame:
+    """
+    Carrega a curadoria CNAE -> ITEM do ANEXO I (colunas subclasse, ITEM).
+    A tabela é opcional: sem o arquivo, devolve um DataFrame vazio.
+    """
+    if not os.path.exists(caminho_csv):
+        return pd.DataFrame(columns=["subclasse", "ITEM"])
+
+    df = pd.read_csv(caminho_csv, sep=';', dtype=str)
+    if df.shape[1] < 2:
+        df = pd.read_csv(caminho_csv, sep=',', dtype=str)
+
+    df = df.dropna(subset=["subclasse", "ITEM"])
+    for col in ["subclasse", "ITEM"]:
+        df[col] = df[col].str.strip()
+    return df[["subclasse", "ITEM"]]
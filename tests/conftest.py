@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+
+@pytest.fixture(autouse=True)
+def _na_raiz_do_repositorio(monkeypatch):
+    """Os caminhos das tabelas (CSV, artefato) são relativos à raiz do repositório."""
+    monkeypatch.chdir(RAIZ)
+
+
+@pytest.fixture(scope="session")
+def motor():
+    from motor_taxas import MotorTaxas
+
+    anterior = os.getcwd()
+    os.chdir(RAIZ)
+    try:
+        return MotorTaxas.carregar()
+    finally:
+        os.chdir(anterior)
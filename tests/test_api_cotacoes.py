@@ -0,0 +1,45 @@
+import asyncio
+
+import bcrypt
+import pytest
+import yaml
+
+from api_cotacoes import Credenciais, ErroRequisicao, _ler_requisicao
+
+
+def _ler(bruto: bytes):
+    async def ler():
+        leitor = asyncio.StreamReader()
+        leitor.feed_data(bruto)
+        leitor.feed_eof()
+        return await _ler_requisicao(leitor)
+    return asyncio.run(ler())
+
+
+def test_requisicao_com_corpo():
+    metodo, caminho, _, corpo, manter = _ler(
+        b"POST /cotacao?x=1 HTTP/1.1\r\nContent-Length: 2\r\n\r\n{}"
+    )
+    assert (metodo, caminho, corpo, manter) == ("POST", "/cotacao", b"{}", True)
+
+
+@pytest.mark.parametrize("tamanho", [b"abc", b"-5", b"1e3", b"\xc2\xb2"])
+def test_content_length_invalido_e_erro_400(tamanho):
+    with pytest.raises(ErroRequisicao) as erro:
+        _ler(b"POST /cotacao HTTP/1.1\r\nContent-Length: " + tamanho + b"\r\n\r\n{}")
+    assert erro.value.status == 400
+
+
+def test_senha_em_texto_puro_no_config(tmp_path):
+    caminho = tmp_path / "config.yaml"
+    hash_senha = bcrypt.hashpw(b"outra", bcrypt.gensalt(rounds=4)).decode()
+    caminho.write_text(yaml.safe_dump({"credentials": {"usernames": {
+        "ana": {"name": "Ana", "password": "senha-pura"},
+        "bia": {"name": "Bia", "password": hash_senha},
+    }}}))
+
+    credenciais = Credenciais.do_config(str(caminho))
+
+    assert credenciais.conferir("ana", "senha-pura")
+    assert not credenciais.conferir("ana", "errada")
+    assert credenciais.conferir("bia", "outra")
@@ -0,0 +1,35 @@
+import os
+
+import pytest
+import yaml
+
+import generate_keys
+from generate_keys import gravar_config_atomicamente
+
+
+def test_gravar_config_atomicamente_troca_o_arquivo_inteiro(tmp_path):
+    caminho = tmp_path / "config.yaml"
+    caminho.write_text("credentials: {}\n")
+    os.chmod(caminho, 0o600)
+
+    config = {"credentials": {"usernames": {"ana": {"name": "Ana Conceição", "password": "$2b$12$x"}}}}
+    gravar_config_atomicamente(str(caminho), config)
+
+    assert yaml.safe_load(caminho.read_text(encoding="utf-8")) == config
+    assert os.stat(caminho).st_mode & 0o777 == 0o600
+    assert os.listdir(tmp_path) == ["config.yaml"]
+
+
+def test_gravar_config_atomicamente_preserva_o_original_se_a_gravacao_falhar(tmp_path, monkeypatch):
+    caminho = tmp_path / "config.yaml"
+    caminho.write_text("credentials: {}\n")
+
+    def falhar(*args, **kwargs):
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(generate_keys.yaml, "safe_dump", falhar)
+    with pytest.raises(OSError):
+        gravar_config_atomicamente(str(caminho), {"credentials": {"usernames": {}}})
+
+    assert caminho.read_text() == "credentials: {}\n"
+    assert os.listdir(tmp_path) == ["config.yaml"]
@@ -0,0 +1,82 @@
+import sqlite3
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import pytest
+
+import database
+from database import ORDEM_HISTORICO, SQL_INSERIR_CALCULO, FiltrosHistorico, buscar_calculos
+
+MUNICIPIOS = ["Ariquemes - RO", "Porto Velho - RO"]
+PORTES = ["Mínimo", "Pequeno", "Médio"]
+
+
+@pytest.fixture
+def historico(tmp_path, monkeypatch):
+    """Banco temporário com data_hora repetidas (o desempate da paginação é pelo id)."""
+    caminho = str(tmp_path / "historico.db")
+    monkeypatch.setattr(database, "DB_NAME", caminho)
+    database.init_db()
+    inicio = datetime(2026, 1, 1, 8, 0, 0)
+    registros = [
+        ((inicio + timedelta(hours=i // 4)).strftime("%Y-%m-%d %H:%M:%S"), MUNICIPIOS[i % 2], "1 - GRUPO",
+         f"{i % 7}.{i % 3} Atividade", "10", PORTES[i % 3], "Baixo", float(i), f"{i % 5:02d}.{i:06d}", "")
+        for i in range(230)
+    ]
+    with sqlite3.connect(caminho) as conn:
+        conn.executemany(SQL_INSERIR_CALCULO, registros)
+    yield caminho
+    database.fechar_conexoes()
+
+
+def _paginas_por_cursor(filtros, tamanho_pagina) -> list:
+    paginas, cursor = [], None
+    while True:
+        pagina = buscar_calculos(filtros, cursor, tamanho_pagina)
+        paginas.append(pagina.dados)
+        if pagina.proximo_cursor is None:
+            return paginas
+        cursor = pagina.proximo_cursor
+
+
+def _paginas_por_offset(caminho, filtros, tamanho_pagina) -> list:
+    where, parametros = filtros.clausula_where()
+    paginas = []
+    with sqlite3.connect(caminho) as conn:
+        while True:
+            pagina = pd.read_sql_query(
+                f"SELECT * FROM calculos {where} {ORDEM_HISTORICO} LIMIT ? OFFSET ?", conn,
+                params=parametros + [tamanho_pagina, len(paginas) * tamanho_pagina],
+            )
+            if pagina.empty and paginas:
+                return paginas
+            paginas.append(pagina)
+            if len(pagina) < tamanho_pagina:
+                return paginas
+
+
+@pytest.mark.parametrize("filtros", [
+    FiltrosHistorico(),
+    FiltrosHistorico(municipio="Porto Velho - RO"),
+    FiltrosHistorico(data_inicio=date(2026, 1, 2), data_fim=date(2026, 1, 2), porte="Médio"),
+    FiltrosHistorico(cnpj_cpf="03.", atividade="2."),
+    FiltrosHistorico(municipio="Cidade Inexistente - RO"),
+])
+@pytest.mark.parametrize("tamanho_pagina", [1, 7, 50, 230])
+def test_paginas_por_cursor_iguais_as_paginas_por_offset(historico, filtros, tamanho_pagina):
+    por_cursor = _paginas_por_cursor(filtros, tamanho_pagina)
+    por_offset = _paginas_por_offset(historico, filtros, tamanho_pagina)
+
+    assert len(por_cursor) == len(por_offset)
+    for obtida, esperada in zip(por_cursor, por_offset):
+        pd.testing.assert_frame_equal(obtida.reset_index(drop=True), esperada)
+
+
+def test_filtros_por_prefixo_iguais_a_like(historico):
+    filtros = FiltrosHistorico(cnpj_cpf="03.", atividade="2.")
+    obtidos = pd.concat(_paginas_por_cursor(filtros, 50))["id"].tolist()
+    with sqlite3.connect(historico) as conn:
+        esperados = [linha[0] for linha in conn.execute(
+            f"SELECT id FROM calculos WHERE cnpj_cpf LIKE '03.%' AND atividade LIKE '2.%' {ORDEM_HISTORICO}"
+        )]
+    assert obtidos == esperados and esperados
@@ -0,0 +1,41 @@
+import pandas as pd
+
+from motor_taxas import MotorTaxas
+from motor_taxas.artefato import fontes_padrao
+
+
+def _motor(atividades, taxas_jurisdicoes: dict, municipios: dict) -> MotorTaxas:
+    taxas = pd.concat(
+        [df.assign(JURISDICAO=jurisdicao) for jurisdicao, df in taxas_jurisdicoes.items()], ignore_index=True
+    )
+    return MotorTaxas(atividades, taxas, municipios=municipios)
+
+
+def test_artefato_inclui_todas_as_tabelas_de_taxas():
+    assert {"ariquemes", "sedam"} <= set(fontes_padrao()["taxas"])
+
+
+def test_tabelas_de_todas_as_jurisdicoes_no_motor(motor):
+    assert {"ariquemes", "sedam"} <= set(motor.taxas_jurisdicoes.jurisdicoes)
+    assert motor.taxas_jurisdicoes.buscar("sedam", "ANEXO III", "Mínimo", "Médio", "UPFS") is not None
+
+
+def test_municipio_sem_tabela_usa_a_substituta_e_fica_marcado(motor):
+    taxas = motor.taxas[motor.taxas["JURISDICAO"] == "ariquemes"].drop(columns="JURISDICAO")
+    municipios = {
+        "Própria - RO": {"ufir": 10.0, "jurisdicao": "propria"},
+        "Emprestada - RO": {"ufir": 10.0, "jurisdicao": "sem_tabela", "jurisdicao_substituta": "propria"},
+        "Sem tabela - RO": {"ufir": 10.0, "jurisdicao": "sem_tabela"},
+    }
+    outro = _motor(motor.atividades, {"propria": taxas}, municipios)
+
+    propria = outro.cotar("Própria - RO", "1.1", 15)
+    emprestada = outro.cotar("Emprestada - RO", "1.1", 15)
+    assert (propria.erro, propria.tabela_emprestada) == (None, None)
+    assert (emprestada.erro, emprestada.tabela_emprestada) == (None, "propria")
+    assert emprestada.licencas == propria.licencas
+    assert outro.cotar("Sem tabela - RO", "1.1", 15).erro == "JURISDICAO_SEM_TABELA"
+
+    # Com a tabela do próprio município, a substituta deixa de valer
+    com_tabela = _motor(motor.atividades, {"propria": taxas, "sem_tabela": taxas}, municipios)
+    assert com_tabela.cotar("Emprestada - RO", "1.1", 15).tabela_emprestada is None
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from limpar_portes import INPUT_PATH, PORTE_COLS, MemoIntervalos, limpar_portes, parse_interval_to_min_max, \
+    parsear_intervalos
+
+# Variações que o ANEXO I real não tem, mas que parse_interval_to_min_max trata
+TEXTOS_EXTRAS = [
+    None, np.nan, 2.5, "", "   ", "-", " - ", "até", "Até 25", "ATÉ2,5", "de2,0001até 10", "de 50,01 a 100",
+    "de 1.000 até 2.000", "de10", "deaté5", "acimade60", "acima de 1.000,5", "acima", "Acima De",
+    "5", "12,5 ha", "entre 3 e 7", "3 a 7 e 9", "sem faixa", "de 3 até", "até 2 de 3",
+]
+
+
+def _como_nan(valor):
+    return np.nan if valor is None else valor
+
+
+def _textos_do_anexo_i() -> list:
+    df = pd.read_csv(INPUT_PATH, dtype=str)
+    return pd.unique(df[PORTE_COLS].to_numpy().ravel()).tolist()
+
+
+@pytest.mark.parametrize("textos", [TEXTOS_EXTRAS, _textos_do_anexo_i()], ids=["extras", "anexo_i"])
+def test_parsear_intervalos_igual_a_versao_linha_a_linha(textos):
+    minimos, maximos = parsear_intervalos(textos)
+    esperado = np.array([[_como_nan(v) for v in parse_interval_to_min_max(t)] for t in textos], dtype=float)
+    np.testing.assert_array_equal(minimos, esperado[:, 0])
+    np.testing.assert_array_equal(maximos, esperado[:, 1])
+
+
+def test_limpar_portes_reaproveita_a_memo_entre_arquivos():
+    df = pd.DataFrame({col: ["até2", "de2,0001até 10", None, "acimade60"] for col in PORTE_COLS})
+    memo = MemoIntervalos()
+    primeira = limpar_portes(df, memo)
+    convertidos = len(memo)
+    segunda = limpar_portes(df.iloc[::-1].reset_index(drop=True), memo)
+
+    assert len(memo) == convertidos == 3
+    pd.testing.assert_frame_equal(segunda, primeira.iloc[::-1].reset_index(drop=True))
+    np.testing.assert_array_equal(primeira["PORTE_MEDIO_MIN"], [0.0, 2.0001, np.nan, 60.0])
+    np.testing.assert_array_equal(primeira["PORTE_MEDIO_MAX"], [2.0, 10.0, np.nan, np.nan])
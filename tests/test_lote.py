@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from motor_taxas import MUNICIPIOS_CONFIG
+from motor_taxas.lote import CODIGOS_LICENCA
+
+MUNICIPIO_INEXISTENTE = "Cidade Inexistente - RO"
+ITEM_INEXISTENTE = "999.999"
+
+
+@pytest.fixture(scope="module")
+def entradas(motor) -> pd.DataFrame:
+    """Cada ITEM do ANEXO I em cada município, nos limites das faixas de porte e fora delas."""
+    linhas = []
+    for posicao, item in enumerate(motor.itens_por_linha):
+        limites = [float(v) for v in motor.matriz_portes.limites_sup[posicao] if np.isfinite(v)]
+        # O limite superior de cada faixa e um valor entre ele e o início da faixa seguinte
+        medidas = {-1.0, 1e12} | set(limites) | {v + 0.00005 for v in limites}
+        for municipio in list(MUNICIPIOS_CONFIG) + [MUNICIPIO_INEXISTENTE]:
+            linhas += [(municipio, item, medida) for medida in sorted(medidas)]
+    for municipio in list(MUNICIPIOS_CONFIG) + [MUNICIPIO_INEXISTENTE]:
+        linhas += [(municipio, ITEM_INEXISTENTE, 10.0), (municipio, "", 10.0)]
+    return pd.DataFrame(linhas, columns=["MUNICIPIO", "ITEM", "MEDIDA"])
+
+
+def test_cotar_lote_igual_a_cotar_linha_a_linha(motor, entradas):
+    resultado = motor.cotar_lote(entradas)
+    divergencias = []
+    for i, (municipio, item, medida) in enumerate(entradas.itertuples(index=False)):
+        cotacao = motor.cotar(municipio, item, medida)
+        linha = resultado.iloc[i]
+        obtido = (linha["ERRO"], linha["TABELA_EMPRESTADA"]) + ((linha["PORTE"],) if cotacao.erro is None else ())
+        esperado = (cotacao.erro, cotacao.tabela_emprestada) + ((cotacao.porte,) if cotacao.erro is None else ())
+        if obtido != esperado:
+            divergencias.append((municipio, item, medida, esperado, obtido))
+            continue
+        ufar = [lic.valor_ufar for lic in cotacao.licencas] or [np.nan] * len(CODIGOS_LICENCA)
+        reais = [lic.valor_reais for lic in cotacao.licencas] or [np.nan] * len(CODIGOS_LICENCA)
+        if not (np.allclose(linha[[f"{c}_UFAR" for c in CODIGOS_LICENCA]].to_numpy(float), ufar, equal_nan=True)
+                and np.allclose(linha[[f"{c}_REAIS" for c in CODIGOS_LICENCA]].to_numpy(float), reais, equal_nan=True)):
+            divergencias.append((municipio, item, medida, (ufar, reais), "valores"))
+    assert not divergencias, divergencias[:10]
+    # A conferência cobre todos os códigos de erro
+    assert set(resultado["ERRO"].dropna()) >= {"MUNICIPIO_DESCONHECIDO", "ITEM_NAO_ENCONTRADO", "PORTE_NAO_DEFINIDO"}
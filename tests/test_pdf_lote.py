@@ -0,0 +1,27 @@
+import csv
+import io
+import zipfile
+
+from motor_taxas.pdf_lote import NOME_INDICE_ZIP, gerar_pdfs_em_lote
+
+
+def test_colunas_com_nomes_que_nao_sao_identificadores(tmp_path):
+    entrada = tmp_path / "empreendimentos.csv"
+    entrada.write_text(
+        "Município - UF,1º item,Medida (m²),CNPJ\n"
+        "Ariquemes - RO,1.1,15,11.222.333/0001-81\n"
+        "Ariquemes - RO,999.999,15,22.333.444/0001-90\n",
+        encoding="utf-8",
+    )
+    saida = tmp_path / "pdfs.zip"
+
+    estatisticas = gerar_pdfs_em_lote(str(entrada), str(saida), processos=1,
+                                      colunas=("Município - UF", "1º item", "Medida (m²)"))
+
+    assert (estatisticas.linhas, estatisticas.pdfs) == (2, 1)
+    with zipfile.ZipFile(saida) as arquivo_zip:
+        indice = list(csv.DictReader(io.TextIOWrapper(arquivo_zip.open(NOME_INDICE_ZIP), encoding="utf-8")))
+        assert arquivo_zip.read(indice[0]["ARQUIVO"]).startswith(b"%PDF")
+    assert [(linha["ARQUIVO"], linha["ERRO"]) for linha in indice] == [
+        ("0000001_11222333000181.pdf", ""), ("", "ITEM_NAO_ENCONTRADO"),
+    ]